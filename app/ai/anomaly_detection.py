@@ -1,26 +1,83 @@
+import bisect
+import json
+import sqlite3
 import statistics
+from itertools import islice
+from typing import Optional
+
+try:
+    import numpy as np
+except Exception:  # numpy é opcional; sem ele usamos o caminho puro em Python
+    np = None
+
+from ..data.conformance import numeric_value
+from ..data.measurement_sources import measurements_source
+from ..data.migrations import ensure_schema
+
+CHUNK_SIZE = 5000
+
 
 class AnomalyDetector:
     """
-    Detector robusto leve, sem dependências. Usa mediana e desvio absoluto mediano (MAD).
+    Detector robusto leve. Usa mediana e desvio absoluto mediano (MAD).
+    Com numpy instalado, carrega as features em blocos (arrays colunares) e
+    pontua tabelas inteiras de uma vez via score_many(); sem numpy, cai no
+    cálculo com statistics.
     """
-    def __init__(self, db):
+    def __init__(self, db, chunk_size: int = CHUNK_SIZE):
         self.db = db
+        self.chunk_size = max(1, int(chunk_size))
         self.medians = None
         self.mads = None
         self.fields = ["status_bin", "obs_len", "item_len"]
 
-    def _features(self, r: dict) -> list[float]:
+    def _features(self, r) -> list[float]:
+        if not hasattr(r, "get"):
+            r = dict(r)  # sqlite3.Row / tuplas nomeadas
         status_bin = 1.0 if str(r.get("status","")).lower().startswith("aprov") else 0.0
         obs_len = float(len(r.get("observacoes") or ""))
         item_len = float(len(r.get("item") or ""))
         return [status_bin, obs_len, item_len]
 
-    def fit(self) -> int:
-        rows = self.db.search_inspecoes("")
-        if not rows:
-            raise RuntimeError("Sem dados para treinar.")
+    # ---------------- carga em blocos ----------------
+    def _chunks(self, rows):
+        it = iter(rows)
+        while True:
+            chunk = list(islice(it, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def _matrix(self, rows):
+        """Monta a matriz (n, len(fields)) de features bloco a bloco."""
+        blocks = [np.asarray([self._features(r) for r in c], dtype=np.float64)
+                  for c in self._chunks(rows)]
+        if not blocks:
+            return np.empty((0, len(self.fields)), dtype=np.float64)
+        return blocks[0] if len(blocks) == 1 else np.vstack(blocks)
+
+    # ---------------- treino ----------------
+    def fit(self, rows=None) -> int:
+        """
+        Treina com `rows` (lista de dicts, cursor sqlite3 etc.) ou, se omitido,
+        com todas as inspeções de db.search_inspecoes("").
+        """
+        if rows is None:
+            rows = self.db.search_inspecoes("")
+        if np is not None:
+            X = self._matrix(rows)
+            if not len(X):
+                raise RuntimeError("Sem dados para treinar.")
+            med = np.median(X, axis=0)
+            mad = np.median(np.abs(X - med), axis=0)
+            mad[mad == 0] = 1.0
+            self.medians = med.tolist()
+            self.mads = mad.tolist()
+            return int(X.shape[0])
+
         feats = [self._features(r) for r in rows]
+        if not feats:
+            raise RuntimeError("Sem dados para treinar.")
         cols = list(zip(*feats))
         self.medians = [statistics.median(c) for c in cols]
         # MAD aproximado
@@ -29,11 +86,448 @@ class AnomalyDetector:
             med = self.medians[j]
             mad = statistics.median([abs(x - med) for x in c]) or 1.0
             self.mads.append(mad)
-        return len(rows)
+        return len(feats)
 
-    def is_anomaly(self, registro: dict, thresh: float = 3.5) -> bool:
+    # ---------------- pontuação ----------------
+    def _check_fitted(self):
         if self.medians is None or self.mads is None:
             raise RuntimeError("Treine o modelo primeiro.")
+
+    def score(self, registro) -> float:
+        """Maior z robusto entre as features de um registro."""
+        self._check_fitted()
         x = self._features(registro)
-        robust_z = [abs((x[i] - self.medians[i]) / self.mads[i]) for i in range(len(x))]
-        return max(robust_z) > thresh
+        return max(abs((x[i] - self.medians[i]) / self.mads[i]) for i in range(len(x)))
+
+    def score_many(self, rows):
+        """
+        Pontua vários registros numa chamada (tabela inteira ou resultado de
+        consulta). Retorna um array numpy de z robustos (lista sem numpy),
+        na mesma ordem de `rows`.
+        """
+        self._check_fitted()
+        if np is None:
+            return [self.score(r) for r in rows]
+        X = self._matrix(rows)
+        if not len(X):
+            return np.empty(0, dtype=np.float64)
+        med = np.asarray(self.medians, dtype=np.float64)
+        mad = np.asarray(self.mads, dtype=np.float64)
+        return np.abs((X - med) / mad).max(axis=1)
+
+    def anomalies_many(self, rows, thresh: float = 3.5):
+        """Máscara booleana (ou lista de bool) das linhas anômalas."""
+        scores = self.score_many(rows)
+        if np is None:
+            return [s > thresh for s in scores]
+        return scores > thresh
+
+    def is_anomaly(self, registro: dict, thresh: float = 3.5) -> bool:
+        return self.score(registro) > thresh
+
+
+def _median_mad(values: list[float]) -> tuple[float, float]:
+    """Mediana e MAD (MAD 0 vira 1.0 para não dividir por zero)."""
+    if np is not None:
+        arr = np.asarray(values, dtype=np.float64)
+        med = float(np.median(arr))
+        mad = float(np.median(np.abs(arr - med)))
+    else:
+        med = statistics.median(values)
+        mad = statistics.median([abs(x - med) for x in values])
+    return med, (mad or 1.0)
+
+
+# Texto com vírgula decimal ("3,4") vira número; resultado qualitativo ("< 0,5",
+# "Isento", "ND") fica de fora — como 0.0 puxaria mediana e MAD do grupo.
+_NUMERIC = """
+    SELECT produto, analise, valor
+      FROM (SELECT produto, analise, valor_num(valor) AS valor FROM ({source}))
+     WHERE valor IS NOT NULL
+"""
+
+
+class AnomalyModelStore:
+    """
+    Modelos robustos (mediana/MAD) por (produto, análise), persistidos na
+    tabela 'anomaly_modelos'.
+      - refit() recalcula só os grupos cuja contagem/soma mudou na fonte
+      - check()/score() consultam um cache em memória (sem SQL por valor)
+    Fonte padrão: tblMedicao/TBL_EnsaioNumber ligadas ao TBL_Resultado
+    (app/data/measurement_sources.py); `source_sql` substitui, desde que
+    exponha produto, analise e valor. A fonte pode ser lida de outro banco
+    (`source_db`, ex.: a cópia somente leitura de app/data/snapshot.py); os
+    modelos ficam sempre em `db`. Com `measurements` (MeasurementStore), os
+    valores de um grupo alterado saem dos .npy quando batem com a
+    assinatura da fonte; senão, da consulta SQL.
+    """
+    def __init__(self, db, source_sql: Optional[str] = None, source_db=None, measurements=None):
+        self.db = db
+        self.source_db = source_db or db
+        self.source_sql = source_sql
+        self.measurements = measurements
+        self._cache: dict[tuple[str, str], tuple[float, float, int]] = {}
+        ensure_schema(self.db.conn)  # anomaly_modelos (migração 15)
+        self.load()
+
+    @staticmethod
+    def _key(produto, analise) -> tuple[str, str]:
+        return (str(produto), str(analise))
+
+    def load(self) -> int:
+        """(Re)carrega todos os modelos persistidos para o cache."""
+        cur = self.db.conn.cursor()
+        cur.execute("SELECT produto, analise, mediana, mad, n FROM anomaly_modelos")
+        self._cache = {self._key(p, a): (med, mad, n) for p, a, med, mad, n in cur.fetchall()}
+        return len(self._cache)
+
+    # ---------------- treino incremental ----------------
+    def _stored_values(self, produto, analise, n: int, soma: float):
+        """Valores do grupo na cópia .npy, se ela tiver exatamente o que a fonte tem."""
+        store = self.measurements
+        if store is None or not store.enabled or self.source_sql:
+            return None
+        s = store.series(produto, analise)
+        if s is None:
+            return None
+        vals = s.valor[~np.isnan(s.valor)]
+        if len(vals) != n or abs(float(vals.sum()) - soma) > 1e-6 * max(1.0, abs(soma)):
+            return None  # cópia atrás (ou à frente) da fonte: vale o SQL
+        return vals
+
+    def refit(self, full: bool = False) -> int:
+        """
+        Compara a assinatura (contagem, soma) de cada grupo na fonte com a
+        persistida e recalcula apenas os grupos alterados. Retorna quantos
+        grupos foram recalculados.
+        """
+        cur = self.db.conn.cursor()
+        src = self.source_db.conn.cursor()
+        source = self.source_sql or measurements_source(self.source_db.conn)
+        if source is None:
+            return 0  # nenhuma tabela de medição neste banco
+        source = _NUMERIC.format(source=source)
+        self.source_db.conn.create_function("valor_num", 1, numeric_value, deterministic=True)
+        try:
+            src.execute(
+                f"SELECT produto, analise, COUNT(*), TOTAL(valor) FROM ({source}) "
+                "GROUP BY produto, analise"
+            )
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                raise
+            return 0  # `source_sql` aponta para tabela que este banco não tem
+        current = {}
+        raw = {}  # chave normalizada -> valores originais (para o WHERE)
+        for p, a, n, soma in src.fetchall():
+            current[self._key(p, a)] = (n, soma)
+            raw[self._key(p, a)] = (p, a)
+
+        cur.execute("SELECT produto, analise, n, soma FROM anomaly_modelos")
+        stored = {self._key(p, a): (n, soma) for p, a, n, soma in cur.fetchall()}
+
+        changed = [k for k, sig in current.items()
+                   if full or stored.get(k) is None
+                   or stored[k][0] != sig[0] or abs(stored[k][1] - sig[1]) > 1e-9]
+        removed = [k for k in stored if k not in current]
+
+        upserts = []
+        for produto, analise in changed:
+            n, soma = current[(produto, analise)]
+            vals = self._stored_values(produto, analise, n, soma)
+            if vals is None:
+                src.execute(
+                    f"SELECT valor FROM ({source}) WHERE produto=? AND analise=?",
+                    raw[(produto, analise)],
+                )
+                vals = [v for (v,) in src.fetchall() if v is not None]
+            if not len(vals):
+                continue
+            med, mad = _median_mad(vals)
+            upserts.append((produto, analise, n, soma, med, mad))
+
+        cur.executemany("""
+            INSERT INTO anomaly_modelos (produto, analise, n, soma, mediana, mad, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(produto, analise) DO UPDATE SET
+                n=excluded.n, soma=excluded.soma, mediana=excluded.mediana,
+                mad=excluded.mad, atualizado_em=excluded.atualizado_em
+        """, upserts)
+        cur.executemany("DELETE FROM anomaly_modelos WHERE produto=? AND analise=?", removed)
+        self.db.conn.commit()
+
+        for produto, analise, n, _soma, med, mad in upserts:
+            self._cache[(produto, analise)] = (med, mad, n)
+        for k in removed:
+            self._cache.pop(k, None)
+        return len(upserts)
+
+    # ---------------- consulta ----------------
+    def model(self, produto, analise):
+        """(mediana, mad, n) do grupo ou None se não houver histórico."""
+        return self._cache.get(self._key(produto, analise))
+
+    def score(self, produto, analise, valor: float):
+        """z robusto do valor contra o histórico do grupo (None sem modelo)."""
+        m = self._cache.get(self._key(produto, analise))
+        if m is None:
+            return None
+        med, mad, _n = m
+        return abs((float(valor) - med) / mad)
+
+    def check(self, produto, analise, valor: float, thresh: float = 3.5) -> bool:
+        """True se o valor é anômalo para (produto, análise)."""
+        z = self.score(produto, analise, valor)
+        return z is not None and z > thresh
+
+
+# ======================= estimadores online =======================
+
+class P2Quantile:
+    """
+    Estimador de quantil P² (Jain & Chlamtac): 5 marcadores, O(1) por valor,
+    memória constante. Estado serializável via to_dict()/from_dict().
+    """
+    def __init__(self, p: float = 0.5):
+        self.p = float(p)
+        self.n = 0
+        self.q: list[float] = []                      # alturas dos marcadores
+        self.pos = [1.0, 2.0, 3.0, 4.0, 5.0]          # posições reais
+        self.des = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]  # posições desejadas
+        self.inc = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, x: float) -> None:
+        x = float(x)
+        self.n += 1
+        q, pos = self.q, self.pos
+        if self.n <= 5:
+            bisect.insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x; k = 0
+        elif x >= q[4]:
+            q[4] = x; k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            self.des[i] += self.inc[i]
+
+        for i in (1, 2, 3):
+            d = self.des[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                qn = self._parabolic(i, d)
+                if not (q[i - 1] < qn < q[i + 1]):
+                    qn = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = qn
+                pos[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.q, self.pos
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if not self.q:
+            return None
+        if self.n <= 5:
+            return self.q[min(len(self.q) - 1, int(self.p * (len(self.q) - 1) + 0.5))]
+        return self.q[2]
+
+    def to_dict(self) -> dict:
+        return {"p": self.p, "n": self.n, "q": self.q, "pos": self.pos, "des": self.des}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "P2Quantile":
+        obj = cls(d["p"])
+        obj.n = int(d["n"]); obj.q = list(d["q"])
+        obj.pos = list(d["pos"]); obj.des = list(d["des"])
+        return obj
+
+
+class EWMAStats:
+    """Média e variância com média móvel exponencial (peso `alpha`)."""
+    def __init__(self, alpha: float = 0.05):
+        self.alpha = float(alpha)
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+
+    def update(self, x: float) -> None:
+        x = float(x)
+        self.n += 1
+        if self.n == 1:
+            self.mean = x
+            return
+        diff = x - self.mean
+        incr = self.alpha * diff
+        self.mean += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+
+    @property
+    def std(self) -> float:
+        return self.var ** 0.5
+
+    def to_dict(self) -> dict:
+        return {"alpha": self.alpha, "n": self.n, "mean": self.mean, "var": self.var}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "EWMAStats":
+        obj = cls(d["alpha"])
+        obj.n = int(d["n"]); obj.mean = float(d["mean"]); obj.var = float(d["var"])
+        return obj
+
+
+# desvio-padrão -> escala do MAD (distribuição normal): deixa as duas escalas comparáveis
+_STD_TO_MAD = 0.6745
+
+
+class OnlineRobustStats:
+    """
+    Estatística robusta em fluxo: mediana e quartis por P² (MAD estimado
+    como IQR/2) mais EWMA de média/variância para acompanhar deriva.
+
+    score() mede o valor contra o nível atual do processo: centro = média
+    EWMA (segue deriva lenta, que a mediana de todo o histórico não
+    acompanha); escala = o maior entre o MAD robusto e o desvio EWMA em
+    unidades de MAD (um período recente mais instável não vira alarme).
+    """
+    WARMUP = 5
+
+    def __init__(self, alpha: float = 0.05):
+        self.q25 = P2Quantile(0.25)
+        self.q50 = P2Quantile(0.50)
+        self.q75 = P2Quantile(0.75)
+        self.ewma = EWMAStats(alpha)
+
+    @property
+    def n(self) -> int:
+        return self.q50.n
+
+    def update(self, x: float) -> None:
+        for est in (self.q25, self.q50, self.q75, self.ewma):
+            est.update(x)
+
+    def median(self):
+        return self.q50.value()
+
+    def mad(self) -> float:
+        lo, hi = self.q25.value(), self.q75.value()
+        if lo is None or hi is None:
+            return 1.0
+        return ((hi - lo) / 2.0) or 1.0
+
+    def score(self, x: float):
+        """z de x contra o nível atual (None antes de WARMUP valores)."""
+        if self.n < self.WARMUP:
+            return None
+        scale = max(self.mad(), self.ewma.std * _STD_TO_MAD)
+        return abs((float(x) - self.ewma.mean) / scale)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "q25": self.q25.to_dict(), "q50": self.q50.to_dict(),
+            "q75": self.q75.to_dict(), "ewma": self.ewma.to_dict(),
+        })
+
+    @classmethod
+    def from_json(cls, s: str) -> "OnlineRobustStats":
+        d = json.loads(s)
+        obj = cls()
+        obj.q25 = P2Quantile.from_dict(d["q25"])
+        obj.q50 = P2Quantile.from_dict(d["q50"])
+        obj.q75 = P2Quantile.from_dict(d["q75"])
+        obj.ewma = EWMAStats.from_dict(d["ewma"])
+        return obj
+
+
+class OnlineAnomalyStore:
+    """
+    Detector por (produto, análise) que se atualiza a cada medição nova,
+    sem reler o histórico. Estados ficam em 'anomaly_online' (JSON, migração
+    19) e são gravados em lote por flush() — automaticamente a cada
+    `autoflush` grupos alterados.
+
+    É alimentado pelo MeasurementStore: cada bloco de medições acrescentado
+    no refresh() chega em observe_many(); rebuild() da cópia chama reset().
+    """
+    def __init__(self, db, alpha: float = 0.05, autoflush: int = 200):
+        self.db = db
+        self.alpha = alpha
+        self.autoflush = max(1, int(autoflush))
+        self._stats: dict[tuple[str, str], OnlineRobustStats] = {}
+        self._dirty: set[tuple[str, str]] = set()
+        ensure_schema(self.db.conn)  # anomaly_online (migração 19)
+        self.load()
+
+    @staticmethod
+    def _key(produto, analise) -> tuple[str, str]:
+        return (str(produto), str(analise))
+
+    def load(self) -> int:
+        cur = self.db.conn.cursor()
+        cur.execute("SELECT produto, analise, estado FROM anomaly_online")
+        self._stats = {}
+        for p, a, estado in cur.fetchall():
+            try:
+                self._stats[self._key(p, a)] = OnlineRobustStats.from_json(estado)
+            except Exception:
+                continue  # estado corrompido: recomeça o grupo
+        self._dirty.clear()
+        return len(self._stats)
+
+    def stats(self, produto, analise):
+        return self._stats.get(self._key(produto, analise))
+
+    def score(self, produto, analise, valor: float):
+        st = self._stats.get(self._key(produto, analise))
+        return st.score(valor) if st else None
+
+    def observe(self, produto, analise, valor: float, thresh: float = 3.5) -> bool:
+        """
+        Pontua o valor contra o histórico do grupo e só então o incorpora.
+        Retorna True se o valor foi considerado anômalo.
+        """
+        k = self._key(produto, analise)
+        st = self._stats.get(k)
+        if st is None:
+            st = self._stats[k] = OnlineRobustStats(self.alpha)
+        z = st.score(valor)
+        st.update(valor)
+        self._dirty.add(k)
+        if len(self._dirty) >= self.autoflush:
+            self.flush()
+        return z is not None and z > thresh
+
+    def observe_many(self, produto, analise, valores, thresh: float = 3.5) -> int:
+        """Medições novas de um grupo, em ordem; NaN (sem número) é ignorado. Retorna quantas foram anômalas."""
+        return sum(self.observe(produto, analise, v, thresh) for v in valores if v == v)
+
+    def flush(self) -> int:
+        """Grava os estados alterados numa única transação."""
+        if not self._dirty:
+            return 0
+        rows = [(p, a, self._stats[(p, a)].n, self._stats[(p, a)].to_json())
+                for p, a in self._dirty]
+        cur = self.db.conn.cursor()
+        cur.executemany("""
+            INSERT INTO anomaly_online (produto, analise, n, estado, atualizado_em)
+            VALUES (?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(produto, analise) DO UPDATE SET
+                n=excluded.n, estado=excluded.estado, atualizado_em=excluded.atualizado_em
+        """, rows)
+        self.db.conn.commit()
+        self._dirty.clear()
+        return len(rows)
+
+    def reset(self) -> None:
+        """Zera todos os estados (a fonte vai ser relida do começo)."""
+        self.db.conn.execute("DELETE FROM anomaly_online")
+        self.db.conn.commit()
+        self._stats.clear()
+        self._dirty.clear()
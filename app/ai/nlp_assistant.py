@@ -1,33 +1,364 @@
+import datetime as dt
+import heapq
+import math
 import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..data.migrations import ensure_schema
+
+# Palavras muito frequentes em português que não ajudam no ranking
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na",
+    "nos", "nas", "um", "uma", "uns", "umas", "por", "para", "com", "sem", "que",
+    "qual", "quais", "se", "ao", "aos", "ou", "foi", "ser", "sao", "esta", "estao",
+}
+
+FIELDS = ("item", "responsavel", "status", "observacoes")
+
+
+def fold(s: str) -> str:
+    """Minúsculas e sem acentos ('Inspeção' -> 'inspecao')."""
+    s = unicodedata.normalize("NFKD", str(s or ""))
+    return "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(s: str) -> list[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", fold(s)) if t not in STOPWORDS]
+
+
+class InspecaoIndex:
+    """
+    Índice invertido persistente (tabelas qna_*) sobre 'inspecoes', com
+    ranking BM25. Gatilhos na tabela de origem registram os ids alterados em
+    qna_pendentes; sync() reindexa só esses documentos. Tabelas e gatilhos
+    vêm da migração 16.
+    """
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, conn, table: str = "inspecoes", fields=FIELDS):
+        self.conn = conn
+        self.table = table
+        self.fields = tuple(fields)
+        self._n_docs = 0
+        self._avgdl = 1.0
+        ensure_schema(conn)
+        self._refresh_stats()
+
+    def _refresh_stats(self):
+        cur = self.conn.cursor()
+        cur.execute("SELECT COUNT(*), TOTAL(len) FROM qna_docs")
+        n, total = cur.fetchone()
+        self._n_docs = int(n or 0)
+        self._avgdl = (total / n) if n else 1.0
+
+    @property
+    def n_docs(self) -> int:
+        return self._n_docs
+
+    # ---------------- manutenção ----------------
+    def sync(self, batch: int = 500) -> int:
+        """Reindexa os documentos pendentes. Retorna quantos foram processados."""
+        cur = self.conn.cursor()
+        cur.execute("SELECT doc_id FROM qna_pendentes")
+        pending = [r[0] for r in cur.fetchall()]
+        if not pending:
+            return 0
+
+        cols = ", ".join(self.fields)
+        try:
+            for i in range(0, len(pending), batch):
+                ids = pending[i:i + batch]
+                marks = ",".join("?" * len(ids))
+                cur.execute(f"SELECT id, {cols} FROM {self.table} WHERE id IN ({marks})", ids)
+                found = cur.fetchall()
+
+                cur.execute(f"DELETE FROM qna_postings WHERE doc_id IN ({marks})", ids)
+                cur.execute(f"DELETE FROM qna_docs WHERE doc_id IN ({marks})", ids)
+
+                docs, posts = [], []
+                for row in found:
+                    toks = tokenize(" ".join(str(v or "") for v in tuple(row)[1:]))
+                    docs.append((row[0], len(toks)))
+                    posts.extend((t, row[0], tf) for t, tf in Counter(toks).items())
+                cur.executemany("INSERT INTO qna_docs(doc_id, len) VALUES (?, ?)", docs)
+                cur.executemany("INSERT INTO qna_postings(termo, doc_id, tf) VALUES (?, ?, ?)", posts)
+                cur.execute(f"DELETE FROM qna_pendentes WHERE doc_id IN ({marks})", ids)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        self._refresh_stats()
+        return len(pending)
+
+    def rebuild(self) -> int:
+        cur = self.conn.cursor()
+        cur.execute("DELETE FROM qna_postings")
+        cur.execute("DELETE FROM qna_docs")
+        cur.execute(f"INSERT OR IGNORE INTO qna_pendentes(doc_id) SELECT id FROM {self.table}")
+        self.conn.commit()
+        return self.sync()
+
+    # ---------------- busca ----------------
+    def search(self, q: str, k: int = 5) -> list[tuple[float, int]]:
+        """Top-k (score, doc_id) por BM25; lê só as postings dos termos da pergunta."""
+        terms = set(tokenize(q))
+        if not terms or not self._n_docs:
+            return []
+        cur = self.conn.cursor()
+        scores: dict[int, float] = defaultdict(float)
+        for t in terms:
+            cur.execute("""
+                SELECT p.doc_id, p.tf, d.len
+                  FROM qna_postings p JOIN qna_docs d ON d.doc_id = p.doc_id
+                 WHERE p.termo = ?
+            """, (t,))
+            posts = cur.fetchall()
+            if not posts:
+                continue
+            df = len(posts)
+            idf = math.log(1 + (self._n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf, dl in posts:
+                norm = tf + self.K1 * (1 - self.B + self.B * dl / self._avgdl)
+                scores[doc_id] += idf * tf * (self.K1 + 1) / norm
+        return heapq.nlargest(k, ((s, d) for d, s in scores.items()))
+
+
+# ======================= intenções estruturadas + FTS5 =======================
+
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+# palavras que só descrevem o que se procura e não devem ir para o texto livre
+GENERICAS = {"lote", "lotes", "inspecao", "inspecoes", "resultado", "resultados",
+             "mostrar", "mostre", "listar", "liste", "quero", "ver"}
+
+_FIM_FRASE = r"(?=\s+(?:do|da|de|dos|das|em|no|na|para|cliente|produto|lote|entre|desde|ate|reprovad\w*|aprovad\w*)\b|$)"
+_DATA = r"(\d{1,2})/(\d{1,2})/(\d{2,4})"
+
+
+@dataclass
+class Intencao:
+    """Filtros extraídos de uma pergunta; `texto` é o que sobra para o ranking."""
+    produto: Optional[str] = None
+    cliente: Optional[str] = None
+    lote: Optional[str] = None
+    status: Optional[str] = None
+    data_ini: Optional[str] = None   # ISO, inclusivo
+    data_fim: Optional[str] = None   # ISO, exclusivo
+    texto: list = field(default_factory=list)
+
+    def tem_filtros(self) -> bool:
+        return any([self.produto, self.cliente, self.lote, self.status, self.data_ini, self.data_fim])
+
+
+def _iso(d: str, m: str, y: str) -> str:
+    y = int(y); y = y + 2000 if y < 100 else y
+    return dt.date(y, int(m), int(d)).isoformat()
+
+
+def parse_intencao(q: str, hoje: Optional[dt.date] = None) -> Intencao:
+    """
+    Extrai produto, cliente, lote, status e período de perguntas como
+    "lotes reprovados do produto X em setembro".
+    """
+    hoje = hoje or dt.date.today()
+    txt = " " + fold(q) + " "
+    it = Intencao()
+
+    def take(pattern):
+        nonlocal txt
+        m = re.search(pattern, txt)
+        if m:
+            txt = txt[:m.start()] + " " + txt[m.end():]
+        return m
+
+    m = take(r"\b(reprovad|aprovad)\w*")
+    if m:
+        it.status = "Reprovado" if m.group(1) == "reprovad" else "Aprovado"
+
+    m = take(r"\blotes?\s+([a-z0-9\-/\.]*\d[a-z0-9\-/\.]*)")
+    if m:
+        it.lote = m.group(1)
+
+    m = take(r"\b(?:entre|de)\s+" + _DATA + r"\s+(?:e|a|ate)\s+" + _DATA)
+    if m:
+        it.data_ini = _iso(*m.group(1, 2, 3))
+        it.data_fim = (dt.date.fromisoformat(_iso(*m.group(4, 5, 6))) + dt.timedelta(days=1)).isoformat()
+    else:
+        m = take(r"\bdesde\s+" + _DATA)
+        if m:
+            it.data_ini = _iso(*m.group(1, 2, 3))
+        m = take(r"\bate\s+" + _DATA)
+        if m:
+            it.data_fim = (dt.date.fromisoformat(_iso(*m.group(1, 2, 3))) + dt.timedelta(days=1)).isoformat()
+
+    m = take(r"\b(?:em|de|no mes de)?\s*(" + "|".join(MESES) + r")(?:\s+(?:de\s+)?(\d{4}))?\b")
+    if m and not it.data_ini:
+        mes = MESES[m.group(1)]
+        ano = int(m.group(2)) if m.group(2) else (hoje.year if mes <= hoje.month else hoje.year - 1)
+        ini = dt.date(ano, mes, 1)
+        fim = dt.date(ano + (mes == 12), mes % 12 + 1, 1)
+        it.data_ini, it.data_fim = ini.isoformat(), fim.isoformat()
+
+    m = take(r"\bproduto\s+(.+?)" + _FIM_FRASE)
+    if m:
+        it.produto = m.group(1).strip()
+    m = take(r"\bcliente\s+(.+?)" + _FIM_FRASE)
+    if m:
+        it.cliente = m.group(1).strip()
+
+    it.texto = [t for t in tokenize(txt) if t not in GENERICAS]
+    return it
+
+
+def _fts_phrase(termos) -> str:
+    return " ".join('"' + t.replace('"', '') + '"' for t in termos)
+
+
+class FtsRetriever:
+    """
+    Recuperação no banco: as intenções viram predicados SQL indexados sobre
+    'inspecoes' e o texto restante é ranqueado por bm25() numa tabela FTS5
+    de conteúdo externo (mantida por gatilhos). Resultados paginados.
+    Tabela FTS, gatilhos e índices vêm da migração 17; sem FTS5 no SQLite,
+    `available` fica False.
+    """
+    def __init__(self, conn, table: str = "inspecoes", fields=FIELDS):
+        self.conn = conn
+        self.table = table
+        self.fields = tuple(fields)
+        self.available = False
+        self.cols: set[str] = set()
+        ensure_schema(conn)
+        cur = conn.cursor()
+        cur.execute(f"PRAGMA table_info({self.table})")
+        self.cols = {r[1].lower() for r in cur.fetchall()}
+        cur.execute("SELECT 1 FROM sqlite_master WHERE name=?", (f"{self.table}_fts",))
+        self.available = bool(self.cols) and cur.fetchone() is not None
+
+    def _date_col(self) -> Optional[str]:
+        return next((c for c in ("data_emissao", "data") if c in self.cols), None)
+
+    def _where(self, it: Intencao):
+        where, params, match = [], [], []
+        if it.status and "status" in self.cols:
+            where.append("i.status = ? COLLATE NOCASE"); params.append(it.status)
+        if it.lote and "lote" in self.cols:
+            where.append("i.lote = ? COLLATE NOCASE"); params.append(it.lote)
+        dcol = self._date_col()
+        if dcol and it.data_ini:
+            where.append(f"i.{dcol} >= ?"); params.append(it.data_ini)
+        if dcol and it.data_fim:
+            where.append(f"i.{dcol} < ?"); params.append(it.data_fim)
+        if it.produto:
+            if "produto_id" in self.cols:
+                where.append("i.produto_id IN (SELECT id FROM produtos WHERE nome LIKE ? OR codigo = ?)")
+                params.extend([f"%{it.produto}%", it.produto])
+            elif "item" in self.fields and tokenize(it.produto):
+                match.append(f"item : ({_fts_phrase(tokenize(it.produto))})")
+        texto = list(it.texto)  # não altera a Intencao de quem chamou (paginação)
+        if it.cliente and "cliente_id" in self.cols:
+            where.append("i.cliente_id IN (SELECT id FROM clientes WHERE nome LIKE ? OR codigo = ?)")
+            params.extend([f"%{it.cliente}%", it.cliente])
+        elif it.cliente:
+            texto.extend(tokenize(it.cliente))
+        if texto:
+            match.append("(" + " OR ".join(_fts_phrase([t]) for t in texto) + ")")
+        return where, params, " AND ".join(match)
+
+    def search(self, q, page: int = 0, page_size: int = 20) -> list[dict]:
+        """Uma página de resultados para a pergunta (str) ou Intencao já analisada."""
+        it = q if isinstance(q, Intencao) else parse_intencao(q)
+        where, params, match = self._where(it)
+        cols = ", ".join(["i.id"] + [f"i.{c}" for c in self.fields])
+        fts = f"{self.table}_fts"
+        if match:
+            sql = (f"SELECT {cols}, bm25({fts}) AS score FROM {fts} "
+                   f"JOIN {self.table} i ON i.id = {fts}.rowid WHERE {fts} MATCH ?")
+            params = [match] + params
+            order = "score"
+        else:
+            sql = f"SELECT {cols}, 0.0 AS score FROM {self.table} i WHERE 1=1"
+            dcol = self._date_col()
+            order = f"i.{dcol} DESC" if dcol else "i.id DESC"
+        for w in where:
+            sql += " AND " + w
+        sql += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params.extend([page_size, page * page_size])
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, r)) for r in cur.fetchall()]
+
 
 class QnAAssistant:
-    def __init__(self, db):
+    """
+    Índices mantidos no banco vivo (`db`: tabelas, gatilhos, sync). Com
+    `read_db` (cópia somente leitura, app/data/snapshot.py), busca e
+    ranking leem da cópia — que leva junto os índices do momento em que foi
+    tirada — e não disputam com quem grava.
+    """
+    def __init__(self, db, read_db=None):
         self.db = db
+        self.read_db = read_db
+        self.index = InspecaoIndex(db.conn)
+        self.fts = FtsRetriever(db.conn)
+        self._readers = None  # (conn da cópia, InspecaoIndex, FtsRetriever)
+
+    def _reader(self):
+        """(índice, fts) para leitura: da cópia atual, se houver; senão os do banco vivo."""
+        conn = self.read_db.conn if self.read_db is not None else self.db.conn
+        if conn is self.db.conn:
+            return self.index, self.fts
+        if self._readers is None or self._readers[0] is not conn:
+            try:
+                self._readers = (conn, InspecaoIndex(conn), FtsRetriever(conn))
+            except Exception:
+                return self.index, self.fts  # cópia sem as tabelas qna_* ainda
+        return self._readers[1], self._readers[2]
 
-    def _tok(self, s: str) -> set[str]:
-        return set(re.findall(r"[a-zA-ZÀ-ÿ0-9]+", s.lower()))
+    def _fetch(self, ids: list[int]) -> dict[int, dict]:
+        cur = (self.read_db or self.db).conn.cursor()
+        marks = ",".join("?" * len(ids))
+        cur.execute(f"SELECT id, item, responsavel, status, observacoes FROM inspecoes WHERE id IN ({marks})", ids)
+        cols = [d[0] for d in cur.description]
+        return {r[0]: dict(zip(cols, r)) for r in cur.fetchall()}
+
+    def retrieve(self, q: str, page: int = 0, page_size: int = 20) -> list[dict]:
+        """Modo estruturado (intenções + FTS5), paginado."""
+        _index, fts = self._reader()
+        if not fts.available:
+            return []
+        return fts.search(q, page=page, page_size=page_size)
 
     def answer(self, q: str) -> str:
-        qtok = self._tok(q)
-        rows = self.db.search_inspecoes("")
-        if not rows:
+        it = parse_intencao(q)
+        index, fts = self._reader()
+        if it.tem_filtros() and fts.available:
+            top = fts.search(it, page_size=5)
+            if not top:
+                return "Nenhuma inspeção atende aos filtros informados."
+            return "Resultados:\n" + "\n".join(self._line(r) for r in top)
+
+        try:
+            self.index.sync()
+        except Exception:
+            pass  # responde com o índice como está
+        if not index.n_docs:
             return "Cadastre algumas inspeções para começar."
-        scored = []
-        for r in rows:
-            text = " ".join([
-                str(r.get("item", "")),
-                str(r.get("responsavel", "")),
-                str(r.get("status", "")),
-                str(r.get("observacoes", "")),
-            ])
-            score = len(qtok.intersection(self._tok(text)))
-            scored.append((score, r))
-        scored.sort(reverse=True, key=lambda x: x[0])
-        top = [r for s, r in scored[:5] if s > 0]
-        if not top:
+        hits = index.search(q, k=5)
+        if not hits:
             return "Sem correspondências diretas. Tente incluir item, responsável ou status."
-        lines = [
-            f"{r['id']}. {r['item']} por {r['responsavel']}. Status {r['status']}. Obs {r.get('observacoes','')}"
-            for r in top
-        ]
-        return "Resultados:\n" + "\n".join(lines)
+        rows = self._fetch([d for _, d in hits])
+        top = [rows[d] for _, d in hits if d in rows]
+        return "Resultados:\n" + "\n".join(self._line(r) for r in top)
+
+    @staticmethod
+    def _line(r: dict) -> str:
+        return f"{r['id']}. {r['item']} por {r['responsavel']}. Status {r['status']}. Obs {r.get('observacoes') or ''}"
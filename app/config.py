@@ -1,3 +1,33 @@
+import os
 from pathlib import Path
 BASE_DIR=Path(__file__).resolve().parent
 DB_PATH=BASE_DIR/'data'/'qualidade.db'
+
+def _env_int(name, default, empty=0):
+    """Inteiro da variável de ambiente: vazia -> `empty`; texto inválido -> `default`."""
+    raw=os.environ.get(name)
+    if raw is None:
+        return default
+    if not raw.strip():
+        return empty
+    try:
+        return int(raw.strip())
+    except ValueError:
+        return default
+
+# Sincronização incremental com o back-end legado (.accdb, ou .db de teste).
+# Vazio = desativada; intervalo em minutos (0 = só pelo botão "Atualizar Dados").
+SYNC_SOURCE=os.environ.get('QUALIDADE_SYNC_SOURCE','')
+SYNC_INTERVAL_MIN=_env_int('QUALIDADE_SYNC_MIN',15)
+# Tabelas do legado a sincronizar, separadas por vírgula (vazio = delta_sync.LEGACY_TABLES).
+SYNC_TABLES=[t.strip() for t in os.environ.get('QUALIDADE_SYNC_TABELAS','').split(',') if t.strip()]
+
+# Manutenção (backup, checkpoint, optimize...) só nas janelas e com o app ocioso.
+# Janelas "HH:MM-HH:MM" separadas por vírgula (vazio = qualquer hora); ocioso em minutos.
+MAINT_WINDOWS=os.environ.get('QUALIDADE_MANUT_JANELAS','12:00-13:30,19:00-06:00')
+MAINT_IDLE_MIN=_env_int('QUALIDADE_MANUT_OCIOSO_MIN',5)
+BACKUP_DIR=os.environ.get('QUALIDADE_BACKUP_DIR','')  # vazio = data/backups
+BACKUP_KEEP=_env_int('QUALIDADE_BACKUP_MANTER',7,empty=7)
+
+# Cópia somente leitura para relatórios/análises, refeita a cada N minutos (0 = lê do banco vivo).
+SNAPSHOT_MIN=_env_int('QUALIDADE_SNAPSHOT_MIN',30)
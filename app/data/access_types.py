@@ -0,0 +1,240 @@
+# app/data/access_types.py
+"""
+Mapeamento de tipos Access/ODBC -> SQLite para os migradores.
+
+O esquema de destino vem dos metadados da origem (cursor.columns do ODBC),
+não de amostras de linhas. Cada coluna recebe um "tipo lógico":
+
+  int  -> INTEGER   (Número inteiro, AutoNumeração, Sim/Não)
+  real -> REAL      (Simples, Duplo, Moeda, Decimal)
+  date -> TEXT      (Data/Hora gravada em ISO-8601)
+  text -> TEXT      (Texto curto, Memorando, GUID)
+  blob -> BLOB      (Objeto OLE, binários)
+  None -> TEXT      (desconhecido: grava como vier, igual ao migrador antigo)
+
+Com `strict=True` as tabelas são criadas como STRICT (SQLite >= 3.37), e
+um valor incompatível com a coluna vira erro em vez de ser gravado como texto.
+"""
+from __future__ import annotations
+
+import datetime
+import decimal
+import sqlite3
+from typing import Callable, Optional, Sequence
+
+ACCESS_KINDS = {
+    # inteiros
+    "COUNTER": "int", "AUTOINCREMENT": "int", "INTEGER": "int", "LONG": "int",
+    "SMALLINT": "int", "TINYINT": "int", "BYTE": "int", "BIGINT": "int",
+    "BIT": "int", "YESNO": "int",
+    # ponto flutuante / decimais
+    "REAL": "real", "SINGLE": "real", "DOUBLE": "real", "FLOAT": "real",
+    "CURRENCY": "real", "MONEY": "real", "DECIMAL": "real", "NUMERIC": "real",
+    # data/hora
+    "DATETIME": "date", "DATE": "date", "TIME": "date", "TIMESTAMP": "date",
+    # texto
+    "VARCHAR": "text", "CHAR": "text", "LONGCHAR": "text", "MEMO": "text",
+    "TEXT": "text", "WCHAR": "text", "WVARCHAR": "text", "WLONGVARCHAR": "text",
+    "GUID": "text",
+    # binários
+    "LONGBINARY": "blob", "BINARY": "blob", "VARBINARY": "blob",
+    "OLEOBJECT": "blob", "IMAGE": "blob",
+}
+
+SQLITE_DECL = {"int": "INTEGER", "real": "REAL", "date": "TEXT", "text": "TEXT", "blob": "BLOB"}
+
+# Data/Hora do Access sem parte de data (só hora) usa este dia-base
+ACCESS_ZERO_DATE = datetime.date(1899, 12, 30)
+
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d",
+    "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y",
+)
+
+
+def strict_supported() -> bool:
+    return sqlite3.sqlite_version_info >= (3, 37, 0)
+
+
+def kind_of(type_name: Optional[str]) -> Optional[str]:
+    """Tipo lógico a partir do type_name do ODBC ou do tipo declarado no SQLite."""
+    if not type_name:
+        return None
+    t = str(type_name).upper().split("(")[0].strip()
+    if t in ACCESS_KINDS:
+        return ACCESS_KINDS[t]
+    # regras de afinidade do SQLite para tipos declarados em outro .db
+    if "INT" in t:
+        return "int"
+    if any(k in t for k in ("CHAR", "CLOB", "TEXT")):
+        return "text"
+    if "BLOB" in t:
+        return "blob"
+    if any(k in t for k in ("REAL", "FLOA", "DOUB")):
+        return "real"
+    if "DATE" in t or "TIME" in t:
+        return "date"
+    return None
+
+
+def kind_of_python(type_code) -> Optional[str]:
+    """Fallback pelo cursor.description (no pyodbc o type_code é um tipo Python)."""
+    if type_code is bool or type_code is int:
+        return "int"
+    if type_code in (float, decimal.Decimal):
+        return "real"
+    if type_code in (datetime.datetime, datetime.date, datetime.time):
+        return "date"
+    if type_code is str:
+        return "text"
+    if type_code in (bytes, bytearray, memoryview):
+        return "blob"
+    return None
+
+
+def odbc_column_kinds(cursor, table: str, description=None) -> Optional[list[tuple[str, Optional[str]]]]:
+    """
+    [(coluna, tipo lógico)] na ordem do SELECT *, via cursor.columns().
+    Chamar ANTES do SELECT no mesmo cursor (columns() reexecuta o cursor).
+    Sem catálogo, usa `description` se informado; senão retorna None.
+    """
+    try:
+        meta = []
+        for r in cursor.columns(table=table):
+            name = getattr(r, "column_name", None)
+            if name:
+                pos = int(getattr(r, "ordinal_position", 0) or 0)
+                meta.append((pos, name, kind_of(getattr(r, "type_name", None))))
+        if meta:
+            return [(n, k) for _, n, k in sorted(meta, key=lambda m: m[0])]
+    except Exception:
+        pass
+    if description:
+        return description_kinds(description)
+    return None
+
+
+def description_kinds(description) -> list[tuple[str, Optional[str]]]:
+    return [(d[0], kind_of_python(d[1])) for d in description]
+
+
+def column_defs(cols: Sequence[tuple[str, Optional[str]]], strict: bool = False) -> str:
+    untyped = "ANY" if strict else "TEXT"
+    return ", ".join(f'"{c}" {SQLITE_DECL.get(k, untyped)}' for c, k in cols)
+
+
+def create_table_sql(table: str, cols: Sequence[tuple[str, Optional[str]]], strict: bool = False) -> str:
+    suffix = " STRICT" if strict and strict_supported() else ""
+    return f'CREATE TABLE IF NOT EXISTS "{table}" ({column_defs(cols, strict)}){suffix}'
+
+
+# ----------------------------- conversões -----------------------------
+
+def iso_datetime(v: datetime.datetime) -> str:
+    """Só data se a hora for 00:00, só hora se a data for o dia-base do Access."""
+    if v.date() == ACCESS_ZERO_DATE and v.time() != datetime.time(0):
+        return v.strftime("%H:%M:%S")
+    if v.time() == datetime.time(0):
+        return v.strftime("%Y-%m-%d")
+    return v.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _number(s: str):
+    s = s.strip()
+    if not s:
+        return None
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        return float(s.replace(",", "."))
+    except ValueError:
+        return s
+
+
+def to_int(v):
+    if v is None or isinstance(v, int):  # bool é int
+        return int(v) if isinstance(v, bool) else v
+    if isinstance(v, str):
+        v = _number(v)
+        if not isinstance(v, (int, float)):
+            return v
+    if isinstance(v, (float, decimal.Decimal)):
+        f = float(v)
+        return int(f) if f.is_integer() else f
+    return v
+
+
+def to_real(v):
+    if v is None or isinstance(v, float):
+        return v
+    if isinstance(v, (int, decimal.Decimal)):
+        return float(v)
+    if isinstance(v, str):
+        n = _number(v)
+        return float(n) if isinstance(n, (int, float)) else n
+    return v
+
+
+def to_date(v):
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return None
+    if isinstance(v, datetime.datetime):
+        return iso_datetime(v)
+    if isinstance(v, (datetime.date, datetime.time)):
+        return v.isoformat()
+    if isinstance(v, str):
+        s = v.strip()
+        for fmt in DATE_FORMATS:
+            try:
+                return iso_datetime(datetime.datetime.strptime(s, fmt))
+            except ValueError:
+                continue
+        return s
+    return str(v)
+
+
+def to_text(v):
+    if v is None or isinstance(v, (str, bytes)):
+        return v
+    if isinstance(v, bool):
+        return str(int(v))
+    if isinstance(v, datetime.datetime):
+        return iso_datetime(v)
+    if isinstance(v, (datetime.date, datetime.time)):
+        return v.isoformat()
+    if isinstance(v, (bytearray, memoryview)):
+        return bytes(v)
+    return str(v)
+
+
+def to_blob(v):
+    if isinstance(v, (bytearray, memoryview)):
+        return bytes(v)
+    return v
+
+
+CONVERTERS: dict[str, Callable] = {
+    "int": to_int, "real": to_real, "date": to_date, "text": to_text, "blob": to_blob,
+}
+
+
+def row_converter(kinds: Sequence[Optional[str]]) -> Callable[[list], list[tuple]]:
+    """
+    Função que converte um bloco de linhas para os tipos de destino.
+    Colunas sem tipo conhecido passam sem conversão.
+    """
+    plan = [(i, CONVERTERS[k]) for i, k in enumerate(kinds) if k in CONVERTERS]
+    if not plan:
+        return lambda rows: rows
+
+    def convert(rows):
+        out = []
+        for r in rows:
+            r = list(r)
+            for i, fn in plan:
+                r[i] = fn(r[i])
+            out.append(tuple(r))
+        return out
+    return convert
@@ -0,0 +1,392 @@
+# app/data/conformance.py
+"""
+Conformidade de lote contra as especificações gravadas como texto.
+
+analises_produto_ap (minimo/maximo, por produto) e analises_cliente
+(espec_min/espec_max, por cliente + código) guardam limites como "3,4",
+"≤ 0,02", "Isento". Cada especificação é convertida uma vez em intervalos
+numéricos e fica em cache por produto e por cliente+código; as medições de
+todos os lotes pedidos são avaliadas juntas, em arrays:
+
+  por análise : atende / não atende / sem resultado / sem especificação
+  por lote    : aprovado / reprovado / sem especificação; reprovado numa
+                análise analítica -> precisa de Liberação Especial
+
+Linha do cliente marcada "Sim?" substitui o limite do produto para a mesma
+análise; ensaio Orientativo aparece no resultado mas não reprova o lote.
+As medições vêm de tblMedicao/TBL_EnsaioNumber ligadas ao TBL_Resultado
+(ver measurement_sources); o certificado só tem o código do produto, que
+produto_por_codigo converte no id usado em analises_produto_ap.
+Sem numpy, o mesmo cálculo roda em Python puro.
+"""
+from __future__ import annotations
+
+import math
+import re
+import sqlite3
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # numpy é opcional; sem ele avaliamos linha a linha
+    np = None
+
+from .measurement_sources import measurements_source
+
+_NUM = re.compile(r"[-+]?(?:\d+(?:[.,]\d+)*|[.,]\d+)")
+_CHUNK = 500  # parâmetros por IN (...), abaixo do limite do SQLite
+
+
+class Interval(NamedTuple):
+    lo: float
+    hi: float
+    lo_open: bool
+    hi_open: bool
+    analitico: bool
+    min_txt: str
+    max_txt: str
+    nome: str = ""
+
+    def text(self) -> str:
+        if self.min_txt and self.max_txt:
+            return f"{self.min_txt} a {self.max_txt}"
+        if self.min_txt:
+            return f"mín. {self.min_txt}"
+        return f"máx. {self.max_txt}" if self.max_txt else ""
+
+
+def _norm(v) -> str:
+    return " ".join(str(v or "").split()).casefold()
+
+
+def _key(v) -> Optional[str]:
+    return None if v is None or str(v).strip() == "" else str(v).strip()
+
+
+def _to_float(num: str) -> float:
+    if "," in num and "." in num:  # 1.234,5
+        num = num.replace(".", "").replace(",", ".")
+    else:
+        num = num.replace(",", ".")
+    return float(num)
+
+
+def parse_value(text) -> float:
+    """Primeiro número do texto ('3,4', '< 0,01', '12 %'); NaN se não houver."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    m = _NUM.search(str(text or ""))
+    if not m:
+        return math.nan
+    try:
+        return _to_float(m.group())
+    except ValueError:
+        return math.nan
+
+
+def numeric_value(v) -> Optional[float]:
+    """Só valor que é inteiro um número ('3,4', '1.000,5', 0.02); '< 0,5', 'Isento', 'ND' -> None."""
+    if isinstance(v, (int, float)):
+        return None if math.isnan(v) else float(v)
+    s = str(v or "").strip()
+    if not _NUM.fullmatch(s):
+        return None
+    try:
+        return _to_float(s)
+    except ValueError:
+        return None
+
+
+def parse_limit(text) -> Tuple[Optional[float], bool]:
+    """(valor, aberto?) de um limite. '< 5' é aberto; '≤ 5', 'máx 5', '5' fechados."""
+    s = str(text or "").strip()
+    m = _NUM.search(s)
+    if not m:
+        return None, False
+    try:
+        v = _to_float(m.group())
+    except ValueError:
+        return None, False
+    head = s[:m.start()]
+    return v, any(op in head for op in ("<", ">")) and "=" not in head
+
+
+def make_interval(min_txt, max_txt, analitico: bool = True, nome: str = "") -> Optional[Interval]:
+    lo, lo_open = parse_limit(min_txt)
+    hi, hi_open = parse_limit(max_txt)
+    if lo is None and hi is None:
+        return None
+    return Interval(-math.inf if lo is None else lo, math.inf if hi is None else hi,
+                    lo_open, hi_open, analitico,
+                    str(min_txt or "").strip(), str(max_txt or "").strip(), str(nome or "").strip())
+
+
+class ConformanceEngine:
+    def __init__(self, db, source_sql: Optional[str] = None):
+        """source_sql: SELECT com lote, produto, analise e valor; None = medições do banco."""
+        self.db = db
+        self.source_sql = source_sql
+        self._codigos: Dict[str, Optional[str]] = {}
+        self._prod: Dict[str, Dict[str, Interval]] = {}
+        self._cli: Dict[Tuple[str, str], Dict[str, Interval]] = {}
+        self._cli_loaded: set = set()
+        self._merged: Dict[tuple, Dict[str, Interval]] = {}
+
+    # ---------------- especificações ----------------
+    def forget(self, produto=None, cliente=None) -> None:
+        """Descarta o cache (tudo, de um produto ou de um cliente) depois de gravar limites."""
+        if produto is None and cliente is None:
+            self._prod.clear(); self._cli.clear(); self._cli_loaded.clear(); self._merged.clear()
+            return
+        if produto is not None:
+            self._prod.pop(str(produto), None)
+            self._merged = {k: v for k, v in self._merged.items() if k[0] != str(produto)}
+        if cliente is not None:
+            c = _norm(cliente)
+            self._cli = {k: v for k, v in self._cli.items() if k[0] != c}
+            self._cli_loaded.discard(c)
+            self._merged = {k: v for k, v in self._merged.items() if k[1] != c}
+
+    def _source(self) -> Optional[str]:
+        # montada a cada uso: uma migração completa pode recriar as tabelas de medição
+        return self.source_sql or measurements_source(self.db.conn)
+
+    def produto_por_codigo(self, codigo) -> Optional[str]:
+        """Id do produto (o de analises_produto_ap) pelo código; com código repetido, o que tem limites."""
+        c = _key(codigo)
+        if c is None:
+            return None
+        if c not in self._codigos:
+            pid = None
+            for sql in ("SELECT p.id FROM produtos p WHERE TRIM(p.codigo) = ? ORDER BY "
+                        "EXISTS (SELECT 1 FROM analises_produto_ap a WHERE a.produto_id = p.id) DESC, p.id",
+                        "SELECT id FROM produtos_ap WHERE TRIM(descricao) = ? ORDER BY id"):
+                try:
+                    row = self.db.conn.execute(sql, (c,)).fetchone()
+                except sqlite3.Error:
+                    continue  # tabela ausente neste banco
+                if row:
+                    pid = str(row[0])
+                    break
+            self._codigos[c] = pid
+        return self._codigos[c]
+
+    def _in_chunks(self, sql: str, values: Sequence) -> List[tuple]:
+        out: List[tuple] = []
+        for i in range(0, len(values), _CHUNK):
+            part = values[i:i + _CHUNK]
+            marks = ", ".join("?" * len(part))
+            try:
+                out.extend(tuple(r) for r in self.db.conn.execute(sql.format(marks=marks), part))
+            except sqlite3.Error:
+                break  # tabela/coluna ausente neste banco
+        return out
+
+    def preload(self, keys: Iterable[Tuple]) -> None:
+        """Lê numa tacada as especificações de vários (produto, cliente, código)."""
+        prods, clis = set(), set()
+        for produto, cliente, codigo in keys:
+            p = _key(produto)
+            if p is not None and p not in self._prod:
+                prods.add(p)
+            if _key(cliente) is not None and _norm(cliente) not in self._cli_loaded:
+                clis.add(str(cliente).strip())
+
+        if prods:
+            for p in prods:
+                self._prod[p] = {}
+            for pid, prop, mn, mx in self._in_chunks(
+                    "SELECT produto_id, propriedade, minimo, maximo FROM analises_produto_ap "
+                    "WHERE produto_id IN ({marks}) ORDER BY rowid", sorted(prods)):
+                iv = make_interval(mn, mx, nome=prop)
+                if iv is not None and str(pid) in self._prod:
+                    self._prod[str(pid)][_norm(prop)] = iv
+
+        if clis:
+            self._cli_loaded.update(_norm(c) for c in clis)
+            for cli, cod, analise, mn, mx, ensaio, sim in self._in_chunks(
+                    "SELECT cliente, codigo, analise, espec_min, espec_max, tipo_ensaio, sim "
+                    "FROM analises_cliente WHERE cliente COLLATE NOCASE IN ({marks}) ORDER BY id",
+                    sorted(clis)):
+                if not sim:
+                    continue  # o cliente não pediu esta análise: vale a do produto
+                iv = make_interval(mn, mx, analitico=not _norm(ensaio).startswith("orient"), nome=analise)
+                if iv is not None:
+                    self._cli.setdefault((_norm(cli), _norm(cod)), {})[_norm(analise)] = iv
+
+    def spec(self, produto=None, cliente=None, codigo=None) -> Dict[str, Interval]:
+        """{análise normalizada: intervalo} efetivo para o lote (produto + cliente)."""
+        k = (_key(produto), _norm(cliente) if _key(cliente) is not None else None, _norm(codigo))
+        got = self._merged.get(k)
+        if got is None:
+            self.preload([(produto, cliente, codigo)])
+            got = dict(self._prod.get(k[0], {})) if k[0] is not None else {}
+            if k[1] is not None:
+                got.update(self._cli.get((k[1], k[2]), {}))
+            self._merged[k] = got
+        return got
+
+    # ---------------- avaliação ----------------
+    def evaluate(self, rows: Iterable[Sequence], lots: Iterable[Sequence] = ()) -> Dict[tuple, dict]:
+        """
+        rows: (lote, produto, cliente, codigo, analise, valor) de vários lotes.
+        lots: lotes que devem aparecer mesmo sem medição.
+        Retorna {(lote, produto, cliente, codigo): veredito}, na ordem de chegada.
+        """
+        rows = [tuple(r) for r in rows]
+        order: Dict[tuple, int] = {}
+        for lk in lots:
+            order.setdefault(tuple(lk), len(order))
+        for r in rows:
+            order.setdefault(r[:4], len(order))
+        self.preload({lk[1:] for lk in order})
+        lot_specs = [self.spec(*lk[1:]) for lk in order]
+
+        groups: Dict[Tuple[int, str], int] = {}
+        g_spec: List[Optional[Interval]] = []
+        g_label: List[str] = []
+        g_lot: List[int] = []
+        g_of: List[int] = []
+        vals: List[float] = []
+        for r in rows:
+            li = order[r[:4]]
+            a = _norm(r[4])
+            gi = groups.get((li, a))
+            if gi is None:
+                gi = groups[(li, a)] = len(g_spec)
+                g_spec.append(lot_specs[li].get(a))
+                g_label.append(str(r[4] or ""))
+                g_lot.append(li)
+            g_of.append(gi)
+            vals.append(parse_value(r[5]))
+
+        n, fora, vmin, vmax = _group_stats(vals, g_of, g_spec)
+
+        out: Dict[tuple, dict] = {}
+        for lk, li in order.items():
+            out[lk] = {"lote": lk[0], "produto": lk[1], "cliente": lk[2], "codigo": lk[3],
+                       "status": "sem especificação", "liberacao_especial": False,
+                       "analises": [], "pendentes": []}
+        lot_keys = list(order)
+        seen: Dict[int, set] = {}
+        for (li, a), gi in groups.items():
+            seen.setdefault(li, set()).add(a)
+            iv = g_spec[gi]
+            if iv is None:
+                st = "sem especificação"
+            elif not n[gi]:
+                st = "sem resultado"
+            else:
+                st = "não atende" if fora[gi] else "atende"
+            out[lot_keys[li]]["analises"].append({
+                "analise": g_label[gi], "status": st, "n": n[gi], "fora": fora[gi],
+                "valor_min": vmin[gi], "valor_max": vmax[gi],
+                "analitico": bool(iv and iv.analitico), "especificacao": iv.text() if iv else "",
+            })
+        for lk, li in order.items():
+            v = out[lk]
+            evaluated = [x for x in v["analises"] if x["status"] in ("atende", "não atende")]
+            if any(x["status"] == "não atende" and x["analitico"] for x in evaluated):
+                v["status"], v["liberacao_especial"] = "reprovado", True
+            elif evaluated:
+                v["status"] = "aprovado"
+            v["pendentes"] = [iv.nome or a for a, iv in lot_specs[li].items()
+                              if iv.analitico and a not in seen.get(li, ())]
+        return out
+
+    def _temp_lots(self, cur, lots: List[tuple]) -> None:
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS _conf_lots (seq INTEGER PRIMARY KEY, lote TEXT, produto NUMERIC)")
+        cur.execute("DELETE FROM temp._conf_lots")
+        cur.executemany("INSERT INTO temp._conf_lots (seq, lote, produto) VALUES (?,?,?)",
+                        [(i, lk[0], _key(lk[1])) for i, lk in enumerate(lots)])
+
+    def evaluate_lots(self, lots: Iterable[Sequence]) -> Dict[tuple, dict]:
+        """
+        Vereditos de vários lotes (lote, produto, cliente, codigo) — produto
+        None casa qualquer produto do lote. Medições de todos numa consulta.
+        """
+        lots = [tuple(lk) + (None,) * (4 - len(lk)) for lk in lots]
+        if not lots:
+            return {}
+        source = self._source()
+        if not source:  # nenhuma tabela de medição neste banco
+            return self.evaluate([], lots)
+        conn = self.db.conn
+        in_tx = conn.in_transaction
+        cur = conn.cursor()
+        rows: List[tuple] = []
+        try:
+            self._temp_lots(cur, lots)
+            cur.execute(f"""
+                SELECT t.seq, m.analise, m.valor
+                  FROM temp._conf_lots t
+                  JOIN ({source}) m
+                    ON m.lote = t.lote AND (t.produto IS NULL OR m.produto = t.produto)
+            """)
+            rows = [(*lots[seq], analise, valor) for seq, analise, valor in cur.fetchall()]
+            cur.execute("DELETE FROM temp._conf_lots")
+        except Exception:
+            pass  # fonte de medições ausente: lotes saem sem resultado
+        finally:
+            if not in_tx and conn.in_transaction:
+                try:
+                    conn.commit()
+                except Exception:
+                    pass
+        return self.evaluate(rows, lots)
+
+    def evaluate_production(self, where: str = "", args: tuple = ()) -> Dict[tuple, dict]:
+        """
+        Todos os lotes da fonte que casam com `where` (colunas da fonte, ex.:
+        "lote LIKE ?" ou a data, se a fonte expuser), contra a especificação
+        do produto. Uma consulta e um cálculo para o dia inteiro.
+        """
+        source = self._source()
+        if not source:
+            return {}
+        sql = f"SELECT lote, produto, NULL, NULL, analise, valor FROM ({source})"
+        if where:
+            sql += f" WHERE {where}"
+        try:
+            rows = self.db.conn.execute(sql, tuple(args)).fetchall()
+        except sqlite3.Error:
+            return {}
+        return self.evaluate(rows)
+
+
+def _group_stats(vals: List[float], g_of: List[int], g_spec: List[Optional[Interval]]):
+    """Por grupo (lote, análise): nº de valores numéricos, quantos fora, mínimo e máximo."""
+    ng = len(g_spec)
+    if np is not None:
+        if not ng:
+            return [], [], [], []
+        v = np.asarray(vals, dtype=np.float64)
+        g = np.asarray(g_of, dtype=np.int64)
+        inf = [iv or Interval(-math.inf, math.inf, False, False, False, "", "") for iv in g_spec]
+        lo = np.asarray([iv.lo for iv in inf])[g]
+        hi = np.asarray([iv.hi for iv in inf])[g]
+        lo_open = np.asarray([iv.lo_open for iv in inf], dtype=bool)[g]
+        hi_open = np.asarray([iv.hi_open for iv in inf], dtype=bool)[g]
+        ok = ~np.isnan(v)
+        out = ok & ((v < lo) | (v > hi) | (lo_open & (v == lo)) | (hi_open & (v == hi)))
+        n = np.bincount(g, weights=ok, minlength=ng).astype(int)
+        fora = np.bincount(g, weights=out, minlength=ng).astype(int)
+        vmin = np.full(ng, np.inf); np.minimum.at(vmin, g[ok], v[ok])
+        vmax = np.full(ng, -np.inf); np.maximum.at(vmax, g[ok], v[ok])
+        fix = lambda a: [None if math.isinf(x) else float(x) for x in a.tolist()]
+        return n.tolist(), fora.tolist(), fix(vmin), fix(vmax)
+
+    n, fora = [0] * ng, [0] * ng
+    vmin: List[Optional[float]] = [None] * ng
+    vmax: List[Optional[float]] = [None] * ng
+    for x, gi in zip(vals, g_of):
+        if math.isnan(x):
+            continue
+        n[gi] += 1
+        vmin[gi] = x if vmin[gi] is None else min(vmin[gi], x)
+        vmax[gi] = x if vmax[gi] is None else max(vmax[gi], x)
+        iv = g_spec[gi]
+        if iv is not None and (x < iv.lo or x > iv.hi or (iv.lo_open and x == iv.lo)
+                               or (iv.hi_open and x == iv.hi)):
+            fora[gi] += 1
+    return n, fora, vmin, vmax
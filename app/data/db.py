@@ -3,6 +3,8 @@ import sqlite3
 from pathlib import Path
 import hashlib
 
+from .migrations import ensure_schema
+
 try:
     from ..config import DB_PATH as CONFIG_DB_PATH
 except Exception:
@@ -41,71 +43,8 @@ class Database:
     # ---------------- schema & migrações ----------------
 
     def ensure_schema(self) -> None:
-        cur = self.conn.cursor()
-
-        # funcionarios
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS funcionarios (
-                id       INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome     TEXT NOT NULL DEFAULT '',
-                registro TEXT,
-                login    TEXT UNIQUE,
-                senha    TEXT NOT NULL,
-                papel    TEXT NOT NULL DEFAULT 'usuario'
-            )
-            """
-        )
-
-        # acessos
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS acessos (
-                login TEXT PRIMARY KEY,
-                cad_func INTEGER DEFAULT 0,
-                def_acessos INTEGER DEFAULT 0,
-                cad_clientes INTEGER DEFAULT 0,
-                cad_registros INTEGER DEFAULT 0,
-                cad_analises INTEGER DEFAULT 0,
-                cad_produtos INTEGER DEFAULT 0,
-                cad_fabrica INTEGER DEFAULT 0,
-                cad_analise_prod INTEGER DEFAULT 0,
-                cad_analise_cli INTEGER DEFAULT 0,
-                imp_rotulos INTEGER DEFAULT 0,
-                inserir_resultados INTEGER DEFAULT 0,
-                emitir_certificados INTEGER DEFAULT 0,
-                imprimir_certificados INTEGER DEFAULT 0,
-                consultas_gerais INTEGER DEFAULT 0,
-                liberacao_especial INTEGER DEFAULT 0
-            )
-            """
-        )
-
-        # --- MIGRAÇÕES: garante colunas ausentes ---
-
-        # funcionarios: registro, papel, login
-        cur.execute('PRAGMA table_info("funcionarios")')
-        fcols = {r[1].lower() for r in cur.fetchall()}
-        if "registro" not in fcols:
-            cur.execute('ALTER TABLE funcionarios ADD COLUMN registro TEXT')
-        if "papel" not in fcols:
-            cur.execute("ALTER TABLE funcionarios ADD COLUMN papel TEXT DEFAULT 'usuario'")
-        if "login" not in fcols:
-            cur.execute('ALTER TABLE funcionarios ADD COLUMN login TEXT')
-            cur.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_funcionarios_login ON funcionarios(login)')
-
-        # acessos: login único
-        cur.execute('PRAGMA table_info("acessos")')
-        acols = {r[1].lower() for r in cur.fetchall()}
-        if "login" not in acols:
-            cur.execute('ALTER TABLE acessos ADD COLUMN login TEXT')
-        cur.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_acessos_login ON acessos(login)')
-
-        self.conn.commit()
-
-        # Preenche login se vier vazio
-        cur.execute('UPDATE funcionarios SET login = COALESCE(login, LOWER(nome)) WHERE login IS NULL')
-        self.conn.commit()
+        """Aplica as migrações pendentes (app/data/migrations.py)."""
+        ensure_schema(self.conn)
 
     # ---------------- admin & auth ----------------
 
@@ -134,32 +73,40 @@ class Database:
         self.conn.commit()
 
     def verify_user(self, user_input: str, password: str):
-        """Autentica por login/nome/registro. Aceita senha SHA-256 (hash) ou texto puro."""
-        cur = self.conn.cursor()
-        hp = _sha256(password)
-
-        for col in ("login", "nome", "registro"):
-            try:
-                cur.execute(
-                    f"""
-                    SELECT id, nome, papel, login, senha
-                      FROM funcionarios
-                     WHERE {col}=? COLLATE NOCASE
-                     LIMIT 1
-                    """,
-                    (user_input,)
+        """
+        Autentica por login/nome/registro. Aceita senha SHA-256 (hash) ou texto puro.
+
+        Uma consulta só: cada ramo do UNION usa o índice NOCASE da sua coluna
+        (migração 9) e a precedência é fixa (login > nome > registro, depois
+        menor id). As permissões são compiladas à parte, uma vez por sessão
+        (ui/services/permission_service.py).
+        """
+        try:
+            row = self.conn.execute(
+                """
+                SELECT id, nome, papel, login, senha FROM (
+                    SELECT id, nome, papel, login, senha, 1 AS ordem
+                      FROM funcionarios WHERE login = ? COLLATE NOCASE
+                    UNION ALL
+                    SELECT id, nome, papel, login, senha, 2
+                      FROM funcionarios WHERE nome = ? COLLATE NOCASE
+                    UNION ALL
+                    SELECT id, nome, papel, login, senha, 3
+                      FROM funcionarios WHERE registro = ? COLLATE NOCASE
                 )
-                row = cur.fetchone()
-                if not row:
-                    continue
-                stored = row["senha"] or ""
-                ok = (stored == hp) or (stored == password)
-                if not ok:
-                    return None
-                return {"id": row["id"], "nome": row["nome"], "login": row["login"], "papel": row["papel"]}
-            except Exception:
-                continue
-        return None
+                ORDER BY ordem, id
+                LIMIT 1
+                """,
+                (user_input, user_input, user_input),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row:
+            return None
+        stored = row["senha"] or ""
+        if stored != _sha256(password) and stored != password:
+            return None
+        return {"id": row["id"], "nome": row["nome"], "login": row["login"], "papel": row["papel"]}
 
     # util
     def set_admin_password(self, new_password: str, login: str = "admin") -> None:
@@ -0,0 +1,297 @@
+# app/data/delta_sync.py
+"""
+Sincronização incremental do back-end legado (Access) para o SQLite.
+
+Em vez de recriar qualidade.db, lê da origem só o necessário e aplica
+upserts nas tabelas já migradas. Dois modos por tabela:
+
+  hwm  : chave autonumeração -> lê apenas linhas com chave > última marca
+         (tabelas onde só se acrescenta: resultados, medições, logs)
+  hash : chave primária comum -> varre a origem, compara o CRC de cada
+         linha com o último sincronizado e grava só as novas/alteradas;
+         chaves que uma sincronização anterior gravou e que sumiram da
+         origem são apagadas no destino (linhas do próprio app ficam)
+
+O modo sai da chave da origem (autonumeração -> hwm, senão hash) e pode
+ser forçado por tabela. Tabelas sem chave primária simples são puladas.
+
+O banco de destino é o mesmo que o app usa, então só se sincronizam as
+tabelas do legado (LEGACY_TABLES, ou a lista passada em `allow`); as
+tabelas do próprio app (APP_TABLES) são sempre recusadas.
+
+Fonte substituta para testes: SQLiteReader (migration_engine).
+
+Uso:
+  python -m app.data.delta_sync --source access --path "be.accdb" --sqlite app/data/qualidade.db
+  python -m app.data.delta_sync --source sqlite --path legado.db --sqlite teste.db
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .access_types import SQLITE_DECL, row_converter
+from .migration_engine import CHUNK_ROWS, TableReader, create_table, make_reader, row_checksum
+
+SYNC_STATE = "_sync_estado"
+SYNC_HASHES = "_sync_hashes"
+
+# Tabelas vinculadas ao back-end Access (ver scripts/placeholders_for_linked_tables.py).
+# TBL_Contador ficou de fora: a numeração agora é do app (SequenceService).
+LEGACY_TABLES = (
+    "TBL_Cliente", "TBL_Produto", "TBL_Funcionario", "TBL_Planta", "TBL_Segmento",
+    "TBL_Acessos", "TBL_Analise", "TBL_AnaliseProduto", "TBL_Ensaio", "TBL_EnsaioCliente",
+    "TBL_EnsaioNumber", "TBL_EnsaioText", "TBL_Resultado", "TBL_Certificado", "TBL_Descricao",
+    "TBL_Cores", "TBL_Teste", "TBL_TesteQualidade", "TBL_UnidadeEmbarque",
+    "tblBasico", "tblFrequencia", "tblMedicao", "tblTabelas",
+)
+
+# Tabelas que o app grava: nunca recebem dados da origem, nem por `allow`.
+APP_TABLES = frozenset(t.lower() for t in (
+    "TBL_Contador", "TBL_Contador_Lacuna", "funcionarios", "acessos", "cert_consulta",
+    "analises_cliente", "produtos_ap", "analises_produto_ap", "testes_qualidade",
+    "anomaly_modelos", "anomaly_online", "inspecoes_fts",
+))
+
+
+def app_owned(table: str) -> bool:
+    t = table.lower()
+    return t in APP_TABLES or t.startswith(("_", "sqlite_", "qna_", "inspecoes_fts"))
+
+
+def ensure_sync_tables(dst: sqlite3.Connection) -> None:
+    dst.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SYNC_STATE} (
+            tabela        TEXT PRIMARY KEY,
+            modo          TEXT NOT NULL,
+            chave         TEXT NOT NULL,
+            marca,                       -- maior chave já lida (modo hwm), tipo da origem
+            atualizado_em TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    dst.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SYNC_HASHES} (
+            tabela TEXT NOT NULL,
+            chave  TEXT NOT NULL,
+            hash   INTEGER NOT NULL,
+            PRIMARY KEY (tabela, chave)
+        ) WITHOUT ROWID
+    """)
+
+
+class DeltaSync:
+    """
+    Aplica no SQLite as diferenças da origem. Usa conexão própria, então
+    pode rodar fora da thread da interface (ver MainWindow._update_data).
+    """
+    def __init__(self, reader: TableReader, dst_path: Path, chunk: int = CHUNK_ROWS,
+                 modos: Optional[dict[str, str]] = None, log=print,
+                 allow: Optional[Iterable[str]] = None):
+        self.reader = reader
+        self.dst_path = Path(dst_path)
+        self.chunk = max(1, int(chunk))
+        self.modos = dict(modos or {})
+        self.log = log
+        self.allow = {t.lower() for t in (allow or LEGACY_TABLES)}
+
+    def allowed(self, table: str) -> bool:
+        return table.lower() in self.allow and not app_owned(table)
+
+    # ---------------- helpers de destino ----------------
+    @staticmethod
+    def _dst_columns(dst, table) -> list[str]:
+        return [r[1] for r in dst.execute(f'PRAGMA table_info("{table}")')]
+
+    def _prepare_table(self, dst, table, cols, kinds) -> None:
+        """Cria a tabela se for nova na origem e acrescenta colunas novas."""
+        have = self._dst_columns(dst, table)
+        if not have:
+            create_table(dst, table, cols, kinds)
+            return
+        lower = {c.lower() for c in have}
+        for c, k in zip(cols, kinds or [None] * len(cols)):
+            if c.lower() not in lower:
+                dst.execute(f'ALTER TABLE "{table}" ADD COLUMN "{c}" {SQLITE_DECL.get(k, "TEXT")}')
+
+    @staticmethod
+    def _writer(dst, table, cols, key):
+        """
+        Devolve uma função que grava um bloco com upsert. Precisa de índice
+        único na chave; se a origem tiver duplicatas, cai em DELETE+INSERT.
+        """
+        cols_sql = ", ".join(f'"{c}"' for c in cols)
+        marks = ", ".join("?" * len(cols))
+        try:
+            dst.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_sync_{table}" ON "{table}" ("{key}")')
+            sets = ", ".join(f'"{c}"=excluded."{c}"' for c in cols if c != key) or f'"{key}"=excluded."{key}"'
+            sql = (f'INSERT INTO "{table}" ({cols_sql}) VALUES ({marks}) '
+                   f'ON CONFLICT("{key}") DO UPDATE SET {sets}')
+            return lambda rows: dst.executemany(sql, rows)
+        except sqlite3.IntegrityError:
+            ki = cols.index(key)
+            delete = f'DELETE FROM "{table}" WHERE "{key}" = ?'
+            insert = f'INSERT INTO "{table}" ({cols_sql}) VALUES ({marks})'
+
+            def write(rows):
+                dst.executemany(delete, [(r[ki],) for r in rows])
+                dst.executemany(insert, rows)
+            return write
+
+    # ---------------- modos ----------------
+    def _sync_hwm(self, dst, table, key, mark) -> tuple[int, int]:
+        if mark is None:  # 1ª sincronização depois da migração: parte do que já existe
+            try:
+                mark = dst.execute(f'SELECT MAX("{key}") FROM "{table}"').fetchone()[0]
+            except sqlite3.Error:
+                mark = None
+        cols, chunks = self.reader.read_since(table, key, mark, self.chunk)
+        kinds = self.reader.column_kinds(table)
+        kinds = kinds if kinds and len(kinds) == len(cols) else None
+        convert = row_converter(kinds or [])
+        self._prepare_table(dst, table, cols, kinds)
+        write = self._writer(dst, table, cols, key)
+        ki = cols.index(key)
+        novos = 0
+        for rows in chunks:
+            rows = convert(rows)
+            dst.execute("BEGIN")
+            write(rows)
+            mark = rows[-1][ki]
+            dst.execute(f"UPDATE {SYNC_STATE} SET marca=?, atualizado_em=CURRENT_TIMESTAMP "
+                        f"WHERE tabela=?", (mark, table))
+            dst.execute("COMMIT")
+            novos += len(rows)
+        return novos, 0
+
+    def _sync_hash(self, dst, table, key) -> tuple[int, int]:
+        cols, chunks = self.reader.read(table, self.chunk)
+        kinds = self.reader.column_kinds(table)
+        kinds = kinds if kinds and len(kinds) == len(cols) else None
+        convert = row_converter(kinds or [])
+        self._prepare_table(dst, table, cols, kinds)
+        ki = cols.index(key)
+
+        known = dict(dst.execute(f"SELECT chave, hash FROM {SYNC_HASHES} WHERE tabela=?", (table,)))
+        # só o que uma sincronização anterior gravou pode ser apagado; o resto é do app
+        recorded = set(known)
+        seeded = not known  # hashes ainda não persistidos: grava todos nesta passada
+        if seeded:
+            # 1ª vez: os hashes saem do próprio destino, sem regravar a tabela
+            # (servem só para não regravar linhas iguais, nunca para apagar)
+            have = self._dst_columns(dst, table)
+            if all(c in have for c in cols):
+                cols_sql = ", ".join(f'"{c}"' for c in cols)
+                cur = dst.execute(f'SELECT {cols_sql} FROM "{table}"')
+                while True:
+                    rows = cur.fetchmany(self.chunk)
+                    if not rows:
+                        break
+                    for r in rows:
+                        known[str(r[ki])] = row_checksum(r)
+
+        write = self._writer(dst, table, cols, key)
+        put_hash = (f"INSERT INTO {SYNC_HASHES}(tabela, chave, hash) VALUES (?,?,?) "
+                    f"ON CONFLICT(tabela, chave) DO UPDATE SET hash=excluded.hash")
+        seen: set[str] = set()
+        alterados = 0
+        for rows in chunks:
+            changed, hashes = [], []
+            for r in convert(rows):
+                k = str(r[ki])
+                h = row_checksum(r)
+                seen.add(k)
+                if known.get(k) != h:
+                    changed.append(r)
+                    hashes.append((table, k, h))
+                elif seeded:
+                    hashes.append((table, k, h))
+            if not hashes:
+                continue
+            dst.execute("BEGIN")
+            if changed:
+                write(changed)
+            dst.executemany(put_hash, hashes)
+            dst.execute("COMMIT")
+            alterados += len(changed)
+
+        # só depois de varrer a origem inteira dá para saber o que foi apagado
+        gone = [k for k in recorded if k not in seen]
+        if gone:
+            dst.execute("BEGIN")
+            dst.executemany(f'DELETE FROM "{table}" WHERE CAST("{key}" AS TEXT) = ?', [(k,) for k in gone])
+            dst.executemany(f"DELETE FROM {SYNC_HASHES} WHERE tabela=? AND chave=?",
+                            [(table, k) for k in gone])
+            dst.execute("COMMIT")
+        return alterados, len(gone)
+
+    # ---------------- execução ----------------
+    def run(self, tables: Optional[list[str]] = None) -> dict[str, tuple[int, int]]:
+        """Retorna {tabela: (linhas novas/alteradas, linhas apagadas)}."""
+        t0 = time.perf_counter()
+        dst = sqlite3.connect(str(self.dst_path), isolation_level=None, timeout=30)
+        out: dict[str, tuple[int, int]] = {}
+        try:
+            ensure_sync_tables(dst)
+            state = {t: (m, k, mk) for t, m, k, mk in
+                     dst.execute(f"SELECT tabela, modo, chave, marca FROM {SYNC_STATE}")}
+            for table in (tables if tables is not None else self.reader.tables()):
+                if not self.allowed(table):
+                    if tables is not None or app_owned(table):
+                        self.log(f"Recusada {table}: fora das tabelas do legado")
+                    continue
+                try:
+                    if table in state:
+                        modo, key, mark = state[table]
+                    else:
+                        kc = self.reader.key_column(table)
+                        if not kc:
+                            self.log(f"Pulando {table}: sem chave primária simples")
+                            continue
+                        key, mark = kc[0], None
+                        modo = "hwm" if kc[1] else "hash"
+                    modo = self.modos.get(table, modo)
+                    dst.execute(
+                        f"INSERT INTO {SYNC_STATE}(tabela, modo, chave) VALUES (?,?,?) "
+                        f"ON CONFLICT(tabela) DO UPDATE SET modo=excluded.modo",
+                        (table, modo, key))
+                    if modo == "hwm":
+                        out[table] = self._sync_hwm(dst, table, key, mark)
+                    else:
+                        out[table] = self._sync_hash(dst, table, key)
+                    n, d = out[table]
+                    if n or d:
+                        self.log(f"{table}: {n} novas/alteradas, {d} apagadas ({modo})")
+                except Exception as e:
+                    if dst.in_transaction:
+                        dst.execute("ROLLBACK")
+                    self.log(f"Falhou {table}  motivo {e}")
+        finally:
+            dst.close()
+        total = sum(n + d for n, d in out.values())
+        self.log(f"Sincronização: {total} linhas em {time.perf_counter() - t0:.1f}s")
+        return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", choices=["access", "sqlite"], default="access")
+    ap.add_argument("--path", required=True, help="back-end .accdb ou arquivo SQLite de origem")
+    ap.add_argument("--sqlite", default="qualidade.db", help="SQLite já migrado a atualizar")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="linhas por bloco")
+    ap.add_argument("--tables", nargs="*", help="sincronizar só estas tabelas (do legado)")
+    ap.add_argument("--allow", nargs="*", metavar="TABELA",
+                    help="lista de tabelas do legado no lugar de LEGACY_TABLES")
+    ap.add_argument("--hash", nargs="*", default=[], metavar="TABELA",
+                    help="força o modo hash (pega edições mesmo com autonumeração)")
+    args = ap.parse_args()
+
+    reader = make_reader(args.source, Path(args.path))
+    modos = {t: "hash" for t in args.hash}
+    DeltaSync(reader, Path(args.sqlite), args.chunk, modos, allow=args.allow).run(args.tables)
+
+
+if __name__ == "__main__":
+    main()
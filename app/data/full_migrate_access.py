@@ -1,6 +1,6 @@
 # app/data/full_migrate_access.py
 from __future__ import annotations
-import argparse, sqlite3, math, datetime
+import argparse, sqlite3
 from pathlib import Path
 
 try:
@@ -8,6 +8,11 @@ try:
 except Exception as e:
     raise SystemExit("pyodbc não está instalado. Rode: pip install pyodbc") from e
 
+try:
+    from app.data.access_types import create_table_sql, description_kinds, odbc_column_kinds, row_converter
+except ImportError:  # executado como script: python app/data/full_migrate_access.py
+    from access_types import create_table_sql, description_kinds, odbc_column_kinds, row_converter
+
 
 def list_tables(cursor) -> list[str]:
     """Lista tabelas visíveis no Access, ignorando MSys*."""
@@ -37,78 +42,30 @@ def list_tables(cursor) -> list[str]:
     return tables
 
 
-def map_sqlite_type(sample_values: list) -> str:
-    """
-    Mapeia tipo SQLite com base em valores de amostra.
-    Heurística simples:
-      - todos ints -> INTEGER
-      - algum float -> REAL
-      - algum datetime/date/time -> TEXT ISO ou NUMERIC, aqui usaremos TEXT
-      - senão -> TEXT
-    """
-    has_float = False
-    all_int = True
-    has_dt = False
-
-    for v in sample_values:
-        if v is None:
-            continue
-        if isinstance(v, bool):
-            # trata bool como int
-            continue
-        if isinstance(v, (int,)):
-            continue
-        if isinstance(v, (float,)):
-            has_float = True
-            all_int = False
-        elif isinstance(v, (datetime.date, datetime.datetime, datetime.time)):
-            has_dt = True
-            all_int = False
-        else:
-            all_int = False
-
-    if has_dt:
-        return "TEXT"
-    if has_float:
-        return "REAL"
-    if all_int:
-        return "INTEGER"
-    return "TEXT"
-
-
-def migrate_table(src_cursor, dst_conn, table: str):
-    # pega metadados e uma amostra para decidir tipos
+def migrate_table(src_cursor, dst_conn, table: str, strict: bool = False):
+    # tipos do catálogo ODBC (cursor.columns), não de amostra de linhas
+    kinds = odbc_column_kinds(src_cursor, table)
     src_cursor.execute(f"SELECT * FROM [{table}]")
     desc = src_cursor.description or []
     cols = [d[0] for d in desc]
-
-    # amostra de até 200 linhas
-    rows_sample = src_cursor.fetchmany(200)
-    types = []
-    for i, col in enumerate(cols):
-        sample_vals = [r[i] for r in rows_sample if len(r) > i]
-        types.append(map_sqlite_type(sample_vals))
+    if not kinds or [c for c, _ in kinds] != cols:
+        kinds = description_kinds(desc)
+    convert = row_converter([k for _, k in kinds])
 
     # cria tabela de destino
-    col_defs = ", ".join([f'"{c}" {t}' for c, t in zip(cols, types)])
-    dst_conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({col_defs});')
+    dst_conn.execute(create_table_sql(table, kinds, strict))
     dst_conn.commit()
 
-    # se já lemos amostra, precisamos inserir também as amostras
     placeholders = ", ".join(["?"] * len(cols))
-    if rows_sample:
-        dst_conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows_sample)
-
-    # insere o resto
     while True:
         more = src_cursor.fetchmany(1000)
         if not more:
             break
-        dst_conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', more)
+        dst_conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', convert(more))
     dst_conn.commit()
 
 
-def migrate(accdb_path: Path, sqlite_path: Path):
+def migrate(accdb_path: Path, sqlite_path: Path, strict: bool = False):
     # abre fonte
     conn_str = (
         r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
@@ -136,7 +93,7 @@ def migrate(accdb_path: Path, sqlite_path: Path):
     # migra cada tabela
     for t in tables:
         try:
-            migrate_table(sc, dst, t)
+            migrate_table(sc, dst, t, strict)
             # contagem para log
             cur = dst.cursor()
             cur.execute(f'SELECT COUNT(*) FROM "{t}"')
@@ -163,8 +120,9 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--accdb", required=True, help="Caminho do arquivo .accdb")
     ap.add_argument("--sqlite", default="qualidade.db", help="Arquivo SQLite de saída")
+    ap.add_argument("--strict", action="store_true", help="Cria tabelas STRICT (SQLite >= 3.37)")
     args = ap.parse_args()
-    migrate(Path(args.accdb), Path(args.sqlite))
+    migrate(Path(args.accdb), Path(args.sqlite), args.strict)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,28 @@ import sqlite3
 from pathlib import Path
 import pyodbc
 
+try:
+    from app.data.access_types import create_table_sql, description_kinds, odbc_column_kinds, row_converter
+except ImportError:  # executado como script: python app/data/full_migrate_access_with_backend.py
+    from access_types import create_table_sql, description_kinds, odbc_column_kinds, row_converter
+
+CHUNK_ROWS = 5000
+
+# PRAGMAs de carga em massa: sem journal nem fsync durante a cópia.
+# O arquivo é recriado do zero, então uma queda só exige rodar de novo.
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA cache_size=-262144",   # ~256 MB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA locking_mode=EXCLUSIVE",
+)
+FINAL_PRAGMAS = (
+    "PRAGMA locking_mode=NORMAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+)
+
 def open_access(path: Path):
     conn_str = (
         r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
@@ -49,28 +71,87 @@ def list_with_link_info(cur):
             items.append((tname, "LOCAL", None))
         return items
 
-def create_table_if_needed(dst_conn: sqlite3.Connection, table: str, cols: list[str]):
-    col_defs = ", ".join([f'"{c}" TEXT' for c in cols])
-    sql = f'CREATE TABLE IF NOT EXISTS "{table}" ({col_defs});'
-    dst_conn.execute(sql)
-    dst_conn.commit()
+def create_table_if_needed(dst_conn: sqlite3.Connection, table: str, cols, strict: bool = False):
+    """`cols` = [(nome, tipo lógico)] vindos de access_types.odbc_column_kinds."""
+    dst_conn.execute(create_table_sql(table, cols, strict))
+
+def read_indexes(src_cursor, table: str) -> list[tuple[str, bool, list[str]]]:
+    """
+    Lê os índices da tabela no Access via ODBC (SQLStatistics).
+    Retorna [(nome, unico, [colunas...])] na ordem das colunas.
+    """
+    idx: dict[str, tuple[bool, list[tuple[int, str]]]] = {}
+    try:
+        for r in src_cursor.statistics(table):
+            name = getattr(r, "index_name", None)
+            col = getattr(r, "column_name", None)
+            if not name or not col:
+                continue
+            unique = not bool(getattr(r, "non_unique", 1))
+            pos = int(getattr(r, "ordinal_position", 0) or 0)
+            idx.setdefault(name, (unique, []))[1].append((pos, col))
+    except Exception:
+        return []
+    return [(n, u, [c for _, c in sorted(cols)]) for n, (u, cols) in idx.items()]
+
+def create_indexes(dst_conn: sqlite3.Connection, table: str, indexes) -> int:
+    """Cria os índices depois dos dados (uma ordenação por índice, não por linha)."""
+    made = 0
+    for name, unique, cols in indexes:
+        cols_sql = ", ".join(f'"{c}"' for c in cols)
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        try:
+            dst_conn.execute(f'CREATE {kind} IF NOT EXISTS "ix_{table}_{name}" ON "{table}" ({cols_sql})')
+            made += 1
+        except sqlite3.DatabaseError:
+            if unique:  # dados legados com duplicatas: mantém ao menos o índice simples
+                dst_conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{name}" ON "{table}" ({cols_sql})')
+                made += 1
+    return made
 
-def copy_all_rows(src_cursor, dst_conn: sqlite3.Connection, table: str):
+def copy_all_rows(src_cursor, dst_conn: sqlite3.Connection, table: str, chunk: int = CHUNK_ROWS,
+                  strict: bool = False) -> int:
+    """
+    Copia a tabela em blocos de `chunk` linhas (fetchmany), numa transação
+    por tabela. A memória fica limitada ao bloco, qualquer que seja o
+    tamanho da origem. Os tipos de destino vêm do catálogo ODBC e as datas
+    são gravadas em ISO-8601. Retorna quantas linhas foram copiadas.
+    """
+    kinds = odbc_column_kinds(src_cursor, table)  # antes do SELECT: reusa o cursor
     src_cursor.execute(f'SELECT * FROM [{table}]')
     desc = src_cursor.description or []
     cols = [d[0] for d in desc]
-    create_table_if_needed(dst_conn, table, cols)
+    if not kinds or [c for c, _ in kinds] != cols:
+        kinds = description_kinds(desc)
+    create_table_if_needed(dst_conn, table, kinds, strict)
+    convert = row_converter([k for _, k in kinds])
     placeholders = ", ".join(["?"] * len(cols))
-    rows = src_cursor.fetchall()
-    if rows:
-        dst_conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', rows)
-        dst_conn.commit()
+    insert = f'INSERT INTO "{table}" VALUES ({placeholders})'
+    total = 0
+    dst_conn.execute("BEGIN")
+    try:
+        while True:
+            rows = src_cursor.fetchmany(chunk)
+            if not rows:
+                break
+            dst_conn.executemany(insert, convert(rows))
+            total += len(rows)
+        dst_conn.execute("COMMIT")
+    except Exception:
+        try:
+            dst_conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+        raise
+    return total
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--accdb", required=True, help="caminho do arquivo .accdb principal")
     ap.add_argument("--backend", help="caminho LOCAL do back-end .accdb que substitui o da rede")
     ap.add_argument("--sqlite", default="qualidade.db", help="arquivo SQLite de saída")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="linhas por bloco lido da origem")
+    ap.add_argument("--strict", action="store_true", help="cria tabelas STRICT (SQLite >= 3.37)")
     args = ap.parse_args()
 
     accdb = Path(args.accdb)
@@ -86,8 +167,9 @@ def main():
     outp = Path(args.sqlite)
     if outp.exists():
         outp.unlink()
-    dst = sqlite3.connect(str(outp))
-    dst.execute("PRAGMA foreign_keys=ON;")
+    dst = sqlite3.connect(str(outp), isolation_level=None)  # transações explícitas
+    for pragma in BULK_PRAGMAS:
+        dst.execute(pragma)
 
     # se foi informado um back-end local, abre também
     backend_cur = None
@@ -104,27 +186,41 @@ def main():
     for name, kind, connstr in tables:
         print(f"- {name}  {kind}  {connstr or ''}")
 
+    counts: dict[str, int] = {}
+    pending_indexes: list[tuple[str, list]] = []
     for name, kind, _ in tables:
         try:
             if kind == "LOCAL":
-                copy_all_rows(sc, dst, name)
+                cur_src = sc
             else:
                 if backend_cur is None:
                     print(f"Pulando {name} pois é vinculada e --backend não foi informado")
                     continue
-                copy_all_rows(backend_cur, dst, name)
-            cnt = dst.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0]
-            print(f"OK {name}  linhas {cnt}")
+                cur_src = backend_cur
+            counts[name] = copy_all_rows(cur_src, dst, name, args.chunk, args.strict)
+            pending_indexes.append((name, read_indexes(cur_src, name)))
+            print(f"OK {name}  linhas {counts[name]}")
         except Exception as e:
+            # sem journal o ROLLBACK não desfaz tudo: descarta a tabela parcial
+            dst.execute(f'DROP TABLE IF EXISTS "{name}"')
             print(f"Falhou {name}  motivo {e}")
 
-    cur = dst.cursor()
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tabs = [r[0] for r in cur.fetchall()]
-    print("Resumo:", tabs)
-    for t in tabs:
-        n = cur.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0]
-        print(f"- {t}: {n} linhas")
+    # índices só depois de todos os dados carregados
+    dst.execute("BEGIN")
+    for name, indexes in pending_indexes:
+        n = create_indexes(dst, name, indexes)
+        if n:
+            print(f"Índices {name}: {n}")
+    dst.execute("COMMIT")
+
+    for pragma in FINAL_PRAGMAS:
+        dst.execute(pragma)
+    dst.execute("PRAGMA foreign_keys=ON")
+    dst.execute("ANALYZE")
+
+    print("Resumo:", sorted(counts))
+    for t in sorted(counts):
+        print(f"- {t}: {counts[t]} linhas")
 
     if backend_conn:
         backend_conn.close()
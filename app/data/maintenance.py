@@ -0,0 +1,274 @@
+# app/data/maintenance.py
+"""
+Manutenção do qualidade.db: cópia de segurança e limpeza, sem tirar o
+banco de quem está usando.
+
+Tarefas (cada uma com intervalo próprio, última execução bem-sucedida em
+_manutencao; a que falhou volta na próxima janela):
+
+  checkpoint : PRAGMA wal_checkpoint — PASSIVE sempre; TRUNCATE quando o
+               -wal passou de `wal_max_bytes` (só se ninguém estiver lendo)
+  optimize   : PRAGMA optimize (estatísticas só do que precisa)
+  analyze    : ANALYZE com analysis_limit (amostragem, tempo limitado)
+  vacuum     : PRAGMA incremental_vacuum(n), só em banco já com auto_vacuum
+               INCREMENTAL; a conversão de bancos antigos (VACUUM completo,
+               segura a escrita de todas as estações) é manual:
+               --converter-vacuum, com o app fechado nas outras máquinas
+  backup     : Connection.backup em passos de `backup_pages` páginas com
+               pausa entre eles (outras conexões continuam gravando);
+               mantém as `keep` cópias mais novas
+  snapshot   : VACUUM INTO — cópia compacta e desfragmentada
+
+Usa conexão própria, então pode rodar fora da thread da interface (ver
+MaintenanceService). `cancel` (threading.Event) interrompe o backup entre
+passos e pula as tarefas que ainda não começaram.
+
+Uso manual:
+  python -m app.data.maintenance --db app/data/qualidade.db --tarefas backup,optimize
+  python -m app.data.maintenance --db app/data/qualidade.db --converter-vacuum
+"""
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+STATE_TABLE = "_manutencao"
+
+# tarefa -> intervalo padrão em horas (ordem = ordem de execução)
+INTERVALS: Dict[str, float] = {
+    "checkpoint": 1,
+    "optimize": 24,
+    "vacuum": 24,
+    "backup": 24,
+    "analyze": 24 * 7,
+    "snapshot": 24 * 7,
+}
+
+
+class Cancelled(Exception):
+    pass
+
+
+def parse_windows(text: str) -> List[Tuple[dtime, dtime]]:
+    """'12:00-13:30, 19:00-06:00' -> [(início, fim)]; faixa que vira a noite vale."""
+    out = []
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            a, b = (datetime.strptime(x.strip(), "%H:%M").time() for x in part.split("-", 1))
+        except ValueError:
+            continue
+        out.append((a, b))
+    return out
+
+
+def in_window(windows: Iterable[Tuple[dtime, dtime]], now: Optional[datetime] = None) -> bool:
+    """Sem janelas configuradas: qualquer hora serve."""
+    windows = list(windows)
+    if not windows:
+        return True
+    t = (now or datetime.now()).time()
+    return any((a <= t < b) if a <= b else (t >= a or t < b) for a, b in windows)
+
+
+def ensure_state_table(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            tarefa    TEXT PRIMARY KEY,
+            ultima    TEXT,        -- ISO, hora local
+            resultado TEXT
+        )
+    """)
+    conn.commit()
+
+
+class Maintenance:
+    def __init__(self, db_path: Path, backup_dir: Optional[Path] = None, keep: int = 7,
+                 intervals: Optional[Dict[str, float]] = None, backup_pages: int = 256,
+                 backup_sleep: float = 0.05, wal_max_bytes: int = 64 * 1024 * 1024,
+                 vacuum_pages: int = 2000, log=print):
+        self.db_path = Path(db_path)
+        self.backup_dir = Path(backup_dir) if backup_dir else self.db_path.parent / "backups"
+        self.keep = max(1, int(keep))
+        self.intervals = {**INTERVALS, **(intervals or {})}
+        self.backup_pages = max(1, int(backup_pages))
+        self.backup_sleep = max(0.0, float(backup_sleep))
+        self.wal_max_bytes = int(wal_max_bytes)
+        self.vacuum_pages = max(1, int(vacuum_pages))
+        self.log = log
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=5, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    # ---------------- agenda ----------------
+    def due(self, now: Optional[datetime] = None) -> List[str]:
+        """Tarefas cujo intervalo venceu (na ordem de execução)."""
+        now = now or datetime.now()
+        conn = self._connect()
+        try:
+            ensure_state_table(conn)
+            last = dict(conn.execute(f"SELECT tarefa, ultima FROM {STATE_TABLE}").fetchall())
+        finally:
+            conn.close()
+        out = []
+        for task, hours in self.intervals.items():
+            if hours is None or hours <= 0:
+                continue  # desativada
+            try:
+                prev = datetime.fromisoformat(last[task]) if last.get(task) else None
+            except ValueError:
+                prev = None
+            if prev is None or now - prev >= timedelta(hours=hours):
+                out.append(task)
+        return out
+
+    def run(self, tasks: Optional[Iterable[str]] = None,
+            cancel: Optional[threading.Event] = None) -> Dict[str, str]:
+        """Executa `tasks` (padrão: as vencidas). Retorna {tarefa: resultado}."""
+        tasks = [t for t in (self.due() if tasks is None else tasks) if t in INTERVALS]
+        out: Dict[str, str] = {}
+        conn = self._connect()
+        try:
+            ensure_state_table(conn)
+            for task in tasks:
+                if cancel is not None and cancel.is_set():
+                    out[task] = "adiada"
+                    continue
+                t0 = time.monotonic()
+                try:
+                    res = getattr(self, task)(conn, cancel)
+                except Cancelled:
+                    out[task] = "interrompida"
+                    continue
+                except (sqlite3.Error, OSError) as e:
+                    # não grava a execução: a tarefa continua vencida
+                    out[task] = f"erro: {e}"
+                    self.log(f"[manutenção] {task}: {out[task]} ({time.monotonic() - t0:.1f}s)")
+                    continue
+                out[task] = res
+                self.log(f"[manutenção] {task}: {res} ({time.monotonic() - t0:.1f}s)")
+                try:
+                    conn.execute(
+                        f"INSERT INTO {STATE_TABLE} (tarefa, ultima, resultado) VALUES (?, ?, ?) "
+                        "ON CONFLICT(tarefa) DO UPDATE SET ultima=excluded.ultima, resultado=excluded.resultado",
+                        (task, datetime.now().isoformat(timespec="seconds"), res))
+                except sqlite3.Error as e:  # ex.: database is locked — a tarefa rodou, só repete antes
+                    self.log(f"[manutenção] {task}: execução não registrada ({e})")
+        finally:
+            conn.close()
+        return out
+
+    # ---------------- tarefas ----------------
+    def checkpoint(self, conn, cancel=None) -> str:
+        wal = Path(str(self.db_path) + "-wal")
+        size = wal.stat().st_size if wal.exists() else 0
+        mode = "TRUNCATE" if size > self.wal_max_bytes else "PASSIVE"
+        busy, log_pages, done = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        if busy and mode == "TRUNCATE":  # alguém lendo: fica no passivo desta vez
+            busy, log_pages, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            mode = "PASSIVE"
+        return f"{mode} {done}/{log_pages} páginas" if log_pages >= 0 else "sem WAL"
+
+    def optimize(self, conn, cancel=None) -> str:
+        conn.execute("PRAGMA optimize")
+        return "ok"
+
+    def analyze(self, conn, cancel=None) -> str:
+        conn.execute("PRAGMA analysis_limit=1000")
+        conn.execute("ANALYZE")
+        return "ok"
+
+    def vacuum(self, conn, cancel=None) -> str:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # a conversão reescreve o banco inteiro: nunca pela agenda (ver convert_vacuum)
+            return "auto_vacuum não incremental (converter com --converter-vacuum)"
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            return "sem páginas livres"
+        conn.execute(f"PRAGMA incremental_vacuum({min(free, self.vacuum_pages)})").fetchall()
+        return f"{min(free, self.vacuum_pages)} de {free} páginas livres devolvidas"
+
+    def convert_vacuum(self) -> str:
+        """
+        NONE/FULL -> INCREMENTAL (VACUUM completo, uma vez). Bloqueia a escrita
+        de todas as estações enquanto reescreve: só pela linha de comando.
+        """
+        conn = self._connect()
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return "já estava em auto_vacuum incremental"
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            return "convertido para auto_vacuum incremental"
+        finally:
+            conn.close()
+
+    def _stamp(self, kind: str) -> Path:
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        return self.backup_dir / f"{self.db_path.stem}_{kind}_{datetime.now():%Y%m%d_%H%M%S}.db"
+
+    def _rotate(self, kind: str) -> None:
+        files = sorted(self.backup_dir.glob(f"{self.db_path.stem}_{kind}_*.db"))
+        for old in files[:-self.keep]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def backup(self, conn, cancel=None) -> str:
+        dest = self._stamp("backup")
+        part = dest.with_suffix(".db.part")
+
+        def progress(_status, remaining, total):
+            if cancel is not None and cancel.is_set():
+                raise Cancelled()
+
+        target = sqlite3.connect(str(part))
+        try:
+            conn.backup(target, pages=self.backup_pages, progress=progress, sleep=self.backup_sleep)
+        except BaseException:
+            target.close()
+            part.unlink(missing_ok=True)
+            raise
+        target.close()
+        part.replace(dest)
+        self._rotate("backup")
+        return dest.name
+
+    def snapshot(self, conn, cancel=None) -> str:
+        dest = self._stamp("snapshot")
+        conn.execute("VACUUM INTO ?", (str(dest),))
+        self._rotate("snapshot")
+        return dest.name
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Manutenção do banco (backup, checkpoint, optimize...)")
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--tarefas", default="", help=f"lista separada por vírgula ({', '.join(INTERVALS)}); vazio = vencidas")
+    ap.add_argument("--destino", default=None, help="pasta dos backups/snapshots")
+    ap.add_argument("--manter", type=int, default=7)
+    ap.add_argument("--converter-vacuum", action="store_true",
+                    help="converte para auto_vacuum incremental (VACUUM completo; feche o app nas outras estações)")
+    args = ap.parse_args(argv)
+    m = Maintenance(Path(args.db), Path(args.destino) if args.destino else None, keep=args.manter,
+                    log=lambda *_: None)
+    if args.converter_vacuum:
+        print(f"vacuum: {m.convert_vacuum()}")
+        return
+    tasks = [t.strip() for t in args.tarefas.split(",") if t.strip()] or None
+    for task, res in m.run(tasks).items():
+        print(f"{task}: {res}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# app/data/measurement_sources.py
+"""
+Medições numéricas do back-end legado como uma fonte SQL única.
+
+tblMedicao e TBL_EnsaioNumber guardam só (id, resultado_id, valor,
+created_at); produto e lote vêm do TBL_Resultado pelo resultado_id. A
+análise é a primeira coluna candidata que existir na medição ou no
+resultado (id de `analises` vira a descrição); sem nenhuma, o nome da
+tabela de origem faz o papel de análise.
+
+As colunas são descobertas a cada chamada (PRAGMA table_info, barato):
+uma migração completa pode recriar as tabelas com outro formato. Tabela
+ausente não é erro — a fonte só não inclui aquela origem.
+
+Colunas da fonte: origem, id (rowid da medição), produto, lote, analise,
+valor, ts.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+MEASUREMENT_TABLES = ("tblMedicao", "TBL_EnsaioNumber")
+RESULT_TABLE = "TBL_Resultado"
+
+# papel -> candidatos de coluna (primeiro que existir, sem diferença de caixa)
+CANDIDATES: Dict[str, tuple] = {
+    "produto": ("produto_id", "produto", "idproduto", "codproduto", "cod_produto"),
+    "lote":    ("lote", "numlote", "num_lote"),
+    "analise": ("analise_id", "analise", "idanalise", "ensaio_id", "ensaio", "idensaio", "propriedade"),
+    "ts":      ("data_hora", "datahora", "data_medicao", "data_ensaio", "data", "created_at"),
+}
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> Optional[Dict[str, str]]:
+    """{nome minúsculo: nome real}; None se a tabela não existe."""
+    cols = {r[1].lower(): r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')}
+    return cols or None
+
+
+def _pick(cols: Dict[str, str], role: str) -> Optional[str]:
+    return next((cols[c] for c in CANDIDATES[role] if c in cols), None)
+
+
+def table_source(conn: sqlite3.Connection, table: str, result_table: str = RESULT_TABLE) -> Optional[str]:
+    """SELECT das medições de `table` ligadas ao resultado; None se não der para montar."""
+    m = table_columns(conn, table)
+    r = table_columns(conn, result_table)
+    if not m or not r or "resultado_id" not in m or "valor" not in m or "id" not in r:
+        return None
+
+    def expr(role):
+        for alias, cols in (("m", m), ("r", r)):
+            name = _pick(cols, role)
+            if name:
+                return f'{alias}."{name}"', name
+        return None, None
+
+    produto, _ = expr("produto")
+    if produto is None:
+        return None
+    lote, _ = expr("lote")
+    ts, _ = expr("ts")
+    analise, name = expr("analise")
+    join = ""
+    if analise is None:
+        analise = f"'{table}'"
+    elif name.lower().endswith("_id") or name.lower().startswith("id"):
+        a = table_columns(conn, "analises") or {}
+        desc = [f'NULLIF(a."{a[c]}", \'\')' for c in ("descricao_portugues", "parametro") if c in a]
+        if "id" in a and desc:
+            join = f' LEFT JOIN analises a ON a.id = {analise}'
+            analise = f"COALESCE({', '.join(desc)}, {analise})"
+    return (f"SELECT '{table}' AS origem, m.rowid AS id, {produto} AS produto, "
+            f"{lote or 'NULL'} AS lote, {analise} AS analise, m.\"{m['valor']}\" AS valor, "
+            f"{ts or 'NULL'} AS ts "
+            f'FROM "{table}" m JOIN "{result_table}" r ON r.id = m."{m["resultado_id"]}"{join}')
+
+
+def measurements_source(conn: sqlite3.Connection,
+                        tables: Iterable[str] = MEASUREMENT_TABLES) -> Optional[str]:
+    """UNION ALL das origens presentes neste banco; None se nenhuma existir."""
+    parts = [s for s in (table_source(conn, t) for t in tables) if s]
+    return " UNION ALL ".join(parts) if parts else None
@@ -0,0 +1,286 @@
+# app/data/measurement_store.py
+"""
+Cópia colunar das medições numéricas para análise (CEQ, anomalias,
+capacidade), fora do SQLite.
+
+Por (produto, análise) ficam três arquivos .npy lado a lado:
+
+  valor.npy : float64 (texto "3,4" convertido; sem número -> NaN)
+  ts.npy    : datetime64[s] (data da medição; sem data -> NaT)
+  lote.npy  : int32, índice na lista de lotes do manifesto (-1 = sem lote)
+
+abertos com np.load(mmap_mode="r"): ler milhões de valores não copia nada
+nem passa pelo sqlite3. `refresh()` lê de cada tabela de origem só as
+linhas com rowid acima da marca gravada (as tabelas de medição só
+recebem linhas novas — modo hwm do DeltaSync) e acrescenta no fim dos
+arquivos, reescrevendo apenas o cabeçalho .npy. O manifesto é gravado por
+último; o que passar do tamanho registrado nele (queda no meio) é
+ignorado na leitura e sobrescrito no próximo refresh; a contagem de um
+grupo só sobe depois que os três arquivos foram gravados.
+
+Junto da marca fica a impressão da tabela (menor rowid e CRC da primeira
+linha e da linha da marca). Se ela mudar, a tabela foi recriada (migração
+completa), mesmo que tenha voltado com tantas linhas ou mais: a cópia
+inteira é refeita.
+
+As linhas vêm de tblMedicao/TBL_EnsaioNumber ligadas ao TBL_Resultado
+(app/data/measurement_sources.py); origem ausente neste banco é pulada.
+Sem numpy, o store fica desligado.
+
+`listener` (ex.: OnlineAnomalyStore) recebe as medições acrescentadas,
+por grupo e em ordem de chegada (observe_many), um flush() no fim de
+cada refresh e um reset() antes de um rebuild.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from numpy.lib import format as npy_format
+except Exception:  # numpy é opcional; sem ele o store fica desligado
+    np = None
+
+from .conformance import parse_value
+from .measurement_sources import MEASUREMENT_TABLES, table_source
+
+CHUNK_ROWS = 50_000
+MANIFEST = "manifest.json"
+_FILES = (("valor", "<f8"), ("ts", "<M8[s]"), ("lote", "<i4"))
+_TS_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+_SAFE = re.compile(r"[^0-9A-Za-z_.-]+")
+# versão do .npy -> (lê cabeçalho, grava cabeçalho)
+_HEADER_IO = {
+    (1, 0): (npy_format.read_array_header_1_0, npy_format.write_array_header_1_0),
+    (2, 0): (npy_format.read_array_header_2_0, npy_format.write_array_header_2_0),
+} if np is not None else {}
+
+
+class Series(NamedTuple):
+    valor: "np.ndarray"
+    ts: "np.ndarray"
+    lote: "np.ndarray"
+
+
+def default_root(db) -> Path:
+    path = getattr(db, "db_path", None)
+    return (Path(path).parent if path else Path(".")) / "medicoes_npy"
+
+
+def _parse_ts(v) -> "np.datetime64":
+    if v is None or v == "":
+        return np.datetime64("NaT", "s")
+    s = str(v).strip()
+    try:
+        return np.datetime64(datetime.fromisoformat(s).replace(tzinfo=None), "s")
+    except ValueError:
+        pass
+    for fmt in _TS_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(s, fmt), "s")
+        except ValueError:
+            continue
+    return np.datetime64("NaT", "s")
+
+
+def _row_crc(conn, table: str, rowid) -> Optional[int]:
+    row = conn.execute(f'SELECT * FROM "{table}" WHERE rowid = ?', (rowid,)).fetchone()
+    return None if row is None else zlib.crc32(repr(tuple(row)).encode("utf-8"))
+
+
+def table_fingerprint(conn, table: str, mark: int) -> list:
+    """[menor rowid, CRC da 1ª linha, CRC da linha `mark`]: muda quando a tabela é recriada."""
+    first = conn.execute(f'SELECT MIN(rowid) FROM "{table}"').fetchone()[0]
+    return [first, _row_crc(conn, table, first), _row_crc(conn, table, mark)]
+
+
+def _append_npy(path: Path, n_old: int, arr: "np.ndarray") -> None:
+    """Acrescenta `arr` depois das primeiras n_old linhas de um .npy 1-D."""
+    if n_old == 0 or not path.exists():
+        np.save(path, arr)
+        return
+    n_new = n_old + len(arr)
+    with open(path, "r+b") as f:
+        version = npy_format.read_magic(f)
+        rw = _HEADER_IO.get(version)
+        if rw is not None:
+            _shape, _fortran, dtype = rw[0](f)
+            offset = f.tell()
+            if dtype != arr.dtype:
+                raise ValueError(f"{path.name}: dtype {dtype} != {arr.dtype}")
+            f.seek(0)
+            rw[1](f, {"descr": npy_format.dtype_to_descr(dtype), "fortran_order": False, "shape": (n_new,)})
+            if f.tell() == offset:
+                f.seek(offset + n_old * dtype.itemsize)
+                f.write(arr.tobytes())
+                f.truncate()
+                return
+    # cabeçalho mudou de tamanho ou versão desconhecida (raro): reescreve tudo
+    old = np.array(np.load(path, mmap_mode="r")[:n_old])
+    np.save(path, np.concatenate([old, arr]))
+
+
+class MeasurementStore:
+    def __init__(self, db, root: Optional[Path] = None, tables: Sequence[str] = MEASUREMENT_TABLES,
+                 listener=None):
+        self.db = db
+        self.root = Path(root) if root else default_root(db)
+        self.tables = tuple(tables)
+        self.listener = listener
+        self._manifest: Optional[dict] = None
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None
+
+    # ---------------- manifesto ----------------
+    def _load_manifest(self) -> dict:
+        if self._manifest is None:
+            try:
+                self._manifest = json.loads((self.root / MANIFEST).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._manifest = {"marcas": {}, "lotes": [], "grupos": {}}
+            self._manifest.setdefault("impressoes", {})
+        return self._manifest
+
+    def _save_manifest(self) -> None:
+        tmp = self.root / (MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(self._manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.root / MANIFEST)
+
+    @staticmethod
+    def _group_dir(produto, analise) -> str:
+        # nome legível + crc da chave exata ("a b" e "a_b" não colidem)
+        crc = zlib.crc32(f"{produto}\x00{analise}".encode("utf-8"))
+        return f"{_SAFE.sub('_', str(produto))[:40]}__{_SAFE.sub('_', str(analise))[:40]}_{crc:08x}"
+
+    # ---------------- carga incremental ----------------
+    def refresh(self) -> int:
+        """Acrescenta as medições novas (rowid > marca). Retorna quantas linhas entraram."""
+        if np is None:
+            return 0
+        conn = self.db.conn
+        man = self._load_manifest()
+        self.root.mkdir(parents=True, exist_ok=True)
+        lot_index = {name: i for i, name in enumerate(man["lotes"])}
+        total = 0
+        for table in self.tables:
+            try:
+                src = table_source(conn, table)
+            except sqlite3.Error:
+                src = None
+            if not src:
+                continue
+            mark = int(man["marcas"].get(table, 0))
+            if mark:
+                fp = man["impressoes"].get(table)
+                if fp is None:  # manifesto antigo, sem impressão: só dá para olhar o rowid máximo
+                    top = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+                    recreated = top < mark
+                else:
+                    recreated = table_fingerprint(conn, table, mark) != fp
+                if recreated:
+                    return self.rebuild()
+            cur = conn.execute(f"SELECT id, produto, analise, valor, ts, lote FROM ({src}) "
+                               "WHERE id > ? ORDER BY id", (mark,))
+            while True:
+                rows = cur.fetchmany(CHUNK_ROWS)
+                if not rows:
+                    break
+                try:
+                    added = self._append_rows(man, lot_index, rows)
+                except Exception:
+                    self._manifest = None  # volta ao manifesto gravado (o bloco é relido depois)
+                    raise
+                mark = rows[-1][0]
+                man["marcas"][table] = mark
+                man["impressoes"][table] = table_fingerprint(conn, table, mark)
+                total += len(rows)
+                self._save_manifest()  # marca só avança depois dos arquivos gravados
+                if self.listener is not None:
+                    for produto, analise, valores in added:
+                        self.listener.observe_many(produto, analise, valores)
+        if total and self.listener is not None:
+            self.listener.flush()
+        return total
+
+    def _append_rows(self, man: dict, lot_index: Dict[str, int], rows) -> List[Tuple[str, str, "np.ndarray"]]:
+        """Grava os grupos do bloco; devolve [(produto, análise, valores)] acrescentados."""
+        by_group: Dict[Tuple[str, str], List[tuple]] = {}
+        for _rid, produto, analise, valor, ts, lote in rows:
+            if produto is None or analise is None:
+                continue
+            by_group.setdefault((str(produto), str(analise)), []).append((valor, ts, lote))
+        added = []
+        for (produto, analise), items in by_group.items():
+            codes, new_lots = [], {}
+            for _v, _t, lote in items:
+                if lote is None or str(lote).strip() == "":
+                    codes.append(-1)
+                    continue
+                name = str(lote).strip()
+                if name not in lot_index and name not in new_lots:
+                    new_lots[name] = len(man["lotes"]) + len(new_lots)
+                codes.append(lot_index.get(name, new_lots.get(name)))
+            arrays = {
+                "valor": np.fromiter((parse_value(v) for v, _t, _l in items), dtype="<f8", count=len(items)),
+                "ts": np.array([_parse_ts(t) for _v, t, _l in items], dtype="<M8[s]"),
+                "lote": np.asarray(codes, dtype="<i4"),
+            }
+            gdir = self._group_dir(produto, analise)
+            n_old = man["grupos"][gdir]["n"] if gdir in man["grupos"] else 0
+            (self.root / gdir).mkdir(exist_ok=True)
+            for name, _dtype in _FILES:
+                _append_npy(self.root / gdir / f"{name}.npy", n_old, arrays[name])
+            # manifesto só depois dos arquivos: falha no meio não deixa contagem à frente
+            man["lotes"].extend(new_lots)
+            lot_index.update(new_lots)
+            man["grupos"].setdefault(gdir, {"produto": produto, "analise": analise, "n": 0})["n"] = n_old + len(items)
+            added.append((produto, analise, arrays["valor"]))
+        return added
+
+    def rebuild(self) -> int:
+        """Apaga a cópia e recarrega tudo das origens."""
+        if self.root.exists():
+            shutil.rmtree(self.root)
+        self._manifest = None
+        if self.listener is not None:
+            self.listener.reset()
+        return self.refresh()
+
+    # ---------------- leitura ----------------
+    def groups(self) -> List[Tuple[str, str, int]]:
+        """[(produto, análise, nº de medições)]."""
+        return [(g["produto"], g["analise"], g["n"]) for g in self._load_manifest()["grupos"].values()]
+
+    def series(self, produto, analise) -> Optional[Series]:
+        """Arrays (mmap, só leitura) de um grupo; None se não houver medições."""
+        if np is None:
+            return None
+        g = self._load_manifest()["grupos"].get(self._group_dir(produto, analise))
+        if not g or not g["n"]:
+            return None
+        gdir = self.root / self._group_dir(produto, analise)
+        n = g["n"]
+        try:
+            return Series(*(np.load(gdir / f"{name}.npy", mmap_mode="r")[:n] for name, _ in _FILES))
+        except (OSError, ValueError):
+            return None
+
+    def iter_series(self) -> Iterator[Tuple[str, str, Series]]:
+        for produto, analise, _n in self.groups():
+            s = self.series(produto, analise)
+            if s is not None:
+                yield produto, analise, s
+
+    def lot_names(self, codes) -> List[Optional[str]]:
+        lotes = self._load_manifest()["lotes"]
+        return [lotes[c] if 0 <= c < len(lotes) else None for c in (int(x) for x in codes)]
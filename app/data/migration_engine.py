@@ -0,0 +1,667 @@
+# app/data/migration_engine.py
+"""
+Motor de migração para SQLite com leitores plugáveis.
+
+Leitores:
+  - AccessReader  : .accdb/.mdb via pyodbc (com back-end local opcional)
+  - SQLiteReader  : outro arquivo SQLite
+  - CsvDirReader  : diretório com um .csv por tabela
+
+SQLiteReader e CsvDirReader servem também de fonte substituta offline
+(testes e benchmark no Linux, sem Access).
+
+As tabelas são lidas em paralelo por threads produtoras que alimentam uma
+fila limitada; uma única thread escritora grava no SQLite.
+
+Uso:
+  python -m app.data.migration_engine --source sqlite --path legado.db --sqlite qualidade.db
+  python -m app.data.migration_engine --source csv --path exportacao/ --workers 8
+  python -m app.data.migration_engine --source access --path "Inspecao.accdb" --backend "be.accdb"
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .access_types import create_table_sql, kind_of, odbc_column_kinds, row_converter
+
+CHUNK_ROWS = 5000
+
+# WAL em vez de journal OFF: cada bloco é um checkpoint e precisa sobreviver
+# a uma queda do processo no meio da carga.
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA cache_size=-262144",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA locking_mode=EXCLUSIVE",
+)
+FINAL_PRAGMAS = (
+    "PRAGMA locking_mode=NORMAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+)
+
+
+# ============================ leitores ============================
+
+class TableReader:
+    """
+    Interface dos leitores. read() deve abrir a própria conexão, pois é
+    chamado em paralelo por várias threads.
+    """
+    def tables(self) -> list[str]:
+        raise NotImplementedError
+
+    def read(self, table: str, chunk: int = CHUNK_ROWS,
+             offset: int = 0) -> tuple[list[str], Iterator[list[tuple]]]:
+        """
+        Retorna (colunas, gerador de blocos de linhas), pulando as `offset`
+        primeiras linhas. A ordem precisa ser estável entre execuções para
+        que a retomada continue do ponto certo.
+        """
+        raise NotImplementedError
+
+    def count(self, table: str) -> Optional[int]:
+        """Total de linhas na origem (None = sem verificação)."""
+        return None
+
+    def column_kinds(self, table: str) -> Optional[list[Optional[str]]]:
+        """Tipos lógicos das colunas (ver access_types); None = tudo TEXT."""
+        return None
+
+    # ---- usados pela sincronização incremental (delta_sync) ----
+    def key_column(self, table: str) -> Optional[tuple[str, bool]]:
+        """(coluna da chave primária simples, é autonumeração?) ou None."""
+        return None
+
+    def read_since(self, table: str, key: str, mark, chunk: int = CHUNK_ROWS):
+        """Como read(), mas só linhas com key > mark, em ordem de key."""
+        raise NotImplementedError
+
+    def indexes(self, table: str) -> list[tuple[str, bool, list[str]]]:
+        """[(nome, unico, [colunas])] a criar depois dos dados."""
+        return []
+
+
+class SQLiteReader(TableReader):
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self.path.as_posix()}?mode=ro", uri=True, check_same_thread=False)
+
+    def tables(self) -> list[str]:
+        with self._connect() as con:
+            cur = con.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+            return [r[0] for r in cur.fetchall()]
+
+    def read(self, table, chunk=CHUNK_ROWS, offset=0):
+        con = self._connect()
+        try:
+            cur = con.execute(f'SELECT * FROM "{table}" ORDER BY rowid LIMIT -1 OFFSET ?', (offset,))
+        except sqlite3.OperationalError:  # WITHOUT ROWID
+            cur = con.execute(f'SELECT * FROM "{table}" LIMIT -1 OFFSET ?', (offset,))
+        return [d[0] for d in cur.description or []], self._chunks(con, cur, chunk)
+
+    def count(self, table):
+        with self._connect() as con:
+            return con.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+    def column_kinds(self, table):
+        with self._connect() as con:
+            return [kind_of(r[2]) for r in con.execute(f'PRAGMA table_info("{table}")')]
+
+    def key_column(self, table):
+        with self._connect() as con:
+            pk = [(r[1], r[2]) for r in con.execute(f'PRAGMA table_info("{table}")') if r[5]]
+        if len(pk) != 1:
+            return None
+        name, decl = pk[0]
+        return name, (decl or "").upper() == "INTEGER"  # INTEGER PRIMARY KEY = rowid
+
+    def read_since(self, table, key, mark, chunk=CHUNK_ROWS):
+        con = self._connect()
+        where, params = (f' WHERE "{key}" > ?', (mark,)) if mark is not None else ("", ())
+        cur = con.execute(f'SELECT * FROM "{table}"{where} ORDER BY "{key}"', params)
+        return [d[0] for d in cur.description or []], self._chunks(con, cur, chunk)
+
+    @staticmethod
+    def _chunks(con, cur, chunk):
+        try:
+            while True:
+                rows = cur.fetchmany(chunk)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            con.close()
+
+    def indexes(self, table):
+        out = []
+        with self._connect() as con:
+            for _seq, name, unique, origin, *_ in con.execute(f'PRAGMA index_list("{table}")'):
+                if origin != "c":  # só índices explícitos; PK/UNIQUE vêm com a tabela
+                    continue
+                cols = [r[2] for r in con.execute(f'PRAGMA index_info("{name}")')]
+                if cols and all(cols):
+                    out.append((name, bool(unique), cols))
+        return out
+
+
+class CsvDirReader(TableReader):
+    """Cada arquivo <tabela>.csv do diretório é uma tabela (1ª linha = cabeçalho)."""
+    def __init__(self, path: Path, encoding: str = "utf-8-sig"):
+        self.path = Path(path)
+        self.encoding = encoding
+
+    def tables(self) -> list[str]:
+        return sorted(p.stem for p in self.path.glob("*.csv"))
+
+    def _open(self, table):
+        f = open(self.path / f"{table}.csv", "r", encoding=self.encoding, newline="")
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        return f, reader, next(reader, [])
+
+    def read(self, table, chunk=CHUNK_ROWS, offset=0):
+        f, reader, cols = self._open(table)
+
+        def gen():
+            try:
+                buf = []
+                for row in islice(reader, offset, None):
+                    buf.append(tuple((v if v != "" else None) for v in row[:len(cols)]))
+                    if len(buf) >= chunk:
+                        yield buf
+                        buf = []
+                if buf:
+                    yield buf
+            finally:
+                f.close()
+        return cols, gen()
+
+    def count(self, table):
+        f, reader, _cols = self._open(table)
+        with f:
+            return sum(1 for _ in reader)
+
+
+class AccessReader(TableReader):
+    """
+    Access via pyodbc. Tabelas vinculadas são lidas do `backend` local quando
+    informado (mesma regra de full_migrate_access_with_backend).
+    """
+    def __init__(self, accdb: Path, backend: Optional[Path] = None):
+        self.accdb = Path(accdb)
+        self.backend = Path(backend) if backend else None
+        self._kinds: dict[str, str] = {}
+        self._pk: dict[str, list[str]] = {}
+
+    def _open(self, path: Path):
+        import pyodbc  # importado só quando a fonte é Access
+        conn_str = (
+            r"DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};"
+            f"DBQ={path};"
+        )
+        return pyodbc.connect(conn_str, autocommit=True)
+
+    def _path_for(self, table: str) -> Path:
+        return self.backend if (self._kinds.get(table) == "VINCULADA" and self.backend) else self.accdb
+
+    def tables(self) -> list[str]:
+        con = self._open(self.accdb)
+        try:
+            cur = con.cursor()
+            try:
+                cur.execute(
+                    "SELECT Name, Database FROM MSysObjects "
+                    "WHERE Type IN (1,4,6) AND Left(Name,4) <> 'MSys'"
+                )
+                for name, dbstr in cur.fetchall():
+                    self._kinds.setdefault(name, "VINCULADA" if dbstr else "LOCAL")
+            except Exception:
+                for row in cur.tables(tableType="TABLE"):
+                    t = getattr(row, "table_name", None)
+                    if t and not t.startswith("MSys"):
+                        self._kinds.setdefault(t, "LOCAL")
+        finally:
+            con.close()
+        if not self.backend:
+            return sorted(t for t, k in self._kinds.items() if k == "LOCAL")
+        return sorted(self._kinds)
+
+    def _primary_key(self, table) -> list[str]:
+        if table not in self._pk:
+            self._pk[table] = next((cols for n, _u, cols in self.indexes(table)
+                                    if n.lower() == "primarykey"), [])
+        return self._pk[table]
+
+    def read(self, table, chunk=CHUNK_ROWS, offset=0):
+        # ordem pela chave primária: estável entre execuções (sem chave, a do Access)
+        pk = self._primary_key(table)
+        order = " ORDER BY " + ", ".join(f"[{c}]" for c in pk) if pk else ""
+        con = self._open(self._path_for(table))
+        cur = con.cursor()
+        cur.execute(f"SELECT * FROM [{table}]{order}")
+        cols = [d[0] for d in cur.description or []]
+
+        def gen():
+            try:
+                # Access ODBC não tem OFFSET: descarta no cliente. A retomada só
+                # passa por aqui em tabela sem chave simples (ver MigrationEngine.run)
+                skip = offset
+                while skip > 0:
+                    got = len(cur.fetchmany(min(skip, chunk)))
+                    if not got:
+                        return
+                    skip -= got
+                while True:
+                    rows = cur.fetchmany(chunk)
+                    if not rows:
+                        return
+                    yield [tuple(r) for r in rows]
+            finally:
+                con.close()
+        return cols, gen()
+
+    def count(self, table):
+        con = self._open(self._path_for(table))
+        try:
+            return con.cursor().execute(f"SELECT COUNT(*) FROM [{table}]").fetchone()[0]
+        finally:
+            con.close()
+
+    def column_kinds(self, table):
+        con = self._open(self._path_for(table))
+        try:
+            kinds = odbc_column_kinds(con.cursor(), table)
+            return [k for _c, k in kinds] if kinds else None
+        finally:
+            con.close()
+
+    def key_column(self, table):
+        pk = self._primary_key(table)
+        if len(pk) != 1:
+            return None
+        col = pk[0]
+        con = self._open(self._path_for(table))
+        try:
+            auto = any(getattr(r, "column_name", None) == col
+                       and str(getattr(r, "type_name", "")).upper() == "COUNTER"
+                       for r in con.cursor().columns(table=table))
+        except Exception:
+            auto = False
+        finally:
+            con.close()
+        return col, auto
+
+    def read_since(self, table, key, mark, chunk=CHUNK_ROWS):
+        con = self._open(self._path_for(table))
+        cur = con.cursor()
+        if mark is None:
+            cur.execute(f"SELECT * FROM [{table}] ORDER BY [{key}]")
+        else:
+            cur.execute(f"SELECT * FROM [{table}] WHERE [{key}] > ? ORDER BY [{key}]", mark)
+        cols = [d[0] for d in cur.description or []]
+
+        def gen():
+            try:
+                while True:
+                    rows = cur.fetchmany(chunk)
+                    if not rows:
+                        return
+                    yield [tuple(r) for r in rows]
+            finally:
+                con.close()
+        return cols, gen()
+
+    def indexes(self, table):
+        con = self._open(self._path_for(table))
+        idx: dict[str, tuple[bool, list[tuple[int, str]]]] = {}
+        try:
+            for r in con.cursor().statistics(table):
+                name, col = getattr(r, "index_name", None), getattr(r, "column_name", None)
+                if not name or not col:
+                    continue
+                unique = not bool(getattr(r, "non_unique", 1))
+                pos = int(getattr(r, "ordinal_position", 0) or 0)
+                idx.setdefault(name, (unique, []))[1].append((pos, col))
+        except Exception:
+            return []
+        finally:
+            con.close()
+        return [(n, u, [c for _, c in sorted(cs)]) for n, (u, cs) in idx.items()]
+
+
+def make_reader(source: str, path: Path, backend: Optional[Path] = None) -> TableReader:
+    if source == "access":
+        return AccessReader(path, backend)
+    if source == "sqlite":
+        return SQLiteReader(path)
+    if source == "csv":
+        return CsvDirReader(path)
+    raise ValueError(f"Fonte desconhecida: {source}")
+
+
+# ============================ escrita ============================
+
+def create_table(dst: sqlite3.Connection, table: str, cols: list[str],
+                 kinds: Optional[list] = None, strict: bool = False) -> None:
+    kinds = kinds or [None] * len(cols)
+    dst.execute(create_table_sql(table, list(zip(cols, kinds)), strict))
+
+
+def create_indexes(dst: sqlite3.Connection, table: str, indexes) -> int:
+    made = 0
+    for name, unique, cols in indexes:
+        cols_sql = ", ".join(f'"{c}"' for c in cols)
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        try:
+            dst.execute(f'CREATE {kind} IF NOT EXISTS "ix_{table}_{name}" ON "{table}" ({cols_sql})')
+            made += 1
+        except sqlite3.DatabaseError:
+            if unique:  # duplicatas no legado: fica o índice simples
+                dst.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{name}" ON "{table}" ({cols_sql})')
+                made += 1
+    return made
+
+
+STATE_TABLE = "_migracao_estado"
+
+
+def row_checksum(row) -> int:
+    """CRC32 da linha normalizada em texto (igual na origem e no SQLite)."""
+    parts = []
+    for v in row:
+        if v is None:
+            parts.append("\x00")
+        elif isinstance(v, bool):  # Sim/Não do Access chega como bool e é gravado 0/1
+            parts.append(str(int(v)))
+        elif isinstance(v, (bytes, bytearray, memoryview)):
+            parts.append(bytes(v).hex())
+        else:
+            parts.append(str(v))
+    return zlib.crc32("\x1f".join(parts).encode("utf-8", "surrogatepass"))
+
+
+def rows_checksum(rows, acc: int = 0) -> int:
+    """Soma dos CRCs (mod 2^63): independe da ordem e pode ser salva a cada bloco."""
+    for r in rows:
+        acc = (acc + row_checksum(r)) & 0x7FFFFFFFFFFFFFFF
+    return acc
+
+
+def ensure_state(dst: sqlite3.Connection) -> None:
+    dst.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            tabela        TEXT PRIMARY KEY,
+            linhas        INTEGER NOT NULL DEFAULT 0,   -- já gravadas = offset de retomada
+            checksum      INTEGER NOT NULL DEFAULT 0,
+            origem_linhas INTEGER,
+            concluida     INTEGER NOT NULL DEFAULT 0,
+            verificada    INTEGER NOT NULL DEFAULT 0,
+            erro          TEXT,
+            atualizado_em TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def load_state(dst: sqlite3.Connection) -> dict[str, tuple[int, int, int]]:
+    """{tabela: (linhas, checksum, concluida)}"""
+    ensure_state(dst)
+    cur = dst.execute(f"SELECT tabela, linhas, checksum, concluida FROM {STATE_TABLE}")
+    return {t: (n, c, done) for t, n, c, done in cur.fetchall()}
+
+
+_DONE = object()
+
+
+class MigrationEngine:
+    """
+    Produtores (uma thread por tabela, até `workers` simultâneas) leem em
+    blocos e enfileiram; o escritor único consome a fila e grava. A fila é
+    limitada, então a memória não cresce com o tamanho da origem.
+
+    Cada bloco é gravado na mesma transação que atualiza _migracao_estado,
+    então após uma queda `run(..., resume=True)` pula as tabelas concluídas
+    e continua as parciais a partir da última linha gravada. Ao fim de cada
+    tabela, contagem e checksum são conferidos contra a origem.
+    """
+    def __init__(self, reader: TableReader, workers: int = 4, chunk: int = CHUNK_ROWS,
+                 strict: bool = False, log=print):
+        self.reader = reader
+        self.strict = strict
+        self.workers = max(1, int(workers))
+        self.chunk = max(1, int(chunk))
+        self.log = log
+
+    def _produce(self, table: str, offset: int, q: queue.Queue, stop: threading.Event,
+                 since: Optional[tuple] = None) -> None:
+        try:
+            if since is not None:  # retomada pela chave: só o que passa da última gravada
+                cols, chunks = self.reader.read_since(table, since[0], since[1], self.chunk)
+            else:
+                cols, chunks = self.reader.read(table, self.chunk, offset)
+            kinds = self.reader.column_kinds(table)
+            if not kinds or len(kinds) != len(cols):
+                kinds = None
+            convert = row_converter(kinds or [])
+            q.put(("schema", table, (cols, kinds)))
+            for rows in chunks:
+                if stop.is_set():
+                    return
+                q.put(("rows", table, convert(rows)))  # conversão nas threads leitoras
+            q.put(("done", table, (self.reader.count(table), self.reader.indexes(table))))
+        except Exception as e:
+            q.put(("error", table, e))
+
+    def _indexes_only(self, table: str, q: queue.Queue) -> None:
+        try:
+            q.put(("indexes", table, self.reader.indexes(table)))
+        except Exception:
+            pass
+
+    def _verify(self, dst: sqlite3.Connection, table: str, expected_rows, checksum: int) -> Optional[str]:
+        n = dst.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        if expected_rows is not None and n != expected_rows:
+            return f"contagem {n} != origem {expected_rows}"
+        acc = 0
+        cur = dst.execute(f'SELECT * FROM "{table}"')
+        while True:
+            rows = cur.fetchmany(self.chunk)
+            if not rows:
+                break
+            acc = rows_checksum(rows, acc)
+        if acc != checksum:
+            return "checksum divergente"
+        return None
+
+    def run(self, dst_path: Path, tables: Optional[list[str]] = None,
+            fresh: bool = True, resume: bool = False) -> dict[str, int]:
+        dst_path = Path(dst_path)
+        if resume:
+            fresh = False
+        if fresh and dst_path.exists():
+            dst_path.unlink()
+        tables = list(tables) if tables is not None else self.reader.tables()
+
+        dst = sqlite3.connect(str(dst_path), isolation_level=None)
+        for pragma in BULK_PRAGMAS:
+            dst.execute(pragma)
+        state = load_state(dst) if resume else {}
+        if not resume:
+            ensure_state(dst)
+            dst.execute(f"DELETE FROM {STATE_TABLE}")
+
+        q: queue.Queue = queue.Queue(maxsize=self.workers * 4)
+        stop = threading.Event()
+        counts: dict[str, int] = {}
+        sums: dict[str, int] = {}
+        inserts: dict[str, str] = {}
+        pending_idx: list[tuple[str, list]] = []
+        failed: set[str] = set()
+        done_before = [t for t in tables if state.get(t, (0, 0, 0))[2]]
+        if done_before:
+            self.log(f"Retomando: {len(done_before)} tabelas já concluídas")
+        # parciais com chave simples continuam de MAX(chave) gravada, sem reler o que
+        # já veio; sem chave, pelo nº de linhas (offset)
+        since: dict[str, tuple] = {}
+        for t in tables:
+            n, _c, done = state.get(t, (0, 0, 0))
+            if n and not done:
+                kc = self.reader.key_column(t)
+                if kc:
+                    since[t] = (kc[0], dst.execute(f'SELECT MAX("{kc[0]}") FROM "{t}"').fetchone()[0])
+
+        def feed():
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mig") as ex:
+                for t in tables:
+                    n, _c, done = state.get(t, (0, 0, 0))
+                    if done:
+                        ex.submit(self._indexes_only, t, q)
+                    else:
+                        ex.submit(self._produce, t, n, q, stop, since.get(t))
+            q.put(_DONE)
+
+        feeder = threading.Thread(target=feed, name="mig-feed", daemon=True)
+        t0 = time.perf_counter()
+        feeder.start()
+
+        upd = (f"UPDATE {STATE_TABLE} SET linhas=?, checksum=?, "
+               f"atualizado_em=CURRENT_TIMESTAMP WHERE tabela=?")
+        try:
+            while True:
+                msg = q.get()
+                if msg is _DONE:
+                    break
+                kind, table, payload = msg
+                if table in failed:
+                    continue
+                try:
+                    if kind == "schema":
+                        n, c, _done = state.get(table, (0, 0, 0))
+                        if n:
+                            self.log(f"Retomando {table} a partir da linha {n}")
+                        dst.execute("BEGIN")
+                        if not n:
+                            dst.execute(f'DROP TABLE IF EXISTS "{table}"')
+                        cols, kinds = payload
+                        create_table(dst, table, cols, kinds, self.strict)
+                        dst.execute(
+                            f"INSERT INTO {STATE_TABLE}(tabela, linhas, checksum) VALUES (?,?,?) "
+                            f"ON CONFLICT(tabela) DO UPDATE SET erro=NULL",
+                            (table, n, c),
+                        )
+                        dst.execute("COMMIT")
+                        inserts[table] = f'INSERT INTO "{table}" VALUES ({", ".join("?" * len(cols))})'
+                        counts[table], sums[table] = n, c
+                    elif kind == "rows":
+                        dst.execute("BEGIN")
+                        dst.executemany(inserts[table], payload)
+                        counts[table] += len(payload)
+                        sums[table] = rows_checksum(payload, sums[table])
+                        dst.execute(upd, (counts[table], sums[table], table))
+                        dst.execute("COMMIT")
+                    elif kind == "done":
+                        expected, idx = payload
+                        problem = self._verify(dst, table, expected, sums[table])
+                        if problem:
+                            # não marca concluída: o próximo --resume refaz do zero
+                            dst.execute(
+                                f"UPDATE {STATE_TABLE} SET linhas=0, checksum=0, origem_linhas=?, "
+                                f"erro=? WHERE tabela=?", (expected, problem, table))
+                            failed.add(table)
+                            self.log(f"DIVERGENTE {table}  {problem}")
+                            continue
+                        dst.execute(
+                            f"UPDATE {STATE_TABLE} SET concluida=1, verificada=?, origem_linhas=?, "
+                            f"atualizado_em=CURRENT_TIMESTAMP WHERE tabela=?",
+                            (1 if expected is not None else 0, expected, table))
+                        pending_idx.append((table, idx))
+                        self.log(f"OK {table}  linhas {counts.get(table, 0)}")
+                    elif kind == "indexes":
+                        pending_idx.append((table, payload))
+                    elif kind == "error":
+                        raise payload
+                except Exception as e:
+                    # mantém o que já foi gravado: --resume continua daqui
+                    if dst.in_transaction:
+                        dst.execute("ROLLBACK")
+                    failed.add(table)
+                    try:
+                        dst.execute(f"UPDATE {STATE_TABLE} SET erro=? WHERE tabela=?", (str(e), table))
+                    except Exception:
+                        pass
+                    self.log(f"Falhou {table}  motivo {e}")
+        except BaseException:
+            stop.set()
+            while feeder.is_alive():  # destrava produtores presos no put()
+                try:
+                    q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            raise
+
+        dst.execute("BEGIN")
+        for table, idx in pending_idx:
+            create_indexes(dst, table, idx)
+        dst.execute("COMMIT")
+        for pragma in FINAL_PRAGMAS:
+            dst.execute(pragma)
+        dst.execute("ANALYZE")
+        dst.close()
+
+        elapsed = time.perf_counter() - t0
+        ok = {t: n for t, n in counts.items() if t not in failed}
+        total = sum(ok.values())
+        self.log(f"{len(ok)} tabelas, {total} linhas em {elapsed:.1f}s "
+                 f"({total / elapsed if elapsed else 0:.0f} linhas/s, {self.workers} leitores)")
+        if failed:
+            self.log(f"Pendentes ({len(failed)}): {', '.join(sorted(failed))} — rode de novo com --resume")
+        return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", choices=["access", "sqlite", "csv"], default="access")
+    ap.add_argument("--path", required=True, help=".accdb, arquivo SQLite ou diretório de CSVs")
+    ap.add_argument("--backend", help="back-end .accdb local para tabelas vinculadas")
+    ap.add_argument("--sqlite", default="qualidade.db", help="arquivo SQLite de saída")
+    ap.add_argument("--workers", type=int, default=4, help="threads leitoras em paralelo")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="linhas por bloco")
+    ap.add_argument("--tables", nargs="*", help="migrar só estas tabelas")
+    ap.add_argument("--strict", action="store_true",
+                    help="cria tabelas STRICT com os tipos da origem (SQLite >= 3.37)")
+    ap.add_argument("--resume", action="store_true",
+                    help="continua uma migração interrompida em vez de recriar o arquivo")
+    args = ap.parse_args()
+
+    src = Path(args.path)
+    if not src.exists():
+        raise SystemExit(f"Origem não encontrada: {src}")
+    reader = make_reader(args.source, src, Path(args.backend) if args.backend else None)
+    MigrationEngine(reader, workers=args.workers, chunk=args.chunk, strict=args.strict).run(
+        Path(args.sqlite), args.tables, resume=args.resume)
+    print("Migração concluída.")
+
+
+if __name__ == "__main__":
+    main()
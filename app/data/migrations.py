@@ -0,0 +1,516 @@
+# app/data/migrations.py
+"""
+Migrações de esquema versionadas por PRAGMA user_version.
+
+Cada migração roda uma única vez, em ordem, dentro de uma transação que
+também grava o novo user_version. Na abertura do app o custo é uma
+leitura de inteiro; a introspecção (PRAGMA table_info) só acontece quando
+há migração pendente.
+
+As migrações são idempotentes: um banco antigo (user_version 0) que já
+recebeu parte das correções pelos scripts/fix_*.py antigos passa por
+todas sem erro.
+
+Para adicionar uma alteração: nova função com @migration(<próximo número>).
+Nunca altere uma migração já publicada.
+
+Uso manual:
+  python -m app.data.migrations [--db caminho.db]
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+from typing import Callable
+
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = []
+
+
+def migration(version: int, descricao: str):
+    def deco(fn):
+        MIGRATIONS.append((version, descricao, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return deco
+
+
+# ---------------- helpers (só usados dentro das migrações) ----------------
+
+def _has_table(conn, table: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=? COLLATE NOCASE", (table,)
+    ).fetchone() is not None
+
+
+def _cols(conn, table: str) -> set[str]:
+    return {r[1].lower() for r in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def _add_columns(conn, table: str, columns: dict[str, str]) -> list[str]:
+    """ALTER TABLE ADD COLUMN para as que faltam. Tabela ausente: nada a fazer."""
+    if not _has_table(conn, table):
+        return []
+    have = _cols(conn, table)
+    added = []
+    for col, decl in columns.items():
+        if col.lower() not in have:
+            conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}" {decl}')
+            added.append(col)
+    return added
+
+
+# ------------------------------ migrações ------------------------------
+
+@migration(1, "funcionarios e acessos (antigo Database.ensure_schema)")
+def _m001_base(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS funcionarios (
+            id       INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome     TEXT NOT NULL DEFAULT '',
+            registro TEXT,
+            login    TEXT UNIQUE,
+            senha    TEXT NOT NULL,
+            papel    TEXT NOT NULL DEFAULT 'usuario'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS acessos (
+            login TEXT PRIMARY KEY,
+            cad_func INTEGER DEFAULT 0,
+            def_acessos INTEGER DEFAULT 0,
+            cad_clientes INTEGER DEFAULT 0,
+            cad_registros INTEGER DEFAULT 0,
+            cad_analises INTEGER DEFAULT 0,
+            cad_produtos INTEGER DEFAULT 0,
+            cad_fabrica INTEGER DEFAULT 0,
+            cad_analise_prod INTEGER DEFAULT 0,
+            cad_analise_cli INTEGER DEFAULT 0,
+            imp_rotulos INTEGER DEFAULT 0,
+            inserir_resultados INTEGER DEFAULT 0,
+            emitir_certificados INTEGER DEFAULT 0,
+            imprimir_certificados INTEGER DEFAULT 0,
+            consultas_gerais INTEGER DEFAULT 0,
+            liberacao_especial INTEGER DEFAULT 0
+        )
+        """
+    )
+    added = _add_columns(conn, "funcionarios", {
+        "registro": "TEXT",
+        "papel": "TEXT DEFAULT 'usuario'",
+        "login": "TEXT",
+    })
+    if "login" in added:
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_funcionarios_login ON funcionarios(login)")
+    _add_columns(conn, "acessos", {"login": "TEXT"})
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_acessos_login ON acessos(login)")
+    conn.execute("UPDATE funcionarios SET login = COALESCE(login, LOWER(nome)) WHERE login IS NULL")
+
+
+@migration(2, "grupos.descricao_es (antigo MainWindow._ensure_grupos_espanhol_column)")
+def _m002_grupos_es(conn):
+    if _has_table(conn, "grupos") and "descricao_espanhol" not in _cols(conn, "grupos"):
+        _add_columns(conn, "grupos", {"descricao_es": "TEXT"})
+
+
+@migration(3, "analises.codigo (antigo MainWindow._ensure_analises_codigo_column)")
+def _m003_analises_codigo(conn):
+    _add_columns(conn, "analises", {"codigo": "TEXT"})
+
+
+@migration(4, "analises: descrições pt/en/es e método (scripts fix_analises_schema, migrate_analises_desc_from_old)")
+def _m004_analises_desc(conn):
+    if not _has_table(conn, "analises"):
+        return
+    _add_columns(conn, "analises", {c: "TEXT" for c in (
+        "descricao_pt", "descricao_en", "descricao_es", "metodo", "tipo", "frequencia", "medicao")})
+    cols = _cols(conn, "analises")
+    if "descricao" in cols:
+        conn.execute("""
+            UPDATE analises SET descricao_pt = descricao
+             WHERE descricao IS NOT NULL AND (descricao_pt IS NULL OR descricao_pt = '')
+        """)
+    for novo, antigo in (("descricao_pt", "descricao_portugues"),
+                         ("descricao_en", "descricao_ingles"),
+                         ("descricao_es", "descricao_espanhol")):
+        if antigo in cols:
+            conn.execute(f"""
+                UPDATE analises SET {novo} = {antigo}
+                 WHERE COALESCE({novo}, '') = '' AND TRIM(COALESCE({antigo}, '')) <> ''
+            """)
+
+
+@migration(5, "clientes.codigo/observacao (scripts fix_clientes_schema, patch_clientes_codigo_obs)")
+def _m005_clientes(conn):
+    _add_columns(conn, "clientes", {"codigo": "TEXT", "observacao": "TEXT"})
+    if _has_table(conn, "clientes") and "cnpj" in _cols(conn, "clientes"):
+        conn.execute("UPDATE clientes SET codigo = cnpj WHERE COALESCE(TRIM(codigo), '') = ''")
+
+
+@migration(6, "produtos: colunas da ficha técnica (scripts fix_produtos_schema, patch_sqlite)")
+def _m006_produtos(conn):
+    added = _add_columns(conn, "produtos", {
+        "codigo": "TEXT",
+        "nome": "TEXT",
+        "cliente_id": "INTEGER",
+        "grupo_id": "INTEGER",
+        "produto_id": "INTEGER",
+        "familia": "TEXT",
+        "cor": "TEXT",
+        "segmento": "TEXT",
+        "reavaliar_dias": "INTEGER DEFAULT 0",
+        "direto_extrusao": "INTEGER DEFAULT 0",
+        "localizacao_padrao": "TEXT",
+        "fabricado_em": "TEXT",
+        "lote_padrao": "TEXT",
+        "revisao_num": "TEXT",
+        "revisao_data": "TEXT",
+        "descricao_pt": "TEXT",
+        "descricao_en": "TEXT",
+        "descricao_es": "TEXT",
+        "aplicacoes_pt": "TEXT",
+        "aplicacoes_en": "TEXT",
+        "aplicacoes_es": "TEXT",
+        "historico_revisoes": "TEXT",
+    })
+    if "produto_id" in added:
+        conn.execute("UPDATE produtos SET produto_id = id WHERE produto_id IS NULL")
+
+
+@migration(7, "analises.parametro sem NOT NULL (script relax_analises_parametro)")
+def _m007_relax_parametro(conn):
+    if not _has_table(conn, "analises"):
+        return
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name='analises'"
+    ).fetchone()
+    sql = row[0] if row else ""
+    new_sql, n = re.subn(r'("?parametro"?\s+TEXT)\s+NOT\s+NULL(\s+DEFAULT\s+\S+)?',
+                         r"\1 DEFAULT ''", sql, flags=re.IGNORECASE)
+    if not n:
+        return
+    # recriação (SQLite não altera restrição de coluna); índices e triggers são refeitos
+    extras = [r[0] for r in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name='analises' AND type IN ('index','trigger') "
+        "AND sql IS NOT NULL")]
+    cols = ", ".join(f'"{r[1]}"' for r in conn.execute('PRAGMA table_info("analises")'))
+    new_sql = re.sub(r'^CREATE TABLE\s+"?analises"?', 'CREATE TABLE analises_novo', new_sql,
+                     flags=re.IGNORECASE)
+    conn.execute(new_sql)
+    conn.execute(f"INSERT INTO analises_novo ({cols}) SELECT {cols} FROM analises")
+    conn.execute("DROP TABLE analises")
+    conn.execute("ALTER TABLE analises_novo RENAME TO analises")
+    for ddl in extras:
+        conn.execute(ddl)
+
+
+@migration(8, "tabelas das telas (antigos _ensure_table de impressão, análises e testes)")
+def _m008_tabelas_telas(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cert_consulta (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            laudo TEXT, emissao TEXT, codigo TEXT, cliente TEXT,
+            nota TEXT, lote TEXT, qte TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analises_cliente (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente TEXT,
+            codigo  TEXT,
+            descricao TEXT,
+            tipo_ensaio TEXT,
+            sim INTEGER DEFAULT 0,
+            analise TEXT,
+            espec_min TEXT,
+            espec_max TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS produtos_ap (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descricao TEXT,
+            familia  TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analises_produto_ap (
+            produto_id INTEGER,
+            propriedade TEXT,
+            tipo        TEXT,
+            metodo      TEXT,
+            minimo      TEXT,
+            maximo      TEXT,
+            especificacao INTEGER DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS testes_qualidade (
+            codigo    TEXT PRIMARY KEY,
+            tipo      TEXT,
+            descricao TEXT
+        )
+    """)
+
+
+@migration(9, "índices NOCASE para o login (login, nome, registro) e acessos.login")
+def _m009_login_nocase(conn):
+    for col in ("login", "nome", "registro"):
+        if col in _cols(conn, "funcionarios"):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_funcionarios_{col}_nocase "
+                         f"ON funcionarios({col} COLLATE NOCASE)")
+    if _has_table(conn, "acessos") and "login" in _cols(conn, "acessos"):
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_acessos_login_nocase ON acessos(login COLLATE NOCASE)")
+
+
+@migration(10, "índice na ordem de navegação de produtos (keyset do RecordNavigator)")
+def _m010_produtos_nav(conn):
+    if _has_table(conn, "produtos"):
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_produtos_nav "
+                     "ON produtos(COALESCE(codigo, ''), COALESCE(nome, ''), id)")
+
+
+@migration(11, "índices da tela Análise/Cliente (prefixo NOCASE em clientes.nome, chave cliente+código)")
+def _m011_analise_cliente(conn):
+    if "nome" in _cols(conn, "clientes"):
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_clientes_nome_nocase ON clientes(nome COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_analises_cliente_chave ON analises_cliente(cliente, codigo)")
+
+
+@migration(12, "índice de analises_produto_ap por produto (gravação por diferença)")
+def _m012_analises_produto_idx(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_analises_produto_ap_produto ON analises_produto_ap(produto_id)")
+
+
+@migration(13, "índices (produto_id, lote) de inspecoes/resultados (certificados em lote)")
+def _m013_cert_pairs(conn):
+    for table in ("inspecoes", "resultados"):
+        if _has_table(conn, table) and {"produto_id", "lote"} <= _cols(conn, table):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_produto_lote ON {table}(produto_id, lote)")
+
+
+@migration(14, "TBL_Contador e TBL_Contador_Lacuna (numeração por blocos do SequenceService)")
+def _m014_contador(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS TBL_Contador (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS TBL_Contador_Lacuna (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chave TEXT NOT NULL, inicio INTEGER NOT NULL, fim INTEGER NOT NULL,
+            motivo TEXT, estacao TEXT, registrado_em TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+@migration(15, "anomaly_modelos (modelos de anomalia por produto e análise)")
+def _m015_anomaly_modelos(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS anomaly_modelos (
+            produto   TEXT NOT NULL,
+            analise   TEXT NOT NULL,
+            n         INTEGER NOT NULL,
+            soma      REAL NOT NULL,
+            mediana   REAL NOT NULL,
+            mad       REAL NOT NULL,
+            atualizado_em TEXT DEFAULT (datetime('now')),
+            PRIMARY KEY (produto, analise)
+        ) WITHOUT ROWID
+    """)
+
+
+@migration(16, "índice invertido do assistente (qna_*) e gatilhos em inspecoes")
+def _m016_qna(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS qna_docs (
+            doc_id INTEGER PRIMARY KEY,
+            len    INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS qna_postings (
+            termo  TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            tf     INTEGER NOT NULL,
+            PRIMARY KEY (termo, doc_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_qna_postings_doc ON qna_postings(doc_id)")
+    conn.execute("CREATE TABLE IF NOT EXISTS qna_pendentes (doc_id INTEGER PRIMARY KEY)")
+    if not _has_table(conn, "inspecoes"):
+        return
+    for ev, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_qna_inspecoes_{ev.lower()}
+            AFTER {ev} ON inspecoes
+            BEGIN
+                INSERT OR IGNORE INTO qna_pendentes(doc_id) VALUES ({ref}.id);
+            END
+        """)
+    # todo o acervo entra como pendente (reindexa também índices criados antes da migração)
+    conn.execute("INSERT OR IGNORE INTO qna_pendentes(doc_id) SELECT id FROM inspecoes")
+
+
+@migration(17, "busca FTS5 em inspecoes (inspecoes_fts, gatilhos e índices dos filtros)")
+def _m017_inspecoes_fts(conn):
+    fields = ("item", "responsavel", "status", "observacoes")
+    if not _has_table(conn, "inspecoes"):
+        return
+    have = _cols(conn, "inspecoes")
+    if set(fields) <= have:
+        is_new = not _has_table(conn, "inspecoes_fts")
+        cols = ", ".join(fields)
+        new_cols = ", ".join(f"new.{c}" for c in fields)
+        old_cols = ", ".join(f"old.{c}" for c in fields)
+        conn.execute("SAVEPOINT fts")
+        try:
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS inspecoes_fts USING fts5(
+                    {cols}, content='inspecoes', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_inspecoes_fts_ai AFTER INSERT ON inspecoes BEGIN
+                    INSERT INTO inspecoes_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_inspecoes_fts_ad AFTER DELETE ON inspecoes BEGIN
+                    INSERT INTO inspecoes_fts(inspecoes_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                END
+            """)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_inspecoes_fts_au AFTER UPDATE ON inspecoes BEGIN
+                    INSERT INTO inspecoes_fts(inspecoes_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                    INSERT INTO inspecoes_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+                END
+            """)
+            if is_new:
+                conn.execute("INSERT INTO inspecoes_fts(inspecoes_fts) VALUES ('rebuild')")
+            conn.execute("RELEASE fts")
+        except sqlite3.OperationalError:
+            # SQLite sem FTS5: o assistente fica só com o índice BM25 (qna_*)
+            conn.execute("ROLLBACK TO fts")
+            conn.execute("RELEASE fts")
+    # índices para os predicados estruturados (só colunas existentes)
+    for col, expr in (("status", "status COLLATE NOCASE"), ("lote", "lote COLLATE NOCASE"),
+                      ("produto_id", "produto_id"), ("cliente_id", "cliente_id"),
+                      ("data", "data"), ("data_emissao", "data_emissao")):
+        if col in have:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_inspecoes_{col} ON inspecoes({expr})")
+
+
+@migration(18, "coluna ordem em analises_produto_ap e analises_cliente (ordem da grade)")
+def _m018_ordem_grades(conn):
+    for table, ident in (("analises_produto_ap", "rowid"), ("analises_cliente", "id")):
+        if "ordem" in _add_columns(conn, table, {"ordem": "INTEGER"}):
+            conn.execute(f"UPDATE {table} SET ordem = {ident}")  # mantém a ordem de antes
+
+
+
+@migration(19, "anomaly_online (estado dos estimadores online por produto e análise)")
+def _m019_anomaly_online(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS anomaly_online (
+            produto TEXT NOT NULL,
+            analise TEXT NOT NULL,
+            n       INTEGER NOT NULL,
+            estado  TEXT NOT NULL,
+            atualizado_em TEXT DEFAULT (datetime('now')),
+            PRIMARY KEY (produto, analise)
+        ) WITHOUT ROWID
+    """)
+
+
+@migration(20, "TBL_Contador: uma linha por chave (índice único para o SequenceService)")
+def _m020_contador_unico(conn):
+    # o TBL_Contador vinculado do legado não tem chave única: fica a linha de
+    # maior valor de cada chave, senão o UPDATE da reserva soma em várias
+    _add_columns(conn, "TBL_Contador", {"chave": "TEXT", "valor": "INTEGER NOT NULL DEFAULT 0"})
+    conn.execute("""
+        DELETE FROM TBL_Contador
+         WHERE chave IS NOT NULL
+           AND rowid NOT IN (SELECT rowid FROM (
+                   SELECT rowid, MAX(COALESCE(valor, 0)) FROM TBL_Contador
+                    WHERE chave IS NOT NULL GROUP BY chave))
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_contador_chave ON TBL_Contador(chave)")
+
+
+# ------------------------------ execução ------------------------------
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(conn: sqlite3.Connection, log=None) -> int:
+    """
+    Aplica as migrações pendentes e retorna a versão final. Com o banco em
+    dia é só um PRAGMA user_version. BEGIN IMMEDIATE + releitura da versão
+    evitam que duas instâncias abertas ao mesmo tempo migrem em dobro.
+    """
+    if current_version(conn) >= LATEST:
+        return LATEST
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = current_version(conn)
+        for v, descricao, fn in MIGRATIONS:
+            if v <= version:
+                continue
+            fn(conn)
+            if log:
+                log(f"Migração {v}: {descricao}")
+            version = v
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return version
+
+
+# Registro por processo: bancos já conferidos nesta execução. As telas
+# chamam ensure_schema() ao abrir; depois da 1ª vez é só uma busca no set.
+_READY: set = set()
+
+
+def _db_key(conn: sqlite3.Connection):
+    try:
+        path = conn.execute("PRAGMA database_list").fetchone()[2]
+    except Exception:
+        path = ""
+    return path or id(conn)  # :memory: não tem caminho
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """Garante o esquema em dia uma vez por processo (sem DDL nas chamadas seguintes)."""
+    key = _db_key(conn)
+    if key in _READY:
+        return
+    migrate(conn)
+    _READY.add(key)
+
+
+def main():
+    from ..config import DB_PATH
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=str(DB_PATH), help="arquivo SQLite (padrão: config.DB_PATH)")
+    args = ap.parse_args()
+    con = sqlite3.connect(args.db)
+    antes = current_version(con)
+    depois = migrate(con, log=print)
+    con.close()
+    print("DB_PATH:", args.db)
+    print(f"Esquema na versão {depois}" + (" (já estava em dia)" if antes == depois else f" (era {antes})"))
+
+
+if __name__ == "__main__":
+    main()
+
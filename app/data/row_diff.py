@@ -0,0 +1,103 @@
+# app/data/row_diff.py
+"""
+Gravação de grades por diferença (em vez de DELETE + INSERT de tudo).
+
+As linhas de um escopo (ex.: cliente+código, produto_id) são casadas com as
+da grade por uma identidade estável: a chave (nome da análise, sem
+diferença de maiúsculas/espaços) e, para chaves repetidas, a ordem em que
+aparecem. Só o que mudou vira SQL:
+
+  casou e algum valor mudou  -> UPDATE pelo rowid
+  está no banco e não na grade -> DELETE pelo rowid
+  está na grade e não no banco -> INSERT
+
+Cada tipo de comando sai num executemany, tudo numa transação. Linhas que
+não mudaram mantêm rowid/id, então o que aponta para elas continua válido.
+
+Linhas novas ganham rowid no fim; para a ordem da grade sobreviver à
+recarga, `order_col` guarda a posição de cada linha (mudar só a ordem vira
+UPDATE dessa coluna) e a leitura ordena por ela.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterable, Optional, Sequence
+
+
+def _norm_key(v) -> str:
+    return " ".join(str(v or "").split()).casefold()
+
+
+def _same(a, b) -> bool:
+    return ("" if a is None else str(a)) == ("" if b is None else str(b))
+
+
+def diff_rows(existing: Sequence[tuple], desired: Iterable[Sequence], nkey: int = 1):
+    """
+    existing: [(rowid, *chave, *valores)] lidas do banco
+    desired : [(*chave, *valores)] da grade
+    Retorna (inserts, updates, deletes): linhas da grade, (rowid, linha) e rowids.
+    """
+    pool: dict[tuple, list] = {}
+    for row in existing:
+        k = tuple(_norm_key(v) for v in row[1:1 + nkey])
+        pool.setdefault(k, []).append(row)
+
+    inserts, updates = [], []
+    for row in desired:
+        row = tuple(row)
+        k = tuple(_norm_key(v) for v in row[:nkey])
+        bucket = pool.get(k)
+        if not bucket:
+            inserts.append(row)
+            continue
+        old = bucket.pop(0)
+        if not all(_same(a, b) for a, b in zip(old[1:], row)):
+            updates.append((old[0], row))
+    deletes = [r[0] for bucket in pool.values() for r in bucket]
+    return inserts, updates, deletes
+
+
+def save_rows(conn: sqlite3.Connection, table: str, scope: dict, key_cols: Sequence[str],
+              value_cols: Sequence[str], rows: Iterable[Sequence],
+              order_col: Optional[str] = None) -> tuple[int, int, int]:
+    """
+    Deixa as linhas de `table` que casam com `scope` iguais a `rows`
+    (cada linha = valores de key_cols + value_cols, nessa ordem). Com
+    `order_col`, grava nela a posição da linha em `rows` (0, 1, 2...).
+    Retorna (inseridas, alteradas, apagadas).
+    """
+    order = "rowid"
+    if order_col:
+        value_cols = [*value_cols, order_col]
+        rows = [(*r, i) for i, r in enumerate(rows)]
+        order = f'"{order_col}", rowid'
+    cols = [*key_cols, *value_cols]
+    where = " AND ".join(f'"{c}" = ?' for c in scope)
+    scope_vals = tuple(scope.values())
+    sel = ", ".join(f'"{c}"' for c in cols)
+    existing = conn.execute(
+        f'SELECT rowid, {sel} FROM "{table}" WHERE {where} ORDER BY {order}', scope_vals
+    ).fetchall()
+    inserts, updates, deletes = diff_rows([tuple(r) for r in existing], rows, len(key_cols))
+    if not (inserts or updates or deletes):
+        return 0, 0, 0
+
+    all_cols = [*scope, *cols]
+    names = ", ".join(f'"{c}"' for c in all_cols)
+    try:
+        if deletes:
+            conn.executemany(f'DELETE FROM "{table}" WHERE rowid = ?', [(r,) for r in deletes])
+        if updates:
+            sets = ", ".join(f'"{c}" = ?' for c in cols)
+            conn.executemany(f'UPDATE "{table}" SET {sets} WHERE rowid = ?',
+                             [(*row, rid) for rid, row in updates])
+        if inserts:
+            marks = ", ".join("?" * len(all_cols))
+            conn.executemany(f'INSERT INTO "{table}" ({names}) VALUES ({marks})',
+                             [(*scope_vals, *row) for row in inserts])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(inserts), len(updates), len(deletes)
@@ -0,0 +1,136 @@
+# app/data/snapshot.py
+"""
+Cópia somente leitura do banco para relatórios e análises.
+
+Relatório pesado (CEQ, resultados de um ano) lendo o arquivo vivo disputa
+com quem está lançando resultado. Aqui a leitura vai para uma cópia:
+
+  build()  : copia o banco vivo pela API de backup (passos de `pages`
+             páginas com pausa, sem travar quem grava) para um arquivo
+             novo — nunca sobrescreve a cópia em uso
+  swap()   : abre a cópia nova com `mode=ro&immutable=1` (sem locks nem
+             checagem de mudança) e mmap grande, e passa a servir `conn`
+
+`ReadSnapshot` imita Database (`conn`, `db_path`), então quem só lê recebe
+ele no lugar do banco. Cópia imutável exige arquivo que não muda: cada
+geração tem nome próprio; a anterior fica aberta até a próxima troca (quem
+ainda estiver lendo não quebra) e só então é fechada e apagada. Antes da
+primeira cópia, `conn` é a conexão do banco vivo. A cópia da sessão
+anterior só é reaproveitada se for mais nova que `max_age`; mais velha,
+é apagada e a leitura fica no banco vivo até a primeira build.
+
+build() usa conexões próprias e pode rodar numa thread; swap() roda na
+thread de quem usa `conn` (a da interface).
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+MMAP_BYTES = 256 * 1024 * 1024
+
+
+class ReadSnapshot:
+    def __init__(self, live, folder: Optional[Path] = None, mmap_bytes: int = MMAP_BYTES,
+                 pages: int = 512, sleep: float = 0.02, max_age: Optional[timedelta] = None):
+        self.live = live
+        live_path = Path(live.db_path)
+        self.folder = Path(folder) if folder else live_path.parent / "leitura"
+        self.prefix = f"{live_path.stem}_leitura_"
+        self.mmap_bytes = int(mmap_bytes)
+        self.pages = max(1, int(pages))
+        self.sleep = max(0.0, float(sleep))
+        self.max_age = max_age
+        self._conn: Optional[sqlite3.Connection] = None
+        self._old: Optional[sqlite3.Connection] = None
+        self._path: Optional[Path] = None
+        self._old_path: Optional[Path] = None
+        self.taken_at: Optional[datetime] = None
+        self._adopt_latest()
+
+    # ---------------- interface de Database ----------------
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self._conn if self._conn is not None else self.live.conn
+
+    @property
+    def db_path(self) -> Path:
+        return self._path or Path(self.live.db_path)
+
+    @property
+    def ready(self) -> bool:
+        return self._conn is not None
+
+    # ---------------- gerações ----------------
+    def _generations(self) -> list[Path]:
+        return sorted(self.folder.glob(f"{self.prefix}*.db")) if self.folder.exists() else []
+
+    def _adopt_latest(self) -> None:
+        """Reaproveita a cópia da sessão anterior (até a primeira build desta), se ainda nova."""
+        gens = self._generations()
+        for p in gens[:-1]:
+            p.unlink(missing_ok=True)
+        if gens and self.max_age is not None:
+            try:
+                age = datetime.now() - datetime.fromtimestamp(gens[-1].stat().st_mtime)
+            except OSError:
+                age = None
+            if age is None or age > self.max_age:  # velha demais: relatório leria dado vencido
+                gens[-1].unlink(missing_ok=True)
+                return
+        if gens:
+            try:
+                self.swap(gens[-1])
+            except sqlite3.Error:
+                gens[-1].unlink(missing_ok=True)
+
+    def build(self) -> Path:
+        """Copia o banco vivo para uma geração nova. Retorna o caminho (para swap)."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        dest = self.folder / f"{self.prefix}{datetime.now():%Y%m%d_%H%M%S_%f}.db"  # nome ordena por data
+        part = dest.with_suffix(".part")
+        src = sqlite3.connect(str(self.live.db_path), timeout=10)
+        dst = sqlite3.connect(str(part))
+        try:
+            src.backup(dst, pages=self.pages, sleep=self.sleep)
+            # a cópia é só leitura: sem WAL, senão immutable=1 não enxerga o -wal
+            dst.execute("PRAGMA journal_mode=DELETE")
+        except BaseException:
+            dst.close()
+            part.unlink(missing_ok=True)
+            raise
+        finally:
+            src.close()
+        dst.close()
+        part.replace(dest)
+        return dest
+
+    def swap(self, path: Path) -> None:
+        """Passa a ler de `path`; fecha e apaga a geração de duas trocas atrás."""
+        path = Path(path).resolve()
+        conn = sqlite3.connect(f"{path.as_uri()}?mode=ro&immutable=1", uri=True,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA mmap_size={self.mmap_bytes}")
+        conn.execute("PRAGMA cache_size=-65536")  # ~64 MB
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # arquivo válido?
+
+        if self._old is not None:
+            self._old.close()
+            if self._old_path is not None:
+                self._old_path.unlink(missing_ok=True)
+        self._old, self._old_path = self._conn, self._path
+        self._conn, self._path = conn, path
+        self.taken_at = datetime.fromtimestamp(path.stat().st_mtime)
+
+    def refresh(self) -> None:
+        """build() + swap() na mesma thread (uso fora da interface / scripts)."""
+        self.swap(self.build())
+
+    def close(self) -> None:
+        for c in (self._old, self._conn):
+            if c is not None:
+                c.close()
+        self._old = self._conn = None
@@ -4,6 +4,8 @@ import csv
 import sqlite3
 from typing import Iterable, List, Dict, Any, Optional
 
+from ..data.migrations import ensure_schema
+
 class DataService:
     """Serviço de dados de alto nível sobre o SQLite já utilizado pelo app."""
     def __init__(self, db) -> None:
@@ -14,21 +16,8 @@ class DataService:
 
     # ---------- schema ----------
     def ensure_schema(self) -> None:
-        cur = self.conn.cursor()
-        # Tabela específica para as consultas da tela "Impressão de Certificados"
-        cur.execute(
-            """CREATE TABLE IF NOT EXISTS cert_consulta (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    laudo TEXT,
-                    emissao TEXT,
-                    codigo TEXT,
-                    cliente TEXT,
-                    nota TEXT,
-                    lote TEXT,
-                    qte REAL
-            )"""
-        )
-        self.conn.commit()
+        # cert_consulta (tela "Impressão de Certificados") vem da migração 8
+        ensure_schema(self.conn)
 
     # ---------- consultas ----------
     def search_impressao(self,
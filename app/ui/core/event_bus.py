@@ -10,6 +10,9 @@ class EventBus(QObject):
     analysisClientSaved  = pyqtSignal(object)  # client_id
     inspectionSaved      = pyqtSignal(object)  # inspection_id
     certificateIssued    = pyqtSignal(object)  # certificate_id
+    permissionsSaved     = pyqtSignal(object)  # login (ou usuario_id); None = todos
+    dataSynced           = pyqtSignal(object)  # {tabela: (novas, apagadas)} ou {"erro": msg}
+    snapshotReady        = pyqtSignal(object)  # caminho da nova cópia de leitura ou a exceção
 
     # Requisições utilitárias (render/impressão/PDF)
     requestPrint = pyqtSignal(str, str)  # html, title
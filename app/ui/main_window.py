@@ -13,13 +13,20 @@ from PyQt6.QtWidgets import (
     QPushButton, QComboBox, QFrame, QMessageBox, QStackedWidget,
     QScrollArea, QSizePolicy
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPixmap
 from pathlib import Path
+from datetime import timedelta
+import threading
 
 from ..data.db import Database
 from ..ai.nlp_assistant import QnAAssistant
-from ..ai.anomaly_detection import AnomalyDetector
+from ..ai.anomaly_detection import AnomalyDetector, AnomalyModelStore, OnlineAnomalyStore
+from ..data.delta_sync import DeltaSync
+from ..data.migration_engine import make_reader
+from ..data.conformance import ConformanceEngine
+from ..data.measurement_store import MeasurementStore
+from ..data.snapshot import ReadSnapshot
 
 from .crud import CrudWidget
 from .screens.reports import ReportsWidget
@@ -35,6 +42,9 @@ from .core.event_bus import EventBus
 from .core.app_context import AppContext
 from .services.data_service import DataService
 from .services.certificate_service import CertificateService
+from .services.permission_service import PermissionService
+from .services.sequence_service import SequenceService
+from .services.maintenance_service import MaintenanceService
 # --------------------------------------------------
 
 class ScaledImage(QLabel):
@@ -67,23 +77,62 @@ class MainWindow(QMainWindow):
         self.resize(1280, 800)
 
         self.db = Database()
-        self._ensure_grupos_espanhol_column()
-        self._ensure_analises_codigo_column()
 
         # ------- NOVO infra -------
         self.bus = EventBus(self)
         self.ctx = AppContext()
-        self.services = DataService(self.db, self.ctx, self.bus)
+        self.seq = SequenceService(self.db)  # nº de laudo: blocos reservados em TBL_Contador
+        self.services = DataService(self.db, self.ctx, self.bus, seq=self.seq)
         self.cert_service = CertificateService()
+        self.perms = PermissionService(self.db, self.ctx, self.bus)
+        # limites de especificação em cache: telas de análise avisam quando gravam
+        self.conformance = ConformanceEngine(self.db)
+        self.bus.analysisProductSaved.connect(lambda pid: self.conformance.forget(produto=pid))
+        self.bus.analysisClientSaved.connect(lambda cli: self.conformance.forget(cliente=cli))
+        # conectado depois do serviço: quando chega aqui a máscara já foi recompilada
+        self.bus.permissionsSaved.connect(lambda _who: self.current_user and self.apply_permissions())
         # conectar impressão/pdf globais
         self.bus.requestPrint.connect(self.cert_service.print_html)
         self.bus.requestPdf.connect(self.cert_service.save_pdf)
         # --------------------------
 
-        self.assistant = QnAAssistant(self.db)
-        self.anomaly = AnomalyDetector(self.db)
+        # relatórios/análises leem de uma cópia somente leitura (config.SNAPSHOT_MIN)
+        from ..config import SNAPSHOT_MIN
+        self.snapshot = (ReadSnapshot(self.db, max_age=timedelta(minutes=SNAPSHOT_MIN))
+                         if SNAPSHOT_MIN > 0 else None)
+        self.read_db = self.snapshot or self.db
+        self.assistant = QnAAssistant(self.db, read_db=self.read_db)
+        self.anomaly = AnomalyDetector(self.read_db)
+        # detector online (P² + EWMA): cada medição nova acrescentada na cópia .npy o atualiza
+        self.anomaly_online = OnlineAnomalyStore(self.db)
+        # cópia .npy (mmap) das medições para gráficos/capacidade; cresce pela marca de rowid
+        self.measurements = MeasurementStore(self.db, listener=self.anomaly_online)
+        # grupos alterados leem os valores da cópia .npy em vez de uma consulta por grupo
+        self.anomaly_models = AnomalyModelStore(self.db, source_db=self.read_db, measurements=self.measurements)
         self.current_user = None
 
+        # sincronização incremental com o back-end legado (config.SYNC_SOURCE)
+        self._sync_running = False
+        self._sync_manual = False
+        self.bus.dataSynced.connect(self._on_data_synced)
+        self.sync_timer = QTimer(self)
+        self.sync_timer.timeout.connect(lambda: self._start_sync(manual=False))
+
+        # backup/checkpoint/optimize nas janelas configuradas, com o app ocioso
+        from ..config import MAINT_WINDOWS, MAINT_IDLE_MIN, BACKUP_DIR, BACKUP_KEEP
+        self.maintenance = MaintenanceService(self.db.db_path, MAINT_WINDOWS, MAINT_IDLE_MIN,
+                                              BACKUP_DIR or None, BACKUP_KEEP, parent=self)
+        self.maintenance.start()
+
+        self._snapshot_running = False
+        self.bus.snapshotReady.connect(self._on_snapshot_ready)
+        self.snapshot_timer = QTimer(self)
+        self.snapshot_timer.timeout.connect(self._refresh_snapshot)
+        if self.snapshot is not None:
+            self.snapshot_timer.start(SNAPSHOT_MIN * 60_000)
+            # sempre uma cópia nova ao abrir: a adotada (se houver) só serve até ela ficar pronta
+            self._refresh_snapshot()
+
         self.page_wrappers: dict[str, QWidget] = {}
 
         root = QWidget()
@@ -226,6 +275,7 @@ class MainWindow(QMainWindow):
 
         self._build_login_page()
         self._set_menus_enabled(False)
+        self._start_sync_timer()
 
         apply_button_theme(self)
         apply_table_theme(self, editable=True)
@@ -364,10 +414,10 @@ class MainWindow(QMainWindow):
                         return widget_cls()
 
         if key == "funcionarios":
-            return FuncionariosWidget(self.db, read_only=not self._is_admin())
+            return FuncionariosWidget(self.db, read_only=not self.perms.can("cad_func"))
 
         if key == "acessos":
-            return AcessosWidget(self.db)
+            return AcessosWidget(self.db, bus=self.bus)
 
         if key == "clientes":
             return CrudWidget(self.db, "clientes", [
@@ -426,22 +476,22 @@ class MainWindow(QMainWindow):
             return TestesQualidadeWidget(self.db)
 
         if key == "analise_produto":
-            return new(AnaliseProdutoWidget)
+            return AnaliseProdutoWidget(self.db, bus=self.bus)
 
         if key == "analise_cliente":
-            return new(AnaliseClienteWidget)
+            return AnaliseClienteWidget(self.db, bus=self.bus)
 
         if key == "inspecoes":
             return new(ResultadosInspecaoWidget)
 
         if key == "impressao_certificados":
-            return new(ImpressaoCertificadosWidget)
+            return ImpressaoCertificadosWidget(self.db, conformance=self.conformance, seq=self.seq)
 
         if key == "relatorios":
             try:
-                return ReportsWidget(self.db, self.bus, self.services)
+                return ReportsWidget(self.read_db, self.bus, self.services)
             except TypeError:
-                return ReportsWidget(self.db)
+                return ReportsWidget(self.read_db)
 
         if key == "certificado":
             return CertificadoWidget(self.db)
@@ -478,8 +528,9 @@ class MainWindow(QMainWindow):
         if not self.current_user:
             QMessageBox.information(self, "Atenção", "Faça login para acessar o sistema.")
             return
-        if key in ("funcionarios", "acessos") and not self._is_admin():
-            QMessageBox.information(self, "Permissão", "Somente o admin pode acessar esta área.")
+        need = self.PAGE_PERMS.get(key)
+        if need and not self.perms.can(need):
+            QMessageBox.information(self, "Permissão", "Seu usuário não tem acesso a esta área.")
             return
 
         if key not in self.page_wrappers:
@@ -533,6 +584,7 @@ class MainWindow(QMainWindow):
 
         self.current_user = auth
         self.ctx.current_user = auth  # << grava no contexto
+        self.perms.login(auth)
         self.apply_permissions()
         self.btn_logout.setVisible(True)
         self.left.setVisible(True)
@@ -551,6 +603,7 @@ class MainWindow(QMainWindow):
     def logout(self):
         self.current_user = None
         self.ctx.current_user = None
+        self.perms.logout()
         self._set_menus_enabled(False)
         self.btn_logout.setVisible(False)
         self.left.setVisible(False)
@@ -562,16 +615,24 @@ class MainWindow(QMainWindow):
         self.page_wrappers.clear()
         self._build_login_page()
 
+    def closeEvent(self, e):
+        self.seq.close()  # sobras dos blocos de numeração ficam registradas como lacuna
+        self.maintenance.stop()
+        if self.snapshot is not None:
+            self.snapshot.close()
+        super().closeEvent(e)
+
     # -------------------- Permissões --------------------
+    # página -> permissão exigida (admin tem todas)
+    PAGE_PERMS = {"funcionarios": "cad_func", "acessos": "def_acessos"}
+
     def _is_admin(self) -> bool:
-        if not self.current_user:
-            return False
-        return (self.current_user.get("papel", "") or "").lower() == "admin"
+        return self.perms.is_admin()
 
     def apply_permissions(self):
         self._set_menus_enabled(True)
-        self.btn_func.setVisible(self._is_admin())
-        self.btn_acessos.setVisible(self._is_admin())
+        self.btn_func.setVisible(self.perms.can("cad_func"))
+        self.btn_acessos.setVisible(self.perms.can("def_acessos"))
         if "funcionarios" in self.page_wrappers:
             old = self.page_wrappers.pop("funcionarios")
             self.pages.removeWidget(old)
@@ -587,31 +648,94 @@ class MainWindow(QMainWindow):
 
     # -------------------- Utilidades --------------------
     def _update_data(self):
-        from ..config import DB_PATH
+        from ..config import DB_PATH, SYNC_SOURCE
         try:
             self.db.conn.commit()
+            if SYNC_SOURCE:
+                self._start_sync(manual=True)  # conclui em _on_data_synced
+                return
+            self._after_new_data()
             QMessageBox.information(self, "Dados", f"Banco pronto em {DB_PATH}")
         except Exception as e:
             QMessageBox.warning(self, "Dados", f"Falha ao atualizar dados. {e}")
 
-    def _ensure_grupos_espanhol_column(self):
+    def _after_new_data(self):
+        self.measurements.refresh()
+        if self.snapshot is not None:
+            self._refresh_snapshot()  # modelos reajustam sobre a cópia nova (_on_snapshot_ready)
+        else:
+            # recalcula só os modelos (produto, análise) cujos resultados mudaram
+            self.anomaly_models.refit()
+
+    def _refresh_snapshot(self):
+        """Tira uma cópia nova numa thread; a troca volta pelo bus.snapshotReady."""
+        if self.snapshot is None or self._snapshot_running:
+            return
+        self._snapshot_running = True
         try:
-            cur = self.db.conn.cursor()
-            cur.execute("PRAGMA table_info(grupos)")
-            cols = [r[1].lower() for r in cur.fetchall()]
-            if "descricao_es" not in cols and "descricao_espanhol" not in cols:
-                cur.execute("ALTER TABLE grupos ADD COLUMN descricao_es TEXT")
-                self.db.conn.commit()
+            self.assistant.index.sync()  # a cópia leva o índice de busca em dia
         except Exception:
             pass
 
-    def _ensure_analises_codigo_column(self):
+        def work():
+            try:
+                res = self.snapshot.build()
+            except Exception as e:
+                res = e
+            self.bus.snapshotReady.emit(res)
+
+        threading.Thread(target=work, name="snapshot", daemon=True).start()
+
+    def _on_snapshot_ready(self, res):
+        self._snapshot_running = False
+        if isinstance(res, Exception) or self.snapshot is None:
+            return
         try:
-            cur = self.db.conn.cursor()
-            cur.execute("PRAGMA table_info(analises)")
-            cols = [r[1].lower() for r in cur.fetchall()]
-            if "codigo" not in cols:
-                cur.execute("ALTER TABLE analises ADD COLUMN codigo TEXT")
-                self.db.conn.commit()
+            self.snapshot.swap(res)
+            self.anomaly_models.refit()
         except Exception:
-            pass
+            pass  # segue lendo da cópia anterior
+
+    def _start_sync_timer(self):
+        from ..config import SYNC_SOURCE, SYNC_INTERVAL_MIN
+        if SYNC_SOURCE and SYNC_INTERVAL_MIN > 0:
+            self.sync_timer.start(SYNC_INTERVAL_MIN * 60_000)
+
+    def _start_sync(self, manual: bool):
+        """Roda DeltaSync numa thread; o resultado volta pelo bus.dataSynced."""
+        from ..config import DB_PATH, SYNC_SOURCE, SYNC_TABLES
+        if self._sync_running or not SYNC_SOURCE:
+            return
+        self._sync_running = True
+        self._sync_manual = manual
+        self.btn_update.setText("Sincronizando...")
+
+        def work():
+            try:
+                src = Path(SYNC_SOURCE)
+                kind = "access" if src.suffix.lower() in (".accdb", ".mdb") else "sqlite"
+                res = DeltaSync(make_reader(kind, src), DB_PATH, log=lambda *_: None,
+                                allow=SYNC_TABLES or None).run()
+            except Exception as e:
+                res = {"erro": str(e)}
+            self.bus.dataSynced.emit(res)
+
+        threading.Thread(target=work, name="delta-sync", daemon=True).start()
+
+    def _on_data_synced(self, res):
+        from ..config import DB_PATH
+        self._sync_running = False
+        self.btn_update.setText("Atualizar Dados")
+        erro = res.get("erro") if isinstance(res, dict) else None
+        if not erro:
+            try:
+                self._after_new_data()
+            except Exception as e:
+                erro = str(e)
+        if not self._sync_manual:
+            return
+        if erro:
+            QMessageBox.warning(self, "Dados", f"Falha ao atualizar dados. {erro}")
+            return
+        n = sum(a + d for a, d in res.values())
+        QMessageBox.information(self, "Dados", f"Banco pronto em {DB_PATH}\n{n} linhas sincronizadas.")
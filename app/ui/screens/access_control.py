@@ -9,7 +9,8 @@ class AccessControlWidget(QWidget):
     """
     Tela de Acessos: escolhe o funcionário e marca/desmarca permissões.
     Salva no table 'acessos' (uma linha por usuário). Se não existir, insere.
-    Se existir, atualiza.
+    Se existir, atualiza. As colunas de 'acessos' são lidas uma vez, na
+    abertura da tela; com `bus`, avisa o PermissionService ao salvar.
     """
     # (nome_coluna, rótulo)
     PERMS = [
@@ -32,10 +33,12 @@ class AccessControlWidget(QWidget):
         ("liberacao_especial",      "Liberação Especial"),
     ]
 
-    def __init__(self, db):
+    def __init__(self, db, bus=None):
         super().__init__()
         self.db = db
+        self.bus = bus
         self.user_id = None
+        self._cols = self._existing_columns("acessos")
         self._build_ui()
         self._load_funcionarios()
 
@@ -186,9 +189,12 @@ class AccessControlWidget(QWidget):
         self._clear_checks()
         if self.user_id is None:
             return
+        cols = [c for c, _cb, _frm in self._check_widgets if c in self._cols]
+        if not cols:
+            return
         cur = self.db.conn.cursor()
         try:
-            cur.execute("SELECT * FROM acessos WHERE usuario_id = ?", (self.user_id,))
+            cur.execute(f"SELECT {', '.join(cols)} FROM acessos WHERE usuario_id = ?", (self.user_id,))
             row = cur.fetchone()
         except Exception:
             row = None
@@ -196,9 +202,7 @@ class AccessControlWidget(QWidget):
         if not row:
             return
 
-        # nome->índice
-        colnames = [d[0] for d in cur.description]
-        data = dict(zip(colnames, row))
+        data = dict(zip(cols, row))
 
         for col, cb, _frm in self._check_widgets:
             v = int(data.get(col, 0) or 0)
@@ -213,10 +217,8 @@ class AccessControlWidget(QWidget):
             return
 
         values = {col: 1 if cb.isChecked() else 0 for col, cb, _frm in self._check_widgets}
-        cols_exist = self._existing_columns("acessos")
-
         # Filtra só colunas que realmente existem
-        payload = {k: v for k, v in values.items() if k in cols_exist}
+        payload = {k: v for k, v in values.items() if k in self._cols}
         payload["usuario_id"] = self.user_id
 
         cur = self.db.conn.cursor()
@@ -238,4 +240,6 @@ class AccessControlWidget(QWidget):
             cur.execute(sql, list(payload.values()))
 
         self.db.conn.commit()
+        if self.bus is not None:
+            self.bus.permissionsSaved.emit(self.user_id)
         QMessageBox.information(self, "Acessos", "Permissões salvas.")
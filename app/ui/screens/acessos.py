@@ -38,11 +38,14 @@ class AcessosWidget(QFrame):
       - Conjunto de checkboxes para as permissões
       - Botões: Novo, Salvar, Excluir
     A tabela utilizada é 'acessos', indexada por 'login'.
+    Ao salvar/excluir avisa pelo bus (permissionsSaved) para o
+    PermissionService recompilar a máscara do usuário.
     """
 
-    def __init__(self, db, parent: Optional[QWidget] = None):
+    def __init__(self, db, parent: Optional[QWidget] = None, bus=None):
         super().__init__(parent)
         self.db = db
+        self.bus = bus
         self.setObjectName("TableCard")
 
         self._build_ui()
@@ -132,7 +135,7 @@ class AcessosWidget(QFrame):
         login = self._current_login()
         cur = self.db.conn.cursor()
         try:
-            cur.execute("SELECT * FROM acessos WHERE LOWER(login)=LOWER(?)", (login,))
+            cur.execute(f"SELECT {', '.join(PERMS)} FROM acessos WHERE login = ? COLLATE NOCASE", (login,))
             row = cur.fetchone()
         except Exception:
             row = None
@@ -146,6 +149,10 @@ class AcessosWidget(QFrame):
         for k in PERMS:
             self.checks[k].setChecked(bool(row[k]))
 
+    def _notify(self, login: str):
+        if self.bus is not None:
+            self.bus.permissionsSaved.emit(login)
+
     # ---------------- ações ----------------
 
     def _on_new(self):
@@ -161,7 +168,7 @@ class AcessosWidget(QFrame):
         # tenta UPDATE primeiro
         set_sql = ", ".join([f"{k}=?" for k in PERMS])
         try:
-            cur.execute(f"UPDATE acessos SET {set_sql} WHERE LOWER(login)=LOWER(?)",
+            cur.execute(f"UPDATE acessos SET {set_sql} WHERE login = ? COLLATE NOCASE",
                         tuple(flags[k] for k in PERMS) + (login,))
             if cur.rowcount == 0:
                 # não existia => INSERT
@@ -177,6 +184,7 @@ class AcessosWidget(QFrame):
             return
 
         self.db.conn.commit()
+        self._notify(login)
         QMessageBox.information(self, "Acessos", "Permissões salvas com sucesso.")
 
     def _on_delete(self):
@@ -186,10 +194,11 @@ class AcessosWidget(QFrame):
             return
         cur = self.db.conn.cursor()
         try:
-            cur.execute("DELETE FROM acessos WHERE LOWER(login)=LOWER(?)", (login,))
+            cur.execute("DELETE FROM acessos WHERE login = ? COLLATE NOCASE", (login,))
             self.db.conn.commit()
         except Exception as e:
             QMessageBox.warning(self, "Acessos", f"Falha ao excluir permissões:\n{e}")
             return
+        self._notify(login)
         self._on_new()
         QMessageBox.information(self, "Acessos", "Permissões removidas.")
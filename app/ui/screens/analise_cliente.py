@@ -4,10 +4,16 @@ from __future__ import annotations
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QWidget, QFrame, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
-    QPushButton, QTableWidget, QTableWidgetItem, QCheckBox, QHeaderView,
+    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView,
     QAbstractScrollArea, QRadioButton, QMessageBox
 )
 
+from ...data.migrations import ensure_schema
+from ...data.row_diff import save_rows
+from ..utils.sql_completer import Debouncer, SqlPrefixCompleter
+from ..utils.grid_delegates import CheckBoxDelegate, SpecRangeDelegate, check_item, is_checked
+from ..utils.grid_tracker import GridStateTracker
+
 COL_SIM   = 0
 COL_DESC  = 1
 COL_MIN   = 2
@@ -22,13 +28,20 @@ class AnaliseClienteWidget(QWidget):
       - Grid: Sim? | Análises Básicas | Especificação Mínima | Especificação Máxima
       - Sem barra de rolagem: a altura da tabela se ajusta ao conteúdo
       - Sempre mantém uma linha vazia no final
-    Persiste em 'analises_cliente' (cria a tabela se não existir).
+      - Cliente/Código carregam só depois de uma pausa na digitação
+        (LOAD_DELAY_MS); o cliente é sugerido por um completer com busca
+        por prefixo no banco, sem pré-carregar a lista inteira
+    Persiste em 'analises_cliente' (tabela criada pelas migrações do banco).
     """
+    LOAD_DELAY_MS = 300
 
-    def __init__(self, db, parent=None):
+    def __init__(self, db, parent=None, bus=None):
         super().__init__(parent)
         self.db = db
-        self._ensure_table()
+        self.bus = bus
+        ensure_schema(self.db.conn)
+        self._loaded_cliente = None   # cliente cujos códigos estão na combo
+        self._loaded_key = None       # (cliente, código) mostrado na grade
 
         root = QVBoxLayout(self)
         root.setContentsMargins(8, 8, 8, 8)
@@ -86,14 +99,16 @@ class AnaliseClienteWidget(QWidget):
         self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
         self.table.setEditTriggers(QTableWidget.EditTrigger.AllEditTriggers)
+        self.table.setItemDelegateForColumn(COL_SIM, CheckBoxDelegate(self.table))
+        spec = SpecRangeDelegate(COL_MIN, COL_MAX, self.table)
+        self.table.setItemDelegateForColumn(COL_MIN, spec)
+        self.table.setItemDelegateForColumn(COL_MAX, spec)
 
         # Sem scroll (altura autoadaptável)
         self.table.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.table.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.table.setSizeAdjustPolicy(QAbstractScrollArea.SizeAdjustPolicy.AdjustToContents)
 
-        self.table.itemChanged.connect(self._maybe_append_empty_row)
-
         root.addWidget(self.table)
 
         # Rodapé
@@ -102,9 +117,17 @@ class AnaliseClienteWidget(QWidget):
         foot.addWidget(self.lbl_qtde); foot.addStretch(1)
         root.addLayout(foot)
 
-        # Sinais
+        # contagem/altura por diferença (conectado antes de _maybe_append_empty_row)
+        self._grid = GridStateTracker(self.table, COL_DESC, min_height=160, on_count=self._show_count)
+        self.table.itemChanged.connect(self._maybe_append_empty_row)
+
+        # Sinais: digitação só agenda; escolher na lista/Enter carrega na hora
+        self._loader = Debouncer(self.LOAD_DELAY_MS, self._apply_selection, self)
         self.cmb_cliente.currentTextChanged.connect(self._on_cliente_changed)
         self.cmb_codigo.currentTextChanged.connect(self._on_codigo_changed)
+        for cmb in (self.cmb_cliente, self.cmb_codigo):
+            cmb.activated.connect(lambda _i: self._loader.flush())
+            cmb.lineEdit().returnPressed.connect(self._loader.flush)
         self.btn_produtos_cli.clicked.connect(self._load_codigos_do_cliente)
 
         # Inicialização
@@ -114,44 +137,32 @@ class AnaliseClienteWidget(QWidget):
         self._update_count()
 
     # ------------------------------- DB ---------------------------------
-    def _ensure_table(self):
-        cur = self.db.conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS analises_cliente (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente TEXT,
-                codigo  TEXT,
-                descricao TEXT,
-                tipo_ensaio TEXT,
-                sim INTEGER DEFAULT 0,
-                analise TEXT,
-                espec_min TEXT,
-                espec_max TEXT
-            )
-            """
-        )
-        self.db.conn.commit()
-
-    def _load_clientes(self):
-        self.cmb_cliente.clear()
+    def _find_clientes_source(self):
+        """(tabela, coluna) com os nomes de cliente; None se não achar."""
         cur = self.db.conn.cursor()
-        nomes = []
         for tb in ("clientes", "tb_clientes", "client", "customer", "cad_clientes"):
             try:
                 cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND LOWER(name)=?", (tb,))
-                if cur.fetchone():
-                    for col in ("nome", "cliente", "razao", "descricao", "name"):
-                        try:
-                            cur.execute(f"SELECT {col} FROM {tb} WHERE {col} IS NOT NULL ORDER BY {col}")
-                            nomes = [r[0] for r in cur.fetchall()]
-                            if nomes: break
-                        except Exception:
-                            pass
-                if nomes: break
+                if not cur.fetchone():
+                    continue
+                for col in ("nome", "cliente", "razao", "descricao", "name"):
+                    try:
+                        cur.execute(f"SELECT 1 FROM {tb} WHERE {col} IS NOT NULL LIMIT 1")
+                        if cur.fetchone():
+                            return tb, col
+                    except Exception:
+                        pass
             except Exception:
                 pass
-        self.cmb_cliente.addItems(nomes)
+        return None
+
+    def _load_clientes(self):
+        """Liga o completer do cliente (a lista vem do banco conforme a digitação)."""
+        self.cmb_cliente.clear()
+        src = self._find_clientes_source()
+        if src:
+            self._cli_completer = SqlPrefixCompleter(self.db.conn, *src, parent=self)
+            self._cli_completer.attach(self.cmb_cliente)
 
     def _load_codigos_do_cliente(self):
         cliente = self.cmb_cliente.currentText().strip()
@@ -188,15 +199,18 @@ class AnaliseClienteWidget(QWidget):
         except Exception:
             pass
 
+        self._loaded_cliente = cliente
+        self.cmb_codigo.blockSignals(True)
         self.cmb_codigo.clear()
         self.cmb_codigo.addItems(cods)
+        self.cmb_codigo.blockSignals(False)
+        self._loader.schedule()
 
     # ------------------------------- Tabela -------------------------------
     def _append_empty_row(self):
         r = self.table.rowCount()
         self.table.insertRow(r)
-        chk = QCheckBox(); chk.setTristate(False); chk.setStyleSheet("margin-left:8px;")
-        self.table.setCellWidget(r, COL_SIM, chk)
+        self.table.setItem(r, COL_SIM, check_item(False))
         for c in (COL_DESC, COL_MIN, COL_MAX):
             it = QTableWidgetItem("")
             it.setFlags(it.flags() | Qt.ItemFlag.ItemIsEditable)
@@ -211,44 +225,45 @@ class AnaliseClienteWidget(QWidget):
         return any([desc, minv, maxv])
 
     def _maybe_append_empty_row(self, _item: QTableWidgetItem):
+        # contagem e altura ficam com o GridStateTracker
         if self._is_last_row_filled():
             self._append_empty_row()
-            self._autosize_table()
-        self._update_count()
 
     def _autosize_table(self):
-        try:
-            self.table.resizeRowsToContents()
-            header_h = self.table.horizontalHeader().height()
-            rows_h   = sum(self.table.rowHeight(r) for r in range(self.table.rowCount()))
-            frame    = self.table.frameWidth() * 2
-            total_h  = header_h + rows_h + frame + 4
-            self.table.setFixedHeight(max(total_h, 160))
-        except Exception:
-            pass
+        """Ajusta a altura de todas as linhas na próxima volta do event loop."""
+        self._grid.schedule_resize()
 
     def resizeEvent(self, e):
         super().resizeEvent(e)
-        self._autosize_table()
+        if e.size().width() != e.oldSize().width():  # quebra de texto muda com a largura
+            self._autosize_table()
 
     def _update_count(self):
-        n = 0
-        for r in range(self.table.rowCount()):
-            desc = (self.table.item(r, COL_DESC).text() if self.table.item(r, COL_DESC) else "").strip()
-            if desc: n += 1
+        self._show_count(self._grid.filled)
+
+    def _show_count(self, n: int):
         self.lbl_qtde.setText(f"Quantidade de Ensaios: {n}")
 
     # ----------------------- Load / Save ----------------------------------
     def _on_cliente_changed(self, _txt: str):
-        self._load_codigos_do_cliente()
-        self._load_from_db()
+        self._loader.schedule()
 
     def _on_codigo_changed(self, _txt: str):
-        self._load_from_db()
+        self._loader.schedule()
+
+    def _apply_selection(self):
+        """Executada após a pausa: só consulta o que de fato mudou."""
+        cliente = self.cmb_cliente.currentText().strip()
+        if cliente and cliente != self._loaded_cliente:
+            self._load_codigos_do_cliente()
+        key = (cliente, self.cmb_codigo.currentText().strip())
+        if key != self._loaded_key:
+            self._load_from_db()
 
     def _load_from_db(self):
         cliente = self.cmb_cliente.currentText().strip()
         codigo  = self.cmb_codigo.currentText().strip()
+        self._loaded_key = (cliente, codigo)
         if not cliente or not codigo:
             self._clear_table_to_blank()
             return
@@ -260,7 +275,7 @@ class AnaliseClienteWidget(QWidget):
                 SELECT descricao, tipo_ensaio, sim, analise, espec_min, espec_max
                 FROM analises_cliente
                 WHERE cliente = ? AND codigo = ?
-                ORDER BY id
+                ORDER BY ordem, id
                 """,
                 (cliente, codigo)
             )
@@ -268,6 +283,9 @@ class AnaliseClienteWidget(QWidget):
         except Exception:
             rows = []
 
+        # carga em lote: sem repintar nem disparar itemChanged a cada célula
+        self.table.setUpdatesEnabled(False)
+        self.table.blockSignals(True)
         self.table.setRowCount(0)
         if rows:
             self.ed_descricao.setText(rows[0][0] or "")
@@ -275,26 +293,22 @@ class AnaliseClienteWidget(QWidget):
             self.rb_analitico.setChecked(ens.startswith("a"))
             self.rb_orientativo.setChecked(not ens.startswith("a"))
 
-            for _, _, sim, analise, e_min, e_max in rows:
-                r = self.table.rowCount()
-                self.table.insertRow(r)
-
-                chk = QCheckBox(); chk.setChecked(bool(sim)); chk.setTristate(False)
-                chk.setStyleSheet("margin-left:8px;")
-                self.table.setCellWidget(r, COL_SIM, chk)
-
-                def _it(v: str):
-                    it = QTableWidgetItem(v or "")
-                    it.setFlags(it.flags() | Qt.ItemFlag.ItemIsEditable)
-                    return it
+            def _it(v: str):
+                it = QTableWidgetItem(v or "")
+                it.setFlags(it.flags() | Qt.ItemFlag.ItemIsEditable)
+                return it
 
+            self.table.setRowCount(len(rows))
+            for r, (_, _, sim, analise, e_min, e_max) in enumerate(rows):
+                self.table.setItem(r, COL_SIM,  check_item(bool(sim)))
                 self.table.setItem(r, COL_DESC, _it(analise or ""))
                 self.table.setItem(r, COL_MIN,  _it(e_min or ""))
                 self.table.setItem(r, COL_MAX,  _it(e_max or ""))
 
         self._append_empty_row()
-        self._autosize_table()
-        self._update_count()
+        self.table.blockSignals(False)
+        self.table.setUpdatesEnabled(True)
+        self._grid.reset()  # itemChanged estava bloqueado: recalcula numa passada
 
     def _clear_table_to_blank(self):
         self.table.setRowCount(0)
@@ -309,30 +323,30 @@ class AnaliseClienteWidget(QWidget):
             QMessageBox.information(self, "Salvar", "Informe Cliente e Código.")
             return
 
+        # a grade na tela é o que vai ser gravado: descarta carga pendente
+        self._loader.cancel()
+        self._loaded_key = (cliente, codigo)
+
         desc   = self.ed_descricao.text().strip()
         ensaio = "Analitico" if self.rb_analitico.isChecked() else "Orientativo"
 
-        try:
-            cur = self.db.conn.cursor()
-            cur.execute("DELETE FROM analises_cliente WHERE cliente = ? AND codigo = ?", (cliente, codigo))
-
-            for r in range(self.table.rowCount()):
-                analise = (self.table.item(r, COL_DESC).text() if self.table.item(r, COL_DESC) else "").strip()
-                minv    = (self.table.item(r, COL_MIN).text() if self.table.item(r, COL_MIN) else "").strip()
-                maxv    = (self.table.item(r, COL_MAX).text() if self.table.item(r, COL_MAX) else "").strip()
-                sim     = 1 if isinstance(self.table.cellWidget(r, COL_SIM), QCheckBox) and self.table.cellWidget(r, COL_SIM).isChecked() else 0
-                if not any([analise, minv, maxv, sim]):
-                    continue
+        rows = []
+        for r in range(self.table.rowCount()):
+            analise = (self.table.item(r, COL_DESC).text() if self.table.item(r, COL_DESC) else "").strip()
+            minv    = (self.table.item(r, COL_MIN).text() if self.table.item(r, COL_MIN) else "").strip()
+            maxv    = (self.table.item(r, COL_MAX).text() if self.table.item(r, COL_MAX) else "").strip()
+            sim     = 1 if is_checked(self.table.item(r, COL_SIM)) else 0
+            if not any([analise, minv, maxv, sim]):
+                continue
+            rows.append((analise, desc, ensaio, sim, minv, maxv))
 
-                cur.execute(
-                    """
-                    INSERT INTO analises_cliente
-                    (cliente, codigo, descricao, tipo_ensaio, sim, analise, espec_min, espec_max)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (cliente, codigo, desc, ensaio, sim, analise, minv, maxv)
-                )
-            self.db.conn.commit()
+        try:
+            # só INSERT/UPDATE/DELETE do que mudou; ids das análises mantidas ficam
+            save_rows(self.db.conn, "analises_cliente", {"cliente": cliente, "codigo": codigo},
+                      ("analise",), ("descricao", "tipo_ensaio", "sim", "espec_min", "espec_max"), rows,
+                      order_col="ordem")
+            if self.bus:
+                self.bus.analysisClientSaved.emit(cliente)
             QMessageBox.information(self, "Salvar", "Análises do cliente gravadas com sucesso.")
         except Exception as e:
             QMessageBox.warning(self, "Salvar", f"Falha ao gravar: {e}")
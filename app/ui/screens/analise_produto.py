@@ -3,9 +3,13 @@ from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
     QPushButton, QTableWidget, QTableWidgetItem, QAbstractItemView,
-    QSpinBox, QCheckBox, QMessageBox
+    QSpinBox, QMessageBox
 )
 
+from ...data.migrations import ensure_schema
+from ...data.row_diff import save_rows
+from ..utils.grid_delegates import CheckBoxDelegate, SpecRangeDelegate, check_item, is_checked
+
 BASIC_ROWS = [
     ("Possui Rabichos?",                  "Visual",           "",                               "",   "Não",  False),
     ("Umidade (%)",                       "",                 "UCPT INT LAB 011",               "1",  "",     True),
@@ -22,10 +26,11 @@ BASIC_ROWS = [
 class AnaliseProdutoWidget(QWidget):
     ROLE_IS_BASIC = Qt.ItemDataRole.UserRole + 1
 
-    def __init__(self, db):
+    def __init__(self, db, bus=None):
         super().__init__()
         self.db = db
-        self._ensure_tables()
+        self.bus = bus
+        ensure_schema(self.db.conn)
 
         root = QVBoxLayout(self)
         root.setContentsMargins(12, 12, 12, 12)
@@ -99,6 +104,10 @@ class AnaliseProdutoWidget(QWidget):
         self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.setAlternatingRowColors(True)
+        spec = SpecRangeDelegate(3, 4, self.table)
+        self.table.setItemDelegateForColumn(3, spec)
+        self.table.setItemDelegateForColumn(4, spec)
+        self.table.setItemDelegateForColumn(5, CheckBoxDelegate(self.table))
         root.addWidget(self.table, 1)
 
         # -------- Rodapé
@@ -120,28 +129,6 @@ class AnaliseProdutoWidget(QWidget):
         self._load_suggestions()
 
     # ===================== Banco / Persistência =====================
-    def _ensure_tables(self):
-        cur = self.db.conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS produtos_ap (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                descricao TEXT,
-                familia  TEXT
-            )
-        """)
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS analises_produto_ap (
-                produto_id INTEGER,
-                propriedade TEXT,
-                tipo        TEXT,
-                metodo      TEXT,
-                minimo      TEXT,
-                maximo      TEXT,
-                especificacao INTEGER DEFAULT 0
-            )
-        """)
-        self.db.conn.commit()
-
     def _save_product(self, pid: int, descricao: str, familia: str) -> int:
         cur = self.db.conn.cursor()
         if pid > 0:
@@ -152,22 +139,16 @@ class AnaliseProdutoWidget(QWidget):
         self.db.conn.commit()
         return cur.lastrowid
 
-    def _overwrite_analises(self, pid: int):
-        cur = self.db.conn.cursor()
-        cur.execute("DELETE FROM analises_produto_ap WHERE produto_id=?", (pid,))
-        for r in range(self.table.rowCount()):
-            prop   = self._text(r, 0)
-            tipo   = self._text(r, 1)
-            metodo = self._text(r, 2)
-            minimo = self._text(r, 3)
-            maximo = self._text(r, 4)
-            espec  = 1 if self._checked(r, 5) else 0
-            cur.execute("""
-                INSERT INTO analises_produto_ap
-                    (produto_id, propriedade, tipo, metodo, minimo, maximo, especificacao)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (pid, prop, tipo, metodo, minimo, maximo, espec))
-        self.db.conn.commit()
+    def _save_analises(self, pid: int):
+        """Grava só as linhas alteradas (identidade = propriedade); `ordem` guarda a posição na grade."""
+        rows = [
+            (self._text(r, 0), self._text(r, 1), self._text(r, 2),
+             self._text(r, 3), self._text(r, 4), 1 if self._checked(r, 5) else 0)
+            for r in range(self.table.rowCount())
+        ]
+        save_rows(self.db.conn, "analises_produto_ap", {"produto_id": pid},
+                  ("propriedade",), ("tipo", "metodo", "minimo", "maximo", "especificacao"), rows,
+                  order_col="ordem")
 
     def _load_analises(self, pid: int):
         self._clear_table()
@@ -176,9 +157,13 @@ class AnaliseProdutoWidget(QWidget):
             SELECT propriedade, tipo, metodo, minimo, maximo, especificacao
               FROM analises_produto_ap
              WHERE produto_id=?
+             ORDER BY ordem, rowid
         """, (pid,))
-        for prop, tipo, metodo, minimo, maximo, espec in cur.fetchall():
+        rows = cur.fetchall()
+        self.table.setUpdatesEnabled(False)
+        for prop, tipo, metodo, minimo, maximo, espec in rows:
             self._add_row(prop or "", tipo or "", metodo or "", minimo or "", maximo or "", bool(espec), is_basic=False)
+        self.table.setUpdatesEnabled(True)
 
     # ===================== UI Helpers =====================
     def _add_row(self, prop: str, tipo: str, metodo: str, minimo: str, maximo: str, espec: bool, is_basic: bool = False):
@@ -194,9 +179,7 @@ class AnaliseProdutoWidget(QWidget):
         self.table.setItem(r, 2, mk(metodo))
         self.table.setItem(r, 3, mk(minimo))
         self.table.setItem(r, 4, mk(maximo))
-        chk = QCheckBox(); chk.setChecked(bool(espec)); chk.setTristate(False)
-        chk.setStyleSheet("margin-left:auto; margin-right:auto;")
-        self.table.setCellWidget(r, 5, chk)
+        self.table.setItem(r, 5, check_item(bool(espec)))
 
     def _clear_table(self):
         self.table.setRowCount(0)
@@ -206,8 +189,7 @@ class AnaliseProdutoWidget(QWidget):
         return it.text().strip() if it else ""
 
     def _checked(self, row: int, col: int) -> bool:
-        w = self.table.cellWidget(row, col)
-        return bool(w.isChecked()) if isinstance(w, QCheckBox) else False
+        return is_checked(self.table.item(row, col))
 
     # ===================== Ações =====================
     def _load_suggestions(self):
@@ -292,6 +274,8 @@ class AnaliseProdutoWidget(QWidget):
 
         pid = self._save_product(pid_in, desc, familia)
         self.spin_id.setValue(pid)
-        self._overwrite_analises(pid)
+        self._save_analises(pid)
+        if self.bus:
+            self.bus.analysisProductSaved.emit(pid)
 
         QMessageBox.information(self, "Salvar", f"Análises do produto #{pid} salvas com sucesso!")
@@ -13,6 +13,8 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QTextDocument, QPageSize
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 
+from ...data.migrations import ensure_schema
+
 
 @dataclass
 class CertRow:
@@ -28,14 +30,17 @@ class CertRow:
 class ImpressaoCertificadosWidget(QWidget):
     """
     Tela de consulta/impressão dos certificados.
-    - Consulta a tabela cert_consulta (criada se não existir).
-    - Importa CSV para popular rapidamente a tabela.
+    - Consulta a tabela cert_consulta (criada pelas migrações do banco).
+    - Importa CSV para popular rapidamente a tabela (linha sem laudo recebe o
+      próximo número do SequenceService).
     - Gera PDF/Imprime um certificado visual a partir da linha selecionada.
     """
-    def __init__(self, db):
+    def __init__(self, db, conformance=None, seq=None):
         super().__init__()
         self.db = db
-        self._ensure_table()
+        self.conformance = conformance
+        self.seq = seq
+        ensure_schema(self.db.conn)  # no-op depois da 1ª tela: sem DDL ao abrir
 
         root = QVBoxLayout(self)
         root.setContentsMargins(8, 8, 8, 8)
@@ -99,18 +104,6 @@ class ImpressaoCertificadosWidget(QWidget):
         # Consulta inicial (opcional)
         self._consultar()
 
-    # ---------- Infra de dados ----------
-    def _ensure_table(self):
-        cur = self.db.conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS cert_consulta (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                laudo TEXT, emissao TEXT, codigo TEXT, cliente TEXT,
-                nota TEXT, lote TEXT, qte TEXT
-            );
-        """)
-        self.db.conn.commit()
-
     # ---------- Ações ----------
     def _limpar_filtros(self):
         self.ed_codigo.clear(); self.ed_cliente.clear(); self.ed_nf.clear(); self.ed_lote.clear()
@@ -160,6 +153,8 @@ class ImpressaoCertificadosWidget(QWidget):
                 nota = row.get("Nota") or row.get("N. Fiscal") or row.get("NF") or ""
                 lote = row.get("Lote") or ""
                 qte  = row.get("QTE") or row.get("Qtd") or row.get("Quantidade") or ""
+                if not str(laudo).strip() and self.seq is not None:
+                    laudo = self.seq.next("laudo")
 
                 cur.execute("""
                     INSERT INTO cert_consulta(laudo, emissao, codigo, cliente, nota, lote, qte)
@@ -188,6 +183,32 @@ class ImpressaoCertificadosWidget(QWidget):
         )
 
     # ---------- Certificado (HTML -> PDF/Impressora) ----------
+    def _conformidade_html(self, row: CertRow) -> str:
+        """Linhas da tabela de conformidade: avaliação do lote, se houver medições."""
+        padrao = "<tr><td>Conformidade</td><td class='center'>ATENDE</td><td>Conforme Plano de Controle</td><td>Procedimento interno</td></tr>"
+        if not self.conformance:
+            return padrao
+        try:
+            produto = self.conformance.produto_por_codigo(row.codigo)
+            lote = (row.lote, produto, row.cliente, row.codigo)
+            v = self.conformance.evaluate_lots([lote])[lote]
+        except Exception:
+            return padrao
+        linhas = [a for a in v["analises"] if a["status"] in ("atende", "não atende")]
+        if not linhas:
+            return padrao
+        out = []
+        for a in linhas:
+            res = "ATENDE" if a["status"] == "atende" else "NÃO ATENDE"
+            if not a["analitico"]:
+                res += " (orientativo)"
+            out.append(f"<tr><td>{a['analise']}</td><td class='center'>{res}</td>"
+                       f"<td>{a['especificacao']}</td><td>Procedimento interno</td></tr>")
+        if v["liberacao_especial"]:
+            out.append("<tr><td><b>Liberação Especial</b></td><td class='center'><b>NECESSÁRIA</b></td>"
+                       "<td colspan='2'>Lote fora da especificação em análise analítica</td></tr>")
+        return "".join(out)
+
     def _cert_html(self, row: CertRow) -> str:
         # HTML simples e responsivo para A4
         return f"""
@@ -222,7 +243,7 @@ class ImpressaoCertificadosWidget(QWidget):
 
   <table class='grid'>
     <tr><th>Parâmetro</th><th>Resultado</th><th>Especificação</th><th>Método</th></tr>
-    <tr><td>Conformidade</td><td class='center'>ATENDE</td><td>Conforme Plano de Controle</td><td>Procedimento interno</td></tr>
+    {self._conformidade_html(row)}
   </table>
 
   <div class='foot'>
@@ -84,7 +84,7 @@ class ResultadosInspecaoWidget(QWidget):
         if i < 0: return
         pid = self.table.item(i,1).text() if self.table.item(i,1) else ""
         lote = self.table.item(i,3).text() if self.table.item(i,3) else ""
-        payload = self.services.certificate_payload_from_product_lot(pid, lote)
+        payload = self.services.issue_certificates([(pid, lote)])[0]
         html = self.cert.render_html(payload)
         if self.bus:
             self.bus.requestPrint.emit(html, "Certificado")
@@ -6,6 +6,16 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QColor, QPalette
 
+from ..utils.record_navigator import RecordNavigator
+
+# ordem das colunas usada por _fill
+PRODUCT_COLUMNS = (
+    "id", "nome", "codigo", "familia", "cor", "segmento", "reavaliar_dias", "extrusao_direto",
+    "localizacao", "fabricado_em", "lote_padrao", "valido_ate", "revisao_num", "revisao_data",
+    "historico", "descricao_pt", "descricao_en", "descricao_es",
+    "aplicacoes_pt", "aplicacoes_en", "aplicacoes_es", "ficha_seguranca",
+)
+
 
 def _h28(widget):
     """Ajusta altura padrão dos inputs para harmonia visual."""
@@ -27,15 +37,19 @@ class ProductsFormWidget(QFrame):
     Guia "Dados do Produto" com campos principais.
     Guia "Ficha de Segurança" para observações ou link.
     Busca com Localizar, navegação e CRUD simples.
+    A navegação usa RecordNavigator: páginas por keyset lidas em segundo
+    plano, sem carregar a lista de ids do catálogo inteiro.
     """
     def __init__(self, db):
         super().__init__()
         self.db = db
         self.setObjectName("Card")
 
-        self.ids: list[int] = []
         self.index: int = -1
         self._building = False
+        self.nav = RecordNavigator(
+            self.db, "produtos", PRODUCT_COLUMNS,
+            order=("COALESCE(codigo, '')", "COALESCE(nome, '')"), parent=self)
 
         root = QVBoxLayout(self)
         root.setContentsMargins(16, 16, 16, 16)
@@ -189,6 +203,8 @@ class ProductsFormWidget(QFrame):
         self.btn_first = QPushButton("≪"); self.btn_prev = QPushButton("‹"); self.btn_next = QPushButton("›"); self.btn_last = QPushButton("≫")
         for b in [self.btn_first, self.btn_prev, self.btn_next, self.btn_last]:
             b.setProperty("kind", "outline"); b.setFixedWidth(36); b.setMinimumHeight(28)
+        for b in [self.btn_prev, self.btn_next]:  # segurar o botão percorre o catálogo
+            b.setAutoRepeat(True); b.setAutoRepeatDelay(300); b.setAutoRepeatInterval(40)
         self.lbl_status = QLabel("Registros")
         nb.addWidget(self.btn_first); nb.addWidget(self.btn_prev)
         nb.addWidget(self.btn_next);  nb.addWidget(self.btn_last)
@@ -207,10 +223,13 @@ class ProductsFormWidget(QFrame):
         self.btn_del.clicked.connect(self._delete)
         self.btn_find.clicked.connect(self._search)
 
-        self.btn_first.clicked.connect(lambda: self._goto(0))
-        self.btn_prev.clicked.connect(lambda: self._goto(max(0, self.index - 1)))
-        self.btn_next.clicked.connect(lambda: self._goto(min(len(self.ids) - 1, self.index + 1)))
-        self.btn_last.clicked.connect(lambda: self._goto(len(self.ids) - 1))
+        self.btn_first.clicked.connect(self.nav.first)
+        self.btn_prev.clicked.connect(self.nav.prev)
+        self.btn_next.clicked.connect(self.nav.next)
+        self.btn_last.clicked.connect(self.nav.last)
+        self.nav.statusChanged.connect(self._update_status)
+        self.nav.recordReady.connect(self._fill)
+        self.destroyed.connect(lambda *_: self.nav.close())
 
         # Inicialização
         self._update_swatch(self.cb_cor.currentText())
@@ -242,28 +261,14 @@ class ProductsFormWidget(QFrame):
 
     # ---------- dados ----------
     def _reload_all(self, where: str = "", args: tuple = ()):
-        cur = self.db.conn.cursor()
-        sql = "SELECT id FROM produtos"
-        if where:
-            sql += " WHERE " + where
-        sql += " ORDER BY COALESCE(codigo, ''), COALESCE(nome, '')"
-        cur.execute(sql, args)
-        self.ids = [r[0] for r in cur.fetchall()]
-        self._goto(0 if self.ids else -1)
+        self.nav.reset(where, args)
 
     def _goto(self, idx: int):
-        if idx < 0 or idx >= len(self.ids):
-            self._clear()
-            self.index = -1
-            self._update_status()
-            return
-        self.index = idx
-        self._load(self.ids[idx])
-        self._update_status()
+        self.nav.goto(idx)
 
-    def _update_status(self):
-        total = len(self.ids)
-        pos = self.index + 1 if self.index >= 0 else 0
+    def _update_status(self, index: int, total: int):
+        self.index = index
+        pos = index + 1 if index >= 0 else 0
         self.lbl_status.setText(f"Registros  {pos} de {total}")
 
     def _clear(self):
@@ -293,16 +298,14 @@ class ProductsFormWidget(QFrame):
             return QDate.currentDate()
 
     def _load(self, pid: int):
-        self._building = True
         cur = self.db.conn.cursor()
-        cur.execute("""
-            SELECT id, nome, codigo, familia, cor, segmento, reavaliar_dias, extrusao_direto,
-                   localizacao, fabricado_em, lote_padrao, valido_ate, revisao_num, revisao_data,
-                   historico, descricao_pt, descricao_en, descricao_es,
-                   aplicacoes_pt, aplicacoes_en, aplicacoes_es, ficha_seguranca
-            FROM produtos WHERE id=?""", (pid,))
-        r = cur.fetchone()
+        cur.execute(f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM produtos WHERE id=?", (pid,))
+        self._fill(cur.fetchone())
+
+    def _fill(self, r):
+        """Preenche os widgets com uma linha na ordem de PRODUCT_COLUMNS (None limpa)."""
         self._clear()
+        self._building = True
         if r:
             self._current_id = r[0]
             self.ed_nome.setText(r[1] or "")
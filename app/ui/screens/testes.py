@@ -1,11 +1,14 @@
 # app/ui/screens/testes.py
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QComboBox,
+    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem,
     QHBoxLayout, QPushButton, QLabel, QSizePolicy, QLineEdit, QMessageBox
 )
 from PyQt6.QtGui import QFont
 
+from ...data.migrations import ensure_schema
+from ..utils.grid_delegates import ComboDelegate
+
 
 TIPOS_TESTE = [
     "Plaqueta Forno",
@@ -19,13 +22,13 @@ TIPOS_TESTE = [
 class TestesQualidadeWidget(QWidget):
     """
     Tela minimalista: tabela com 3 colunas + rodapé de navegação e botão Gravar.
-    Integra com a tabela SQLite 'testes_qualidade' (cria se não existir).
+    Integra com a tabela SQLite 'testes_qualidade' (criada pelas migrações do banco).
     Colunas esperadas: codigo (PK), tipo, descricao.
     """
     def __init__(self, db, parent=None):
         super().__init__(parent)
         self.db = db
-        self._ensure_table()
+        ensure_schema(self.db.conn)
 
         root = QVBoxLayout(self)
         root.setContentsMargins(8, 8, 8, 8)
@@ -40,6 +43,7 @@ class TestesQualidadeWidget(QWidget):
         self.table.setShowGrid(True)
         self.table.setAlternatingRowColors(False)
         self.table.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.table.setItemDelegateForColumn(1, ComboDelegate(TIPOS_TESTE, self.table))
 
         # Colunas: largura confortável; usuário pode redimensionar
         header = self.table.horizontalHeader()
@@ -106,20 +110,6 @@ class TestesQualidadeWidget(QWidget):
         self.btn_save.clicked.connect(self._save_all)
 
     # -------------------- DB helpers --------------------
-    def _ensure_table(self):
-        try:
-            cur = self.db.conn.cursor()
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS testes_qualidade (
-                    codigo    TEXT PRIMARY KEY,
-                    tipo      TEXT,
-                    descricao TEXT
-                )
-            """)
-            self.db.conn.commit()
-        except Exception:
-            pass
-
     def _load_rows(self):
         self.table.setRowCount(0)
         rows = []
@@ -157,13 +147,14 @@ class TestesQualidadeWidget(QWidget):
         )
         self.table.setItem(row, 0, item_codigo)
 
-        # Tipo (combo)
-        cmb = QComboBox()
-        cmb.addItems(TIPOS_TESTE)
-        idx = cmb.findText(tipo)
-        cmb.setCurrentIndex(idx if idx >= 0 else 0)
-        cmb.setFocusPolicy(Qt.FocusPolicy.NoFocus)
-        self.table.setCellWidget(row, 1, cmb)
+        # Tipo (texto; a combo só existe durante a edição, via ComboDelegate)
+        item_tipo = QTableWidgetItem(tipo if tipo in TIPOS_TESTE else TIPOS_TESTE[0])
+        item_tipo.setFlags(
+            Qt.ItemFlag.ItemIsEnabled |
+            Qt.ItemFlag.ItemIsSelectable |
+            Qt.ItemFlag.ItemIsEditable
+        )
+        self.table.setItem(row, 1, item_tipo)
 
         # Descrição (editável)
         item_desc = QTableWidgetItem(descricao)
@@ -212,13 +203,10 @@ class TestesQualidadeWidget(QWidget):
         try:
             cur = self.db.conn.cursor()
             cur.execute("BEGIN")
-            # opcional: garantir tabela existente
-            self._ensure_table()
 
             for row in range(self.table.rowCount()):
                 codigo = (self.table.item(row, 0).text() if self.table.item(row, 0) else "").strip()
-                tipo_w = self.table.cellWidget(row, 1)
-                tipo = tipo_w.currentText().strip() if isinstance(tipo_w, QComboBox) else ""
+                tipo = (self.table.item(row, 1).text() if self.table.item(row, 1) else "").strip()
                 descricao = (self.table.item(row, 2).text() if self.table.item(row, 2) else "").strip()
 
                 if not codigo:
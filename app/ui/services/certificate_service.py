@@ -17,6 +17,8 @@ class CertificateService:
                 "</tr>"
             )
         tbody = "".join(body_rows) if body_rows else "<tr><td colspan='5' style='text-align:center;color:#999'>Sem dados</td></tr>"
+        laudo = (f"<div class='muted'>Nº Laudo: <b>{payload['laudo']}</b> &nbsp; "
+                 f"Emissão: <b>{payload.get('emissao','')}</b></div>") if payload.get("laudo") else ""
         html = (
             "<html><head><meta charset='utf-8'/>"
             "<style>body{font-family:Arial,Helvetica,sans-serif;font-size:11pt}"
@@ -26,6 +28,7 @@ class CertificateService:
             "th{background:#f4f5f7;text-align:left}</style>"
             "</head><body>"
             "<h1>Certificado de Qualidade</h1>"
+            f"{laudo}"
             f"<div class='muted'>Cliente: <b>{payload.get('cliente','')}</b></div>"
             f"<div class='muted'>Produto: <b>{payload.get('produto_desc','')}</b></div>"
             f"<div class='muted'>Lote: <b>{payload.get('lote','')}</b></div><br/>"
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from ..core.app_context import AppContext
 from ..core.event_bus import EventBus
 from ...data.db import Database
@@ -6,12 +7,14 @@ from ...data.db import Database
 class DataService:
     """
     Camada única de leitura. Tenta várias consultas (fallback) para acomodar
-    diferenças de nomes de coluna/tabela sem quebrar a UI.
+    diferenças de nomes de coluna/tabela sem quebrar a UI. A única escrita é
+    o registro dos certificados emitidos (issue_certificates).
     """
-    def __init__(self, db: Database, ctx: AppContext, bus: EventBus):
+    def __init__(self, db: Database, ctx: AppContext, bus: EventBus, seq=None):
         self.db = db
         self.ctx = ctx
         self.bus = bus
+        self.seq = seq  # SequenceService: nº de laudo dos certificados emitidos
 
     # ---------- helpers ----------
     def _select(self, sql: str, params: Tuple = ()) -> List[Tuple]:
@@ -144,47 +147,117 @@ class DataService:
                 return []
 
     def certificate_payload_from_product_lot(self, product_id: str, lote: str) -> Dict[str, Any]:
-        # Produto
-        prod = self._try_row([
-            "SELECT descricao FROM produtos WHERE id=?",
-            "SELECT descricao_pt FROM produtos WHERE id=?",
-            "SELECT nome FROM produtos WHERE id=?",
-        ], (product_id,))
-        produto_desc = (prod[0] if prod else str(product_id))
-
-        # Cliente (última inspeção do lote)
-        client = self._try_row([
-            "SELECT c.nome FROM inspecoes i LEFT JOIN clientes c ON c.id=i.cliente_id WHERE i.produto_id=? AND i.lote=? ORDER BY i.data_emissao DESC LIMIT 1",
-            "SELECT cliente FROM certificados WHERE produto_id=? AND lote=? ORDER BY emissao DESC LIMIT 1",
-        ], (product_id, lote))
-        cliente_nome = client[0] if client else ""
-
-        # Linhas de análise (se existirem)
-        linhas: List[Dict[str, Any]] = []
-        cur = self.db.conn.cursor()
-        tried = False
+        return self.certificate_payloads([(product_id, lote)])[0]
+
+    def issue_certificates(self, pairs: Iterable[Tuple[Any, Any]]) -> List[Dict[str, Any]]:
+        """
+        Emite certificados: payloads com nº de laudo tirado do SequenceService
+        (um bloco para o lote inteiro) e registrados em cert_consulta. Sem
+        SequenceService devolve só os payloads, sem número.
+        """
+        payloads = self.certificate_payloads(pairs)
+        if not payloads or self.seq is None:
+            return payloads
+        numeros = self.seq.take("laudo", len(payloads))
+        emissao = date.today().isoformat()
+        for p, n in zip(payloads, numeros):
+            p["laudo"], p["emissao"] = str(n), emissao
+        conn = self.db.conn
+        try:
+            conn.executemany(
+                "INSERT INTO cert_consulta (laudo, emissao, codigo, cliente, lote) VALUES (?,?,?,?,?)",
+                [(p["laudo"], emissao, str(p["produto_id"]), p["cliente"], p["lote"]) for p in payloads])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            for n in numeros:
+                self.seq.release("laudo", n, "falha ao registrar")
+            raise
+        return payloads
+
+    def certificate_payloads(self, pairs: Iterable[Tuple[Any, Any]]) -> List[Dict[str, Any]]:
+        """
+        Payloads de vários (produto_id, lote) de uma vez, na ordem recebida.
+        Os pares vão para uma tabela temporária e produto, cliente (última
+        inspeção do lote) e resultados saem cada um de um JOIN com ela:
+        emitir 300 certificados custa as mesmas poucas consultas que um só.
+        """
+        pairs = [(pid, lote) for pid, lote in pairs]
+        if not pairs:
+            return []
+        conn = self.db.conn
+        in_tx = conn.in_transaction
+        cur = conn.cursor()
+        descs: Dict[int, Any] = {}
+        clientes: Dict[int, Any] = {}
+        linhas: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(len(pairs))}
         try:
-            tried = True
-            cur.execute("""
-                SELECT a.descricao_pt, r.metodo, r.minimo, r.maximo, r.especificacao
-                  FROM resultados r
-                  LEFT JOIN analises a ON a.id=r.analise_id
-                 WHERE r.produto_id=? AND r.lote=?
-                 ORDER BY a.descricao_pt
-            """, (product_id, lote))
-            for analise, metodo, minimo, maximo, spec in cur.fetchall():
-                linhas.append({
-                    "analise": analise, "metodo": metodo,
-                    "min": minimo, "max": maximo, "spec": spec
-                })
+            cur.execute("CREATE TEMP TABLE IF NOT EXISTS _cert_pairs (seq INTEGER PRIMARY KEY, produto_id NUMERIC, lote TEXT)")
+            cur.execute("DELETE FROM temp._cert_pairs")
+            cur.executemany("INSERT INTO temp._cert_pairs (seq, produto_id, lote) VALUES (?,?,?)",
+                            [(i, pid, lote) for i, (pid, lote) in enumerate(pairs)])
+
+            # Produto (1ª variante de coluna que existir)
+            for col in ("descricao", "descricao_pt", "nome"):
+                try:
+                    cur.execute(f"SELECT t.seq, p.{col} FROM temp._cert_pairs t JOIN produtos p ON p.id=t.produto_id")
+                    descs = dict(cur.fetchall())
+                    break
+                except Exception:
+                    continue
+
+            # Cliente: MAX() no SQLite devolve as outras colunas da linha do máximo
+            for q in (
+                "SELECT t.seq, c.nome, MAX(i.data_emissao) FROM temp._cert_pairs t"
+                " JOIN inspecoes i ON i.produto_id=t.produto_id AND i.lote=t.lote"
+                " LEFT JOIN clientes c ON c.id=i.cliente_id GROUP BY t.seq",
+                "SELECT t.seq, ce.cliente, MAX(ce.emissao) FROM temp._cert_pairs t"
+                " JOIN certificados ce ON ce.produto_id=t.produto_id AND ce.lote=t.lote GROUP BY t.seq",
+            ):
+                if len(clientes) == len(pairs):
+                    break
+                try:
+                    cur.execute(q)
+                    for seq, nome, _ in cur.fetchall():
+                        clientes.setdefault(seq, nome)
+                except Exception:
+                    continue
+
+            # Linhas de análise (se existirem), agrupadas numa passada
+            try:
+                cur.execute("""
+                    SELECT t.seq, a.descricao_pt, r.metodo, r.minimo, r.maximo, r.especificacao
+                      FROM temp._cert_pairs t
+                      JOIN resultados r ON r.produto_id=t.produto_id AND r.lote=t.lote
+                      LEFT JOIN analises a ON a.id=r.analise_id
+                     ORDER BY t.seq, a.descricao_pt
+                """)
+                for seq, analise, metodo, minimo, maximo, spec in cur.fetchall():
+                    linhas[seq].append({
+                        "analise": analise, "metodo": metodo,
+                        "min": minimo, "max": maximo, "spec": spec
+                    })
+            except Exception:
+                pass
+
+            cur.execute("DELETE FROM temp._cert_pairs")
         except Exception:
-            if not tried:
-                pass  # ignora
-
-        return {
-            "produto_id": product_id,
-            "produto_desc": produto_desc,
-            "cliente": cliente_nome,
-            "lote": lote,
-            "linhas": linhas,
-        }
+            pass
+        finally:
+            # a escrita na tabela temporária abre transação: solta a leitura do banco
+            if not in_tx and conn.in_transaction:
+                try:
+                    conn.commit()
+                except Exception:
+                    pass
+
+        out: List[Dict[str, Any]] = []
+        for i, (pid, lote) in enumerate(pairs):
+            out.append({
+                "produto_id": pid,
+                "produto_desc": descs[i] if i in descs else str(pid),
+                "cliente": clientes.get(i) or "",
+                "lote": lote,
+                "linhas": linhas[i],
+            })
+        return out
@@ -0,0 +1,97 @@
+"""
+Agenda da manutenção do banco (app/data/maintenance.py) dentro do app.
+
+A cada minuto confere: está numa janela configurada (config.MAINT_WINDOWS),
+ninguém mexe no teclado/mouse há MAINT_IDLE_MIN minutos e há tarefa
+vencida? Então roda as tarefas numa thread, uma de cada vez. Se o usuário
+voltar, as que ainda não começaram ficam para a próxima janela; ao fechar
+o programa, o backup em andamento é interrompido entre passos.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from PyQt6.QtCore import QEvent, QObject, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+from ...data.maintenance import Maintenance, in_window, parse_windows
+
+_INPUT = {
+    QEvent.Type.KeyPress, QEvent.Type.MouseButtonPress, QEvent.Type.MouseMove,
+    QEvent.Type.Wheel, QEvent.Type.TouchBegin,
+}
+
+
+class MaintenanceService(QObject):
+    finished = pyqtSignal(object)  # {tarefa: resultado}
+
+    def __init__(self, db_path, windows: str = "", idle_min: int = 5,
+                 backup_dir: Optional[str] = None, keep: int = 7,
+                 check_ms: int = 60_000, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.maint = Maintenance(Path(db_path), Path(backup_dir) if backup_dir else None,
+                                 keep=keep, log=lambda *_: None)
+        self.windows = parse_windows(windows)
+        self.idle_s = max(0, int(idle_min)) * 60
+        self._last_input = time.monotonic()
+        self._input_gen = 0                 # muda a cada entrada do usuário
+        self._stop = threading.Event()      # fechar o programa
+        self._thread: Optional[threading.Thread] = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1000, int(check_ms)))
+        self._timer.timeout.connect(self._tick)
+
+    def start(self) -> None:
+        app = QApplication.instance()
+        if app is not None:
+            app.installEventFilter(self)
+        self._timer.start()
+
+    def stop(self, wait_s: float = 2.0) -> None:
+        self._timer.stop()
+        self._stop.set()
+        app = QApplication.instance()
+        if app is not None:
+            app.removeEventFilter(self)
+        if self._thread is not None:
+            self._thread.join(wait_s)
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def eventFilter(self, obj, ev):
+        if ev.type() in _INPUT:
+            self._last_input = time.monotonic()
+            self._input_gen += 1
+        return False
+
+    def _tick(self) -> None:
+        if self.running() or self._stop.is_set():
+            return
+        if time.monotonic() - self._last_input < self.idle_s or not in_window(self.windows):
+            return
+        self.run_now()
+
+    def run_now(self, tasks=None) -> None:
+        """Dispara já (sem esperar janela/ociosidade); tarefas None = as vencidas."""
+        if self.running():
+            return
+        gen = self._input_gen
+
+        def work():
+            out = {}
+            try:
+                for task in (self.maint.due() if tasks is None else tasks):
+                    # usuário voltou: o resto fica para depois
+                    if self._stop.is_set() or (tasks is None and self._input_gen != gen):
+                        break
+                    out.update(self.maint.run([task], self._stop))
+            except Exception as e:
+                out["erro"] = str(e)
+            if out:
+                self.finished.emit(out)
+
+        self._thread = threading.Thread(target=work, name="manutencao", daemon=True)
+        self._thread.start()
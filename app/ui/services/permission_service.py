@@ -0,0 +1,182 @@
+"""
+Permissões efetivas do usuário logado, compiladas num inteiro (1 bit por
+item de PERMS).
+
+Fontes, na ordem em que se sobrepõem:
+  papel "admin"     -> todos os bits
+  TBL_TipoAcesso    -> perfil por usuario_id (nomes antigos de coluna)
+  acessos           -> marcações da tela Acessos, por login (ou usuario_id
+                       nas bases com a ponte scripts/setup_acessos_bridge.py)
+
+O layout das tabelas (PRAGMA) é lido uma vez por banco e versão do esquema
+(PRAGMA schema_version muda a cada DDL, inclusive de outra estação); o SQL
+roda a cada login e quando a tela Acessos avisa pelo bus
+(permissionsSaved). Depois disso `can()` é um teste de bit.
+"""
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.app_context import AppContext
+from ..core.event_bus import EventBus
+from ...data.db import PERMS
+
+PERM_BITS: Dict[str, int] = {p: 1 << i for i, p in enumerate(PERMS)}
+ALL_PERMS = (1 << len(PERMS)) - 1
+
+# nomes de coluna usados pelas telas/tabelas antigas -> nome em PERMS
+ALIASES = {
+    "cad_funcionarios": "cad_func",
+    "definir_acessos": "def_acessos",
+    "analise_por_produto": "cad_analise_prod",
+    "analise_por_cliente": "cad_analise_cli",
+    "imprimir_rotulos": "imp_rotulos",
+    "emitir_cert": "emitir_certificados",
+    "imprimir_cert": "imprimir_certificados",
+}
+
+# (tabela, colunas-chave aceitas em ordem de preferência)
+SOURCES = (
+    ("TBL_TipoAcesso", ("usuario_id",)),
+    ("acessos", ("login", "usuario_id")),
+)
+
+_Layout = Optional[Tuple[str, List[int], str]]
+
+# {(arquivo do banco, tabela): (schema_version, (sql, [bit por coluna lida], coluna-chave) | None)}
+_LAYOUT: Dict[Tuple[str, str], Tuple[int, _Layout]] = {}
+
+
+def _db_key(conn: sqlite3.Connection) -> str:
+    try:
+        return conn.execute("PRAGMA database_list").fetchone()[2] or f":memory:{id(conn)}"
+    except Exception:
+        return f"?{id(conn)}"
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    try:
+        return [r[1] for r in conn.execute(f'PRAGMA table_info("{table}")')]
+    except Exception:
+        return []
+
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    try:
+        return conn.execute("PRAGMA schema_version").fetchone()[0]
+    except Exception:
+        return -1
+
+
+def _layout(conn: sqlite3.Connection, table: str, keys, version: int) -> _Layout:
+    k = (_db_key(conn), table)
+    if k in _LAYOUT and _LAYOUT[k][0] == version:
+        return _LAYOUT[k][1]
+    cols = table_columns(conn, table)
+    key = next((c for c in keys if c in cols), None)
+    read = [(c, PERM_BITS[ALIASES.get(c, c)]) for c in cols if ALIASES.get(c, c) in PERM_BITS]
+    lay = None
+    if key and read:
+        nocase = " COLLATE NOCASE" if key == "login" else ""
+        cols_sql = ", ".join(f'"{c}"' for c, _ in read)
+        sql = f'SELECT {cols_sql} FROM "{table}" WHERE "{key}" = ?{nocase} LIMIT 1'
+        lay = (sql, [b for _, b in read], key)
+    _LAYOUT[k] = (version, lay)
+    return lay
+
+
+def compile_mask(conn: sqlite3.Connection, user: Dict[str, Any]) -> int:
+    """Máscara efetiva do usuário (no máximo uma consulta por fonte)."""
+    if (user.get("papel") or "").lower() == "admin":
+        return ALL_PERMS
+    mask = 0
+    version = _schema_version(conn)
+    for table, keys in SOURCES:
+        lay = _layout(conn, table, keys, version)
+        if not lay:
+            continue
+        sql, bits, key = lay
+        arg = user.get("login") if key == "login" else user.get("id")
+        if arg is None:
+            continue
+        try:
+            row = conn.execute(sql, (arg,)).fetchone()
+        except sqlite3.Error:
+            continue
+        if not row:
+            continue
+        # colunas presentes na fonte substituem o que veio antes
+        covered = set_ = 0
+        for v, b in zip(row, bits):
+            covered |= b
+            if v and str(v).strip() not in ("0", ""):
+                set_ |= b
+        mask = (mask & ~covered) | set_
+    return mask
+
+
+def mask_to_flags(mask: int) -> Dict[str, bool]:
+    return {p: bool(mask & b) for p, b in PERM_BITS.items()}
+
+
+class PermissionService:
+    """Guarda a máscara do usuário logado; checagens não tocam no banco."""
+    def __init__(self, db, ctx: AppContext, bus: EventBus):
+        self.db = db
+        self.ctx = ctx
+        self.bus = bus
+        self._masks: Dict[Tuple[str, Any], int] = {}  # (login, id) -> máscara
+        self._mask = 0
+        bus.permissionsSaved.connect(self.invalidate)
+
+    def _user(self) -> Optional[Dict[str, Any]]:
+        return self.ctx.current_user
+
+    @staticmethod
+    def _ident(user: Dict[str, Any]) -> Tuple[str, Any]:
+        return ((user.get("login") or "").lower(), user.get("id"))
+
+    @staticmethod
+    def _matches(ident: Tuple[str, Any], who) -> bool:
+        """`who` é o login (tela Acessos) ou o usuario_id (telas antigas)."""
+        return who is None or str(who).lower() in (ident[0], str(ident[1]))
+
+    # ---------- sessão ----------
+    def login(self, user: Dict[str, Any]) -> int:
+        # sempre do banco: o acesso pode ter mudado em outra estação
+        ident = self._ident(user)
+        self._masks[ident] = compile_mask(self.db.conn, user)
+        self._mask = user["perm_mask"] = self._masks[ident]
+        return self._mask
+
+    def logout(self) -> None:
+        self._masks.clear()
+        self._mask = 0
+
+    def invalidate(self, who=None) -> None:
+        """Slot de bus.permissionsSaved(login ou usuario_id); None invalida todos."""
+        for ident in [i for i in self._masks if self._matches(i, who)]:
+            del self._masks[ident]
+        user = self._user()
+        if user and self._matches(self._ident(user), who):
+            self.login(user)
+
+    # ---------- checagens ----------
+    def can(self, perm: str) -> bool:
+        return bool(self._mask & PERM_BITS.get(perm, 0))
+
+    def can_all(self, *perms: str) -> bool:
+        need = 0
+        for p in perms:
+            need |= PERM_BITS.get(p, 0)
+        return self._mask & need == need
+
+    def is_admin(self) -> bool:
+        user = self._user()
+        return bool(user) and (user.get("papel") or "").lower() == "admin"
+
+    @property
+    def mask(self) -> int:
+        return self._mask
+
+    def flags(self) -> Dict[str, bool]:
+        return mask_to_flags(self._mask)
@@ -0,0 +1,162 @@
+"""
+Numeração única entre estações (nº de laudo/certificado) em TBL_Contador.
+
+Ler o valor, somar e gravar de volta no arquivo compartilhado serializa
+todo mundo e, com duas máquinas ao mesmo tempo, pode repetir número. Aqui
+cada processo reserva um bloco numa única escrita curta:
+
+  BEGIN IMMEDIATE
+  UPDATE TBL_Contador SET valor = valor + n WHERE chave = ? RETURNING valor
+  COMMIT
+
+e entrega os números do bloco da memória; emitir um lote de certificados
+não pega o lock de escrita por certificado. Número que não vira documento
+(cancelado, ou sobra do bloco ao fechar o programa) fica registrado em
+TBL_Contador_Lacuna, para a auditoria saber por que a sequência pulou.
+"""
+import os
+import socket
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ...data.db import Database
+
+# valor inicial de uma chave nova: maior número já usado em qualquer das consultas
+# (tabela/coluna ausente é pulada; tabela vazia conta como 0)
+SEEDS: Dict[str, Tuple[str, ...]] = {
+    "laudo": (
+        "SELECT MAX(CAST(laudo AS INTEGER)) FROM cert_consulta",
+        "SELECT MAX(CAST(laudo AS INTEGER)) FROM certificados",
+        "SELECT MAX(CAST(numero AS INTEGER)) FROM certificados",
+        "SELECT MAX(CAST(num_laudo AS INTEGER)) FROM certificados",
+    ),
+}
+
+_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+class SequenceService:
+    def __init__(self, db: Database, block: int = 20, timeout: float = 10.0):
+        self.db = db
+        self.block = max(1, int(block))
+        self.timeout = timeout
+        self.station = f"{socket.gethostname()}:{os.getpid()}"
+        self._free: Dict[str, List[Tuple[int, int]]] = {}  # chave -> faixas [início, fim] livres
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # ---------------- conexão ----------------
+    def _writer(self) -> Tuple[sqlite3.Connection, bool]:
+        """(conexão, própria?). Conexão própria em autocommit: o BEGIN é nosso."""
+        path = getattr(self.db, "db_path", None)
+        if not path:
+            return self.db.conn, False
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(path), timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+        return self._conn, True
+
+    def _write(self, fn):
+        conn, own = self._writer()
+        if not own:  # sem arquivo (ex.: :memory:): usa a transação da conexão principal
+            try:
+                out = fn(conn)
+                conn.commit()
+                return out
+            except Exception:
+                conn.rollback()
+                raise
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            out = fn(conn)
+            conn.execute("COMMIT")
+            return out
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------------- reserva ----------------
+    def _seed(self, conn, chave: str) -> int:
+        """Maior número já usado entre todas as consultas da chave.
+
+        Chave sem consultas começa em 0. Com consultas e nenhuma legível, falha:
+        começar do zero repetiria números já emitidos.
+        """
+        queries = SEEDS.get(chave, ())
+        best, read = 0, False
+        for q in queries:
+            try:
+                row = conn.execute(q).fetchone()
+            except sqlite3.Error:
+                continue
+            read = True
+            if row and row[0] is not None:
+                best = max(best, int(row[0]))
+        if queries and not read:
+            raise RuntimeError(f"Não foi possível ler o último número de '{chave}' para iniciar a sequência.")
+        return best
+
+    def _reserve(self, chave: str, n: int) -> Tuple[int, int]:
+        def run(conn):
+            conn.execute(
+                "INSERT INTO TBL_Contador (chave, valor) SELECT ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM TBL_Contador WHERE chave = ?)",
+                (chave, self._seed(conn, chave), chave))
+            if _RETURNING:
+                row = conn.execute("UPDATE TBL_Contador SET valor = valor + ? WHERE chave = ? RETURNING valor",
+                                   (n, chave)).fetchone()
+            else:
+                conn.execute("UPDATE TBL_Contador SET valor = valor + ? WHERE chave = ?", (n, chave))
+                row = conn.execute("SELECT valor FROM TBL_Contador WHERE chave = ?", (chave,)).fetchone()
+            return int(row[0])
+        top = self._write(run)
+        return top - n + 1, top
+
+    def take(self, chave: str, n: int = 1) -> List[int]:
+        """n números da chave, crescentes (podem vir de blocos diferentes)."""
+        out: List[int] = []
+        with self._lock:
+            free = self._free.setdefault(chave, [])
+            while len(out) < n:
+                if not free:
+                    free.append(self._reserve(chave, max(self.block, n - len(out))))
+                lo, hi = free[0]
+                k = min(hi - lo + 1, n - len(out))
+                out.extend(range(lo, lo + k))
+                if lo + k > hi:
+                    free.pop(0)
+                else:
+                    free[0] = (lo + k, hi)
+        return out
+
+    def next(self, chave: str) -> int:
+        return self.take(chave, 1)[0]
+
+    # ---------------- lacunas ----------------
+    def _record_gaps(self, chave: str, ranges: List[Tuple[int, int]], motivo: str) -> None:
+        if not ranges:
+            return
+        self._write(lambda conn: conn.executemany(
+            "INSERT INTO TBL_Contador_Lacuna (chave, inicio, fim, motivo, estacao) VALUES (?,?,?,?,?)",
+            [(chave, lo, hi, motivo, self.station) for lo, hi in ranges]))
+
+    def release(self, chave: str, numero: int, motivo: str = "cancelado") -> None:
+        """Número entregue que não virou documento: fica registrado como lacuna."""
+        self._record_gaps(chave, [(int(numero), int(numero))], motivo)
+
+    def close(self) -> None:
+        """Registra as sobras dos blocos como lacuna e fecha a conexão própria."""
+        with self._lock:
+            free, self._free = self._free, {}
+        for chave, ranges in free.items():
+            try:
+                self._record_gaps(chave, ranges, "sobra de bloco")
+            except Exception:
+                pass
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
@@ -0,0 +1,144 @@
+# app/ui/utils/grid_delegates.py
+"""
+Delegates das grades de análise (no lugar de setCellWidget por linha).
+
+Com um QCheckBox/QComboBox real em cada célula, abrir uma grade de 300
+linhas cria centenas de widgets e a rolagem pesa. Aqui o valor mora no
+item (CheckStateRole / texto) e o delegate só desenha e, ao editar, cria
+um único editor temporário.
+
+  CheckBoxDelegate  : caixa centralizada; clique na célula ou espaço alterna
+  ComboDelegate     : texto na célula, QComboBox só durante a edição
+  SpecRangeDelegate : mínimo/máximo; aceita qualquer texto ("≤ 0,02",
+                      "5%", "45 a 55", "Isento"), lido como limite por
+                      conformance.parse_limit. Texto sem número aparece em
+                      itálico cinza; mínimo > máximo aparece em vermelho
+"""
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from PyQt6.QtCore import QEvent, QRect, Qt
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import (
+    QApplication, QComboBox, QLineEdit, QStyle, QStyledItemDelegate,
+    QStyleOptionButton, QStyleOptionViewItem, QTableWidgetItem
+)
+
+from ...data.conformance import parse_limit
+
+
+def check_item(checked: bool = False) -> QTableWidgetItem:
+    """Item marcável sem texto, para colunas com CheckBoxDelegate."""
+    it = QTableWidgetItem()
+    it.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsUserCheckable)
+    it.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+    return it
+
+
+def is_checked(item: Optional[QTableWidgetItem]) -> bool:
+    return item is not None and item.checkState() == Qt.CheckState.Checked
+
+
+def parse_number(text) -> Optional[float]:
+    """Valor do limite ('3,4', '≤ 0,02', '1.000,5', '5%') como a conformidade lê; sem número -> None."""
+    return parse_limit(text)[0]
+
+
+class CheckBoxDelegate(QStyledItemDelegate):
+    def _indicator_rect(self, option, widget) -> QRect:
+        style = widget.style() if widget else QApplication.style()
+        r = style.subElementRect(QStyle.SubElement.SE_CheckBoxIndicator, QStyleOptionButton(), widget)
+        return QRect(option.rect.center().x() - r.width() // 2,
+                     option.rect.center().y() - r.height() // 2, r.width(), r.height())
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        widget = opt.widget
+        style = widget.style() if widget else QApplication.style()
+        # fundo/seleção pelo estilo, sem o indicador padrão (à esquerda)
+        opt.features &= ~QStyleOptionViewItem.ViewItemFeature.HasCheckIndicator
+        opt.text = ""
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, widget)
+
+        btn = QStyleOptionButton()
+        btn.rect = self._indicator_rect(option, widget)
+        btn.state = QStyle.StateFlag.State_Enabled
+        checked = index.data(Qt.ItemDataRole.CheckStateRole) in (Qt.CheckState.Checked, 2)
+        btn.state |= QStyle.StateFlag.State_On if checked else QStyle.StateFlag.State_Off
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_IndicatorCheckBox, btn, painter, widget)
+
+    def editorEvent(self, event, model, option, index):
+        flags = index.flags()
+        if not (flags & Qt.ItemFlag.ItemIsUserCheckable and flags & Qt.ItemFlag.ItemIsEnabled):
+            return False
+        t = event.type()
+        if t in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonDblClick):
+            return event.button() == Qt.MouseButton.LeftButton  # consome; alterna no release
+        if t == QEvent.Type.MouseButtonRelease:
+            if event.button() != Qt.MouseButton.LeftButton:
+                return False
+        elif t == QEvent.Type.KeyPress:
+            if event.key() not in (Qt.Key.Key_Space, Qt.Key.Key_Select):
+                return False
+        else:
+            return False
+        state = index.data(Qt.ItemDataRole.CheckStateRole)
+        new = Qt.CheckState.Unchecked if state in (Qt.CheckState.Checked, 2) else Qt.CheckState.Checked
+        return model.setData(index, new, Qt.ItemDataRole.CheckStateRole)
+
+
+class ComboDelegate(QStyledItemDelegate):
+    def __init__(self, items: Sequence[str], parent=None):
+        super().__init__(parent)
+        self.items = list(items)
+
+    def createEditor(self, parent, option, index):
+        cmb = QComboBox(parent)
+        cmb.addItems(self.items)
+        # escolheu na lista: grava e fecha sem precisar sair da célula
+        cmb.activated.connect(lambda _i, e=cmb: (self.commitData.emit(e), self.closeEditor.emit(e)))
+        return cmb
+
+    def setEditorData(self, editor, index):
+        i = editor.findText(str(index.data() or ""))
+        editor.setCurrentIndex(i if i >= 0 else 0)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText())
+
+
+class SpecRangeDelegate(QStyledItemDelegate):
+    def __init__(self, min_col: int, max_col: int, parent=None):
+        super().__init__(parent)
+        self.min_col = min_col
+        self.max_col = max_col
+
+    def createEditor(self, parent, option, index):
+        ed = QLineEdit(parent)  # sem validador: o limite é texto livre
+        ed.setFrame(False)
+        return ed
+
+    def setEditorData(self, editor, index):
+        editor.setText(str(index.data() or ""))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.text().strip())
+        if editor.parentWidget() is not None:  # a outra ponta da faixa também muda de cor
+            editor.parentWidget().update()
+
+    def _range_ok(self, index) -> bool:
+        lo = parse_number(index.sibling(index.row(), self.min_col).data())
+        hi = parse_number(index.sibling(index.row(), self.max_col).data())
+        return lo is None or hi is None or lo <= hi
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        text = str(index.data() or "").strip()
+        if text and parse_number(text) is None:  # "Isento", "OK": vale, mas não entra na faixa
+            option.font.setItalic(True)
+            option.palette.setColor(option.palette.ColorRole.Text, QColor("#757575"))
+        if not self._range_ok(index):
+            option.palette.setColor(option.palette.ColorRole.Text, QColor("#c62828"))
+            option.palette.setColor(option.palette.ColorRole.HighlightedText, QColor("#ffcdd2"))
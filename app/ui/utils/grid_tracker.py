@@ -0,0 +1,120 @@
+# app/ui/utils/grid_tracker.py
+"""
+Estado incremental de uma grade que cresce sozinha (linha vazia no fim).
+
+Antes, cada itemChanged recontava a coluna inteira e rodava
+resizeRowsToContents + soma de alturas: digitar numa grade de 200 linhas
+ficava quadrático. Aqui:
+
+  - `filled` (linhas com a coluna-chave preenchida) muda só pela diferença
+    da célula alterada e pelas linhas inseridas/removidas no modelo;
+  - a altura total vem de verticalHeader().length(), que o Qt já mantém;
+  - o ajuste de altura junta as linhas alteradas e roda uma vez por volta
+    do event loop (QTimer de 0 ms).
+
+Carga em lote com signals bloqueados: chamar `reset()` no fim.
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem
+
+
+class GridStateTracker(QObject):
+    def __init__(self, table: QTableWidget, key_col: int, min_height: int = 160,
+                 on_count: Optional[Callable[[int], None]] = None, parent: Optional[QObject] = None):
+        super().__init__(parent or table)
+        self.table = table
+        self.key_col = key_col
+        self.min_height = min_height
+        self.on_count = on_count
+        self.filled = 0
+        self._flags: list[bool] = []
+        self._dirty: Optional[set[int]] = set()  # None = todas as linhas
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._flush)
+
+        model = table.model()
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        model.modelReset.connect(self.reset)
+        table.itemChanged.connect(self._on_item_changed)
+        self.reset()
+
+    # ---------------- contagem ----------------
+    def _is_filled(self, row: int) -> bool:
+        it = self.table.item(row, self.key_col)
+        return bool(it and it.text().strip())
+
+    def reset(self) -> None:
+        """Recalcula do zero (uma passada) e agenda ajuste de todas as linhas."""
+        try:
+            self._flags = [self._is_filled(r) for r in range(self.table.rowCount())]
+        except RuntimeError:  # modelReset na destruição da tabela
+            return
+        self._set_count(sum(self._flags), force=True)
+        self.schedule_resize()
+
+    def _set_count(self, n: int, force: bool = False) -> None:
+        if n != self.filled or force:
+            self.filled = n
+            if self.on_count:
+                self.on_count(n)
+
+    def is_filled(self, row: int) -> bool:
+        return 0 <= row < len(self._flags) and self._flags[row]
+
+    def _on_item_changed(self, item: QTableWidgetItem) -> None:
+        row = item.row()
+        if not 0 <= row < len(self._flags):
+            return
+        if item.column() == self.key_col:
+            now = bool(item.text().strip())
+            if now != self._flags[row]:
+                self._flags[row] = now
+                self._set_count(self.filled + (1 if now else -1))
+        self.schedule_resize(row)
+
+    def _on_rows_inserted(self, _parent, first: int, last: int) -> None:
+        new = [self._is_filled(r) for r in range(first, last + 1)]
+        self._flags[first:first] = new
+        if any(new):
+            self._set_count(self.filled + sum(new))
+        self.schedule_resize(*range(first, last + 1))
+
+    def _on_rows_removed(self, _parent, first: int, last: int) -> None:
+        gone = self._flags[first:last + 1]
+        del self._flags[first:last + 1]
+        self._set_count(self.filled - sum(gone))
+        self._timer.start()  # as outras linhas não mudam de altura, só o total
+
+    # ---------------- altura ----------------
+    def schedule_resize(self, *rows: int) -> None:
+        """Sem argumentos: todas as linhas (ex.: mudou a largura)."""
+        if not rows:
+            self._dirty = None
+        elif self._dirty is not None:
+            self._dirty.update(rows)
+        self._timer.start()
+
+    def _flush(self) -> None:
+        dirty, self._dirty = self._dirty, set()
+        t = self.table
+        try:
+            if dirty is None:
+                t.resizeRowsToContents()
+            else:
+                n = t.rowCount()
+                for r in dirty:
+                    if 0 <= r < n:
+                        t.resizeRowToContents(r)
+            total = (t.horizontalHeader().height() + t.verticalHeader().length()
+                     + t.frameWidth() * 2 + 4)
+            t.setFixedHeight(max(total, self.min_height))
+        except Exception:
+            pass
@@ -0,0 +1,243 @@
+# app/ui/utils/record_navigator.py
+"""
+Navegação registro a registro (≪ ‹ › ≫) sem carregar todos os ids.
+
+A ordem da tela vira uma chave composta (expressões de ORDER BY + id) e as
+páginas são lidas por keyset: `WHERE (chave) > (última chave) LIMIT n`.
+Em volta da posição atual fica uma janela de registros completos; quando a
+posição chega perto da borda, a próxima página é lida numa thread com
+conexão própria. Cliques/auto-repeat seguidos só mexem no contador: o
+registro é aplicado nos widgets quando a navegação para (`delay_ms`).
+
+As expressões de ordem não podem dar NULL (use COALESCE), e um índice com
+as mesmas expressões (migração 10 para produtos) evita varrer a tabela.
+"""
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from typing import Optional, Sequence
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+class RecordNavigator(QObject):
+    recordReady = pyqtSignal(object)        # tupla com `columns` ou None (nenhum registro)
+    statusChanged = pyqtSignal(int, int)    # posição (0-based, -1 se vazio), total
+    _fetched = pyqtSignal(object)           # resultado da thread -> thread da interface
+
+    def __init__(self, db, table: str, columns: Sequence[str], order: Sequence[str],
+                 key: str = "id", page: int = 50, window: int = 300, delay_ms: int = 40,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.conn: sqlite3.Connection = db.conn
+        self.db_path = getattr(db, "db_path", None)
+        self.table = table
+        self.columns = list(columns)
+        self.page = max(1, int(page))
+        self.window = max(self.page * 3, int(window))
+
+        self._keys = [*order, key]
+        self._nc = len(self.columns)
+        self._select = ", ".join([*self.columns, *self._keys])
+        self._order_asc = ", ".join(self._keys)
+        self._order_desc = ", ".join(f"{k} DESC" for k in self._keys)
+        # o limite na 1ª expressão deixa o SQLite buscar no índice; a comparação
+        # de tupla sozinha sobre expressões vira varredura
+        tup = f"({', '.join(self._keys)})"
+        marks = f"({', '.join('?' * len(self._keys))})"
+        self._after = f"{self._keys[0]} >= ? AND {tup} > {marks}"
+        self._before = f"{self._keys[0]} <= ? AND {tup} < {marks}"
+
+        self._where, self._args = "", ()
+        self._gen = 0          # muda a cada reset: descarta respostas antigas
+        self._jump = 0         # só o salto mais recente é executado
+        self.total = 0
+        self.pos = -1
+        self._rows: list[tuple] = []
+        self._start = 0        # posição absoluta de _rows[0]
+        self._inflight: set[str] = set()
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(max(0, int(delay_ms)))
+        self._timer.timeout.connect(self._apply)
+        self._fetched.connect(self._on_fetched)
+
+        self._jobs: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    # ---------------- SQL ----------------
+    def _sql(self, extra: str = "", desc: bool = False, offset: bool = False) -> str:
+        conds = [c for c in (f"({self._where})" if self._where else "", extra) if c]
+        sql = f"SELECT {self._select} FROM {self.table}"
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += f" ORDER BY {self._order_desc if desc else self._order_asc} LIMIT ?"
+        if offset:
+            sql += " OFFSET ?"
+        return sql
+
+    def _key_of(self, row) -> tuple:
+        return tuple(row[self._nc:])
+
+    # ---------------- API ----------------
+    def reset(self, where: str = "", args: tuple = (), at: str = "first") -> None:
+        """Novo filtro (ex.: resultado do Localizar). Conta e lê a 1ª página já."""
+        self._gen += 1
+        self._where, self._args = where, tuple(args)
+        self._rows, self._start, self._inflight = [], 0, set()
+        sql = f"SELECT COUNT(*) FROM {self.table}" + (f" WHERE {where}" if where else "")
+        try:
+            self.total = int(self.conn.execute(sql, self._args).fetchone()[0])
+        except sqlite3.Error:
+            self.total = 0
+        if not self.total:
+            self.pos = -1
+            self.statusChanged.emit(-1, 0)
+            self.recordReady.emit(None)
+            return
+        last = at == "last"
+        rows = self.conn.execute(self._sql(desc=last), (*self._args, self.page)).fetchall()
+        self._rows = [tuple(r) for r in (reversed(rows) if last else rows)]
+        self._start = self.total - len(self._rows) if last else 0
+        self.pos = self.total - 1 if last else 0
+        self.statusChanged.emit(self.pos, self.total)
+        self._apply()
+
+    def first(self) -> None:
+        self.goto(0)
+
+    def last(self) -> None:
+        self.goto(self.total - 1)
+
+    def next(self) -> None:
+        self.goto(self.pos + 1)
+
+    def prev(self) -> None:
+        self.goto(self.pos - 1)
+
+    def goto(self, pos: int) -> None:
+        if not self.total:
+            return
+        pos = max(0, min(self.total - 1, int(pos)))
+        if pos == self.pos and self._has(pos):
+            return
+        self.pos = pos
+        self.statusChanged.emit(pos, self.total)
+        self._timer.start()  # reinicia: só o destino final é aplicado
+        self._prefetch()
+
+    def current(self) -> Optional[tuple]:
+        return self._rows[self.pos - self._start][:self._nc] if self._has(self.pos) else None
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self._jobs.put(None)
+            self._worker = None
+
+    # ---------------- janela ----------------
+    def _has(self, pos: int) -> bool:
+        return 0 <= pos - self._start < len(self._rows)
+
+    def _apply(self) -> None:
+        row = self.current()
+        if row is not None:
+            self.recordReady.emit(row)
+        # fora da janela: aplica quando a página chegar (_on_fetched)
+
+    def _prefetch(self) -> None:
+        end = self._start + len(self._rows)  # 1ª posição depois da janela
+        if not self._rows or self.pos < self._start - self.page or self.pos >= end + self.page:
+            self._jump += 1
+            start = max(0, min(self.total - self.page, self.pos - self.page // 2))
+            self._submit("jump", self._sql(offset=True), (*self._args, self.page, start),
+                         {"start": start, "jump": self._jump})
+            return
+        if end < self.total and end - self.pos <= self.page and "fwd" not in self._inflight:
+            key = self._key_of(self._rows[-1])
+            self._submit("fwd", self._sql(self._after), (*self._args, key[0], *key, self.page),
+                         {"after": key})
+        if self._start > 0 and self.pos - self._start < self.page and "back" not in self._inflight:
+            key = self._key_of(self._rows[0])
+            self._submit("back", self._sql(self._before, desc=True), (*self._args, key[0], *key, self.page),
+                         {"before": key})
+
+    def _on_fetched(self, res) -> None:
+        gen, kind, rows, meta = res
+        if gen != self._gen:
+            return
+        self._inflight.discard(kind)
+        if isinstance(rows, Exception):
+            return
+        rows = [tuple(r) for r in rows]
+        if kind == "jump":
+            if meta["jump"] != self._jump:
+                return
+            self._rows, self._start = rows, meta["start"]
+        elif kind == "fwd":
+            # só encaixa se a janela não mudou desde o pedido
+            if not self._rows or self._key_of(self._rows[-1]) != meta["after"]:
+                return
+            self._rows.extend(rows)
+        else:
+            if not self._rows or self._key_of(self._rows[0]) != meta["before"]:
+                return
+            rows.reverse()
+            self._rows[:0] = rows
+            self._start -= len(rows)
+        self._trim()
+        if self._has(self.pos) and not self._timer.isActive():
+            self._apply()
+        self._prefetch()
+
+    def _trim(self) -> None:
+        extra = len(self._rows) - self.window
+        if extra <= 0:
+            return
+        # corta do lado mais longe da posição atual
+        rel = self.pos - self._start
+        cut_front = min(extra, max(0, rel - self.window // 2))
+        if cut_front:
+            del self._rows[:cut_front]
+            self._start += cut_front
+        extra -= cut_front
+        if extra > 0:
+            del self._rows[len(self._rows) - extra:]
+
+    # ---------------- thread de leitura ----------------
+    def _submit(self, kind: str, sql: str, params: tuple, meta: dict) -> None:
+        self._inflight.add(kind)
+        job = (self._gen, kind, sql, params, meta)
+        if not self.db_path:  # sem arquivo (ex.: :memory:): lê na hora
+            self._on_fetched(self._run(self.conn, job))
+            return
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name=f"nav-{self.table}", daemon=True)
+            self._worker.start()
+        self._jobs.put(job)
+
+    def _run(self, conn, job):
+        gen, kind, sql, params, meta = job
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        except Exception as e:
+            rows = e
+        return gen, kind, rows, meta
+
+    def _work(self) -> None:
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                gen, kind, _sql, _params, meta = job
+                # saltos superados por outro mais novo e pedidos de filtro antigo: descarta
+                if gen != self._gen or (kind == "jump" and meta["jump"] != self._jump):
+                    self._fetched.emit((gen, kind, [], meta))
+                    continue
+                self._fetched.emit(self._run(conn, job))
+        finally:
+            conn.close()
@@ -0,0 +1,102 @@
+# app/ui/utils/sql_completer.py
+"""
+Combos editáveis sem consulta a cada tecla.
+
+Debouncer  : adia uma chamada até o usuário parar de digitar; `cancel()`
+             descarta o que estiver pendente, `flush()` executa na hora.
+SqlPrefixCompleter : QCompleter cuja lista vem de uma consulta por prefixo
+             (faixa sobre índice NOCASE), feita só depois da pausa. Enquanto
+             o texto só cresce e a última lista veio completa (< limite), o
+             filtro é local, sem voltar ao banco.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Callable, Optional
+
+from PyQt6.QtCore import QObject, QStringListModel, Qt, QTimer
+from PyQt6.QtWidgets import QComboBox, QCompleter
+
+# maior code point: prefixo + isto é o limite superior da faixa
+_TOP = "\U0010ffff"
+
+
+class Debouncer(QObject):
+    def __init__(self, delay_ms: int, fn: Callable, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._fn = fn
+        self._args: tuple = ()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(max(0, int(delay_ms)))
+        self._timer.timeout.connect(self._fire)
+
+    def schedule(self, *args) -> None:
+        self._args = args
+        self._timer.start()  # reinicia a contagem
+
+    def cancel(self) -> None:
+        self._timer.stop()
+
+    def flush(self) -> None:
+        if self._timer.isActive():
+            self._timer.stop()
+            self._fire()
+
+    def pending(self) -> bool:
+        return self._timer.isActive()
+
+    def _fire(self) -> None:
+        self._fn(*self._args)
+
+
+class SqlPrefixCompleter(QCompleter):
+    def __init__(self, conn: sqlite3.Connection, table: str, column: str,
+                 limit: int = 50, delay_ms: int = 200, min_chars: int = 1,
+                 parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.conn = conn
+        self.limit = max(1, int(limit))
+        self.min_chars = max(1, int(min_chars))
+        self._sql = (f'SELECT DISTINCT "{column}" FROM "{table}" '
+                     f'WHERE "{column}" >= ? COLLATE NOCASE AND "{column}" < ? COLLATE NOCASE '
+                     f'ORDER BY "{column}" COLLATE NOCASE LIMIT ?')
+        self._model = QStringListModel(self)
+        self.setModel(self._model)
+        self.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+        self._last: Optional[tuple[str, bool]] = None  # (prefixo, lista completa?)
+        self._debounce = Debouncer(delay_ms, self._refresh, self)
+        self._widget = None
+
+    def attach(self, combo: QComboBox) -> None:
+        combo.setCompleter(self)
+        combo.lineEdit().textEdited.connect(self._debounce.schedule)
+        self._widget = combo
+
+    def cancel(self) -> None:
+        self._debounce.cancel()
+
+    def _covered(self, prefix: str) -> bool:
+        if not self._last:
+            return False
+        last, complete = self._last
+        return complete and prefix.lower().startswith(last.lower())
+
+    def _refresh(self, text: str) -> None:
+        prefix = (text or "").strip()
+        if len(prefix) < self.min_chars:
+            self._model.setStringList([])
+            self._last = None
+            return
+        if not self._covered(prefix):
+            try:
+                rows = self.conn.execute(self._sql, (prefix, prefix + _TOP, self.limit)).fetchall()
+            except sqlite3.Error:
+                rows = []
+            items = [str(r[0]) for r in rows if r[0] is not None]
+            self._model.setStringList(items)
+            self._last = (prefix, len(items) < self.limit)
+        if self._widget is not None and self._widget.lineEdit().hasFocus():
+            self.setCompletionPrefix(prefix)
+            self.complete()
@@ -0,0 +1,37 @@
+# tests/conftest.py
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Database num arquivo temporário (migrações aplicadas, admin criado)."""
+    import app.data.db as dbm
+    monkeypatch.setattr(dbm, "CONFIG_DB_PATH", tmp_path / "qualidade.db")
+    d = dbm.Database()
+    yield d
+    d.conn.close()
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    """Cria um SQLite 'legado' a partir de {tabela: (ddl, linhas)}."""
+    def make(tables, name="legado.db"):
+        path = tmp_path / name
+        con = sqlite3.connect(path)
+        for table, (ddl, rows) in tables.items():
+            con.execute(ddl)
+            if rows:
+                marks = ", ".join("?" * len(rows[0]))
+                con.executemany(f'INSERT INTO "{table}" VALUES ({marks})', rows)
+        con.commit()
+        con.close()
+        return path
+    return make
@@ -0,0 +1,88 @@
+# tests/test_anomaly_detection.py
+import pytest
+
+from app.ai.anomaly_detection import AnomalyModelStore, OnlineAnomalyStore, OnlineRobustStats, P2Quantile
+from app.data.conformance import numeric_value
+
+SOURCE = "SELECT produto, analise, valor FROM medidas"
+
+
+@pytest.fixture
+def medidas(db):
+    db.conn.execute("CREATE TABLE medidas (produto, analise, valor)")
+    db.conn.commit()
+
+    def add(*rows):
+        db.conn.executemany("INSERT INTO medidas VALUES (?,?,?)", rows)
+        db.conn.commit()
+    return add
+
+
+@pytest.mark.parametrize("text, value", [
+    ("3,4", 3.4), (" 0.02 ", 0.02), ("1.000,5", 1000.5), (7, 7.0), ("-1", -1.0),
+    ("<0,5", None), ("Isento", None), ("ND", None), ("", None), (None, None), ("12 %", None),
+])
+def test_numeric_value_accepts_only_plain_numbers(text, value):
+    assert numeric_value(text) == (pytest.approx(value) if value is not None else None)
+
+
+def test_text_results_do_not_enter_the_model(db, medidas):
+    medidas((1, "Umidade", "0,10"), (1, "Umidade", "0,12"), (1, "Umidade", 0.14),
+            (1, "Umidade", "<0,5"), (1, "Umidade", "Isento"), (1, "Umidade", "ND"), (1, "Umidade", ""))
+    store = AnomalyModelStore(db, source_sql=SOURCE)
+    assert store.refit() == 1
+    med, _mad, n = store.model(1, "Umidade")
+    assert n == 3 and med == pytest.approx(0.12)
+
+
+def test_refit_only_recomputes_changed_groups(db, medidas):
+    medidas((1, "pH", 7.0), (1, "pH", 7.2), (2, "pH", 6.0))
+    store = AnomalyModelStore(db, source_sql=SOURCE)
+    assert store.refit() == 2
+    assert store.refit() == 0
+    medidas((2, "pH", "ND"))  # texto não muda a assinatura do grupo
+    assert store.refit() == 0
+    medidas((2, "pH", 6.4))
+    assert store.refit() == 1
+    assert store.check(1, "pH", 9.0) and not store.check(1, "pH", 7.1)
+
+
+def test_p2_quantiles_track_the_sample():
+    import random
+    rnd = random.Random(7)
+    xs = [rnd.gauss(10, 2) for _ in range(5000)]
+    q = {p: P2Quantile(p) for p in (0.25, 0.5, 0.75)}
+    for x in xs:
+        for est in q.values():
+            est.update(x)
+    xs.sort()
+    for p, est in q.items():
+        assert est.value() == pytest.approx(xs[int(p * len(xs))], abs=0.1)
+    restored = P2Quantile.from_dict(q[0.5].to_dict())
+    assert restored.value() == q[0.5].value() and restored.n == 5000
+
+
+def test_online_score_follows_the_ewma_level():
+    st = OnlineRobustStats(alpha=0.2)
+    assert st.score(1.0) is None  # ainda aquecendo
+    for i in range(200):
+        st.update(10.0 + (i % 5) * 0.1)
+    assert st.score(10.2) < 1 and st.score(20.0) > 3.5
+    for i in range(60):  # processo mudou de nível
+        st.update(12.0 + (i % 5) * 0.1)
+    # a mediana de todo o histórico ainda está perto de 10; o EWMA já está em 12
+    assert st.median() < 11
+    assert st.score(12.2) < 1 and st.score(10.2) > st.score(12.2)
+    assert OnlineRobustStats.from_json(st.to_json()).score(12.2) == pytest.approx(st.score(12.2))
+
+
+def test_online_store_persists_and_resets(db):
+    store = OnlineAnomalyStore(db, autoflush=1000)
+    assert store.observe_many("1", "pH", [7.0, 7.1, 7.2, 7.1, 7.0, 7.1, float("nan")]) == 0
+    assert store.observe("1", "pH", 30.0)
+    assert store.flush() == 1
+    again = OnlineAnomalyStore(db)
+    assert again.stats(1, "pH").n == 7
+    assert again.score(1, "pH", 7.1) == pytest.approx(store.score(1, "pH", 7.1))
+    again.reset()
+    assert OnlineAnomalyStore(db).stats(1, "pH") is None
@@ -0,0 +1,25 @@
+# tests/test_config.py
+import importlib
+
+import app.config
+
+
+def load(monkeypatch, **env):
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    return importlib.reload(app.config)
+
+
+def test_invalid_numbers_fall_back_to_defaults(monkeypatch):
+    cfg = load(monkeypatch, QUALIDADE_SYNC_MIN="quinze", QUALIDADE_MANUT_OCIOSO_MIN="5min",
+               QUALIDADE_BACKUP_MANTER="x", QUALIDADE_SNAPSHOT_MIN="1,5")
+    assert (cfg.SYNC_INTERVAL_MIN, cfg.MAINT_IDLE_MIN, cfg.BACKUP_KEEP, cfg.SNAPSHOT_MIN) == (15, 5, 7, 30)
+
+
+def test_numbers_and_empty_values(monkeypatch):
+    cfg = load(monkeypatch, QUALIDADE_SYNC_MIN=" 10 ", QUALIDADE_SNAPSHOT_MIN="", QUALIDADE_BACKUP_MANTER="")
+    assert (cfg.SYNC_INTERVAL_MIN, cfg.SNAPSHOT_MIN, cfg.BACKUP_KEEP) == (10, 0, 7)
+
+
+def teardown_module(_module):
+    importlib.reload(app.config)  # os outros testes veem a configuração padrão
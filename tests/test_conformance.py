@@ -0,0 +1,79 @@
+# tests/test_conformance.py
+from types import SimpleNamespace
+
+import pytest
+
+from app.data.conformance import ConformanceEngine, make_interval, parse_limit, parse_value
+
+
+@pytest.fixture
+def plant(db):
+    """Produto 4000000396 (id 7) com limites, e um lote medido nas tabelas reais do legado."""
+    c = db.conn
+    c.execute("CREATE TABLE produtos (id INTEGER PRIMARY KEY, codigo TEXT, nome TEXT)")
+    c.executemany("INSERT INTO produtos (id, codigo, nome) VALUES (?,?,?)",
+                  [(3, "4000000396", "duplicado sem limites"), (7, "4000000396", "ML 4439")])
+    c.executemany("INSERT INTO analises_produto_ap (produto_id, propriedade, tipo, minimo, maximo) "
+                  "VALUES (?,?,?,?,?)",
+                  [(7, "Umidade", "Analítico", "", "≤ 0,02"), (7, "Densidade", "Analítico", "0,93", "0,95")])
+    c.execute("CREATE TABLE TBL_Resultado (id INTEGER PRIMARY KEY, produto_id INTEGER, lote TEXT, "
+              "status TEXT, created_at TEXT)")
+    c.execute("CREATE TABLE tblMedicao (id INTEGER PRIMARY KEY, resultado_id INTEGER, valor REAL, "
+              "created_at TEXT, analise TEXT)")
+    c.executemany("INSERT INTO TBL_Resultado (id, produto_id, lote) VALUES (?,?,?)",
+                  [(1, 7, "L100"), (2, 7, "L200")])
+    c.executemany("INSERT INTO tblMedicao (resultado_id, valor, analise) VALUES (?,?,?)",
+                  [(1, "0,03", "Umidade"), (1, 0.94, "Densidade"),
+                   (2, 0.01, "Umidade"), (2, 0.94, "Densidade")])
+    c.commit()
+    return db
+
+
+def test_limits_read_as_text():
+    assert parse_limit("≤ 0,02") == (0.02, False)
+    assert parse_limit("< 5") == (5.0, True)
+    assert parse_value("1.000,5") == 1000.5
+    iv = make_interval("", "< 0,02")
+    assert iv.hi == 0.02 and iv.hi_open and iv.text() == "máx. < 0,02"
+
+
+def test_product_code_maps_to_the_id_that_has_limits(plant):
+    eng = ConformanceEngine(plant)
+    assert eng.produto_por_codigo(" 4000000396 ") == "7"
+    assert eng.produto_por_codigo("999") is None
+
+
+def test_lot_out_of_product_spec_is_not_approved(plant):
+    eng = ConformanceEngine(plant)
+    lot = ("L100", eng.produto_por_codigo("4000000396"), "", "4000000396")
+    v = eng.evaluate_lots([lot])[lot]
+    assert v["status"] == "reprovado" and v["liberacao_especial"]
+    umidade = next(a for a in v["analises"] if a["analise"] == "Umidade")
+    assert umidade["status"] == "não atende" and umidade["valor_max"] == pytest.approx(0.03)
+
+    ok = ("L200", lot[1], "", "4000000396")
+    assert eng.evaluate_lots([ok])[ok]["status"] == "aprovado"
+
+
+def test_certificate_shows_product_spec_failure(plant):
+    pytest.importorskip("PyQt6.QtWidgets")
+    from app.ui.screens.impressao_certificados import CertRow, ImpressaoCertificadosWidget
+
+    screen = SimpleNamespace(conformance=ConformanceEngine(plant))
+    row = CertRow("1", "", "4000000396", "", "", "L100", "")
+    html = ImpressaoCertificadosWidget._conformidade_html(screen, row)
+    assert "Umidade" in html and "NÃO ATENDE" in html and "Liberação Especial" in html
+
+
+def test_client_row_overrides_product_limit(plant):
+    plant.conn.execute("INSERT INTO analises_cliente (cliente, codigo, analise, tipo_ensaio, sim, espec_min, espec_max) "
+                       "VALUES ('ACME', '4000000396', 'Umidade', 'Analítico', 1, '', '0,05')")
+    plant.conn.commit()
+    eng = ConformanceEngine(plant)
+    lot = ("L100", "7", "acme", "4000000396")
+    assert eng.evaluate_lots([lot])[lot]["status"] == "aprovado"
+
+
+def test_without_measurement_tables_lots_have_no_result(db):
+    lot = ("L1", None, None, None)
+    assert ConformanceEngine(db).evaluate_lots([lot])[lot]["analises"] == []
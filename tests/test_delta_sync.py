@@ -0,0 +1,104 @@
+# tests/test_delta_sync.py
+import sqlite3
+
+from app.data.delta_sync import DeltaSync
+from app.data.migration_engine import MigrationEngine, SQLiteReader
+
+
+TABLES = ("medicoes", "clientes")
+
+
+def quiet(*_):
+    pass
+
+
+def sync(src, dst, tables=None):
+    return DeltaSync(SQLiteReader(src), dst, log=quiet, allow=TABLES).run(tables)
+
+
+def setup(legacy, tmp_path):
+    src = legacy({
+        "medicoes": ("CREATE TABLE medicoes (id INTEGER PRIMARY KEY, valor REAL)", [(1, 1.0), (2, 2.0)]),
+        "clientes": ("CREATE TABLE clientes (codigo TEXT PRIMARY KEY, nome TEXT)",
+                     [("A", "Acme"), ("B", "Beta"), ("C", "Cia")]),
+    })
+    dst = tmp_path / "qualidade.db"
+    MigrationEngine(SQLiteReader(src), workers=1, log=quiet).run(dst)
+    return src, dst
+
+
+def test_first_sync_after_migration_changes_nothing(legacy, tmp_path):
+    src, dst = setup(legacy, tmp_path)
+    assert sync(src, dst) == {"clientes": (0, 0), "medicoes": (0, 0)}
+
+
+def test_hwm_appends_only_new_rows(legacy, tmp_path):
+    src, dst = setup(legacy, tmp_path)
+    sync(src, dst)
+    con = sqlite3.connect(src)
+    con.executemany("INSERT INTO medicoes VALUES (?, ?)", [(3, 3.0), (4, 4.0)])
+    con.commit()
+    con.close()
+
+    res = sync(src, dst, ["medicoes"])
+    assert res == {"medicoes": (2, 0)}
+    con = sqlite3.connect(dst)
+    assert con.execute("SELECT id, valor FROM medicoes ORDER BY id").fetchall() == [
+        (1, 1.0), (2, 2.0), (3, 3.0), (4, 4.0)]
+    assert con.execute("SELECT marca FROM _sync_estado WHERE tabela='medicoes'").fetchone()[0] == 4
+    con.close()
+
+
+def test_hash_applies_updates_inserts_and_deletes(legacy, tmp_path):
+    src, dst = setup(legacy, tmp_path)
+    sync(src, dst)
+    con = sqlite3.connect(src)
+    con.execute("UPDATE clientes SET nome='Acme SA' WHERE codigo='A'")
+    con.execute("DELETE FROM clientes WHERE codigo='B'")
+    con.execute("INSERT INTO clientes VALUES ('D', 'Delta')")
+    con.commit()
+    con.close()
+
+    res = sync(src, dst, ["clientes"])
+    assert res == {"clientes": (2, 1)}
+    con = sqlite3.connect(dst)
+    assert con.execute("SELECT codigo, nome FROM clientes ORDER BY codigo").fetchall() == [
+        ("A", "Acme SA"), ("C", "Cia"), ("D", "Delta")]
+    con.close()
+    # nada mudou na origem: nada a gravar
+    assert sync(src, dst, ["clientes"]) == {"clientes": (0, 0)}
+
+
+def test_hash_keeps_rows_the_sync_never_wrote(legacy, tmp_path):
+    src, dst = setup(legacy, tmp_path)
+    con = sqlite3.connect(dst)
+    con.execute("INSERT INTO clientes VALUES ('Z', 'gravado pelo app')")
+    con.commit()
+    con.close()
+    assert sync(src, dst, ["clientes"]) == {"clientes": (0, 0)}
+
+    con = sqlite3.connect(src)
+    con.execute("DELETE FROM clientes WHERE codigo='B'")
+    con.commit()
+    con.close()
+    assert sync(src, dst, ["clientes"]) == {"clientes": (0, 1)}
+    con = sqlite3.connect(dst)
+    assert [r[0] for r in con.execute("SELECT codigo FROM clientes ORDER BY codigo")] == ["A", "C", "Z"]
+    con.close()
+
+
+def test_only_legacy_tables_are_synced(legacy, tmp_path):
+    src = legacy({
+        "TBL_Cliente": ("CREATE TABLE TBL_Cliente (codigo TEXT PRIMARY KEY, nome TEXT)", [("A", "Acme")]),
+        "TBL_Contador": ("CREATE TABLE TBL_Contador (chave TEXT PRIMARY KEY, valor INTEGER)", [("laudo", 1)]),
+        "outra": ("CREATE TABLE outra (id INTEGER PRIMARY KEY)", [(1,)]),
+    })
+    dst = tmp_path / "qualidade.db"
+    res = DeltaSync(SQLiteReader(src), dst, log=quiet).run()
+    assert set(res) == {"TBL_Cliente"}
+    # nem pedindo explicitamente uma tabela do app
+    res = DeltaSync(SQLiteReader(src), dst, log=quiet, allow=["TBL_Contador"]).run(["TBL_Contador"])
+    assert res == {}
+    con = sqlite3.connect(dst)
+    assert con.execute("SELECT name FROM sqlite_master WHERE name='TBL_Contador'").fetchone() is None
+    con.close()
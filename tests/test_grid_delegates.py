@@ -0,0 +1,19 @@
+# tests/test_grid_delegates.py
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+from app.ui.utils.grid_delegates import parse_number
+
+
+@pytest.mark.parametrize("text, value", [
+    ("3,4", 3.4), ("0.02", 0.02), ("≤ 0,02", 0.02), ("5%", 5.0),
+    ("10 mm", 10.0), ("45 a 55", 45.0), ("1.000,5", 1000.5),
+])
+def test_free_text_limits_read_like_conformance(text, value):
+    assert parse_number(text) == pytest.approx(value)
+
+
+@pytest.mark.parametrize("text", ["", None, "Isento", "OK"])
+def test_text_without_number_is_not_a_limit(text):
+    assert parse_number(text) is None
@@ -0,0 +1,82 @@
+# tests/test_maintenance.py
+import sqlite3
+from datetime import datetime, time
+
+import pytest
+
+from app.data.maintenance import STATE_TABLE, Maintenance, in_window, parse_windows
+
+
+@pytest.fixture
+def maint(tmp_path):
+    path = tmp_path / "q.db"
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("CREATE TABLE t (x)")
+    con.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+    con.commit()
+    con.close()
+    return Maintenance(path, backup_dir=tmp_path / "bk", keep=2, log=lambda *_: None)
+
+
+def state(m):
+    con = sqlite3.connect(m.db_path)
+    try:
+        return dict(con.execute(f"SELECT tarefa, resultado FROM {STATE_TABLE}").fetchall())
+    finally:
+        con.close()
+
+
+def test_windows_cross_midnight():
+    w = parse_windows("12:00-13:30, 19:00-06:00, lixo")
+    assert w == [(time(12), time(13, 30)), (time(19), time(6))]
+    assert in_window(w, datetime(2025, 1, 1, 23, 0)) and in_window(w, datetime(2025, 1, 1, 5, 59))
+    assert not in_window(w, datetime(2025, 1, 1, 14, 0))
+    assert in_window([], datetime(2025, 1, 1, 14, 0))
+
+
+def test_successful_tasks_are_recorded_and_no_longer_due(maint):
+    out = maint.run(["checkpoint", "optimize", "backup"])
+    assert set(out) == {"checkpoint", "optimize", "backup"}
+    assert set(state(maint)) == set(out)
+    assert not {"checkpoint", "optimize", "backup"} & set(maint.due())
+    assert len(list(maint.backup_dir.glob("*_backup_*.db"))) == 1
+
+
+def test_failed_task_is_not_recorded_and_stays_due(maint, monkeypatch):
+    def boom(conn, cancel=None):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(maint, "optimize", boom)
+    out = maint.run(["optimize", "checkpoint"])
+    assert out["optimize"].startswith("erro:")
+    assert "optimize" not in state(maint) and "checkpoint" in state(maint)
+    assert "optimize" in maint.due()
+
+
+def test_locked_state_write_does_not_abort_the_run(maint):
+    maint.run(["checkpoint"])  # cria _manutencao
+    holder = sqlite3.connect(maint.db_path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")  # outra estação segurando a escrita
+    try:
+        maint._connect = lambda: sqlite3.connect(str(maint.db_path), timeout=0.05, isolation_level=None)
+        out = maint.run(["optimize", "checkpoint"])
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert set(out) == {"optimize", "checkpoint"}
+    assert "optimize" not in state(maint)
+
+
+def test_scheduled_vacuum_never_converts_the_database(maint):
+    out = maint.run(["vacuum"])
+    assert "converter" in out["vacuum"]
+    con = sqlite3.connect(maint.db_path)
+    assert con.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    con.close()
+
+    assert maint.convert_vacuum() == "convertido para auto_vacuum incremental"
+    con = sqlite3.connect(maint.db_path)
+    con.execute("DELETE FROM t")
+    con.commit()
+    con.close()
+    assert "páginas livres" in maint.run(["vacuum"])["vacuum"]
@@ -0,0 +1,111 @@
+# tests/test_measurement_store.py
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.ai.anomaly_detection import AnomalyModelStore, OnlineAnomalyStore
+from app.data import measurement_store
+from app.data.measurement_store import MeasurementStore
+
+
+def legacy_tables(conn, medicoes):
+    """Formato real do legado: a medição só aponta para o resultado (produto/lote)."""
+    conn.execute("DROP TABLE IF EXISTS tblMedicao")
+    conn.execute("CREATE TABLE IF NOT EXISTS TBL_Resultado (id INTEGER PRIMARY KEY, produto_id INTEGER, "
+                 "lote TEXT, status TEXT, created_at TEXT)")
+    conn.execute("CREATE TABLE tblMedicao (id INTEGER PRIMARY KEY, resultado_id INTEGER, valor REAL, "
+                 "created_at TEXT)")
+    conn.execute("INSERT OR IGNORE INTO TBL_Resultado (id, produto_id, lote) VALUES (1, 7, 'L1'), (2, 7, 'L2')")
+    add(conn, medicoes)
+
+
+def add(conn, medicoes):
+    conn.executemany("INSERT INTO tblMedicao (resultado_id, valor, created_at) VALUES (?,?,?)", medicoes)
+    conn.commit()
+
+
+@pytest.fixture
+def store(db, tmp_path):
+    legacy_tables(db.conn, [(1, 1.0, "2025-01-02 08:00:00"), (2, "2,5", "02/01/2025 09:30")])
+    return MeasurementStore(db, root=tmp_path / "npy")
+
+
+def test_refresh_joins_result_and_appends_only_new_rows(store, db):
+    assert store.refresh() == 2
+    s = store.series("7", "tblMedicao")
+    assert s.valor.tolist() == [1.0, 2.5]
+    assert store.lot_names(s.lote) == ["L1", "L2"]
+    assert str(s.ts[1]) == "2025-01-02T09:30:00"
+
+    add(db.conn, [(1, 3.0, None)])
+    assert store.refresh() == 1
+    assert store.refresh() == 0
+    assert MeasurementStore(db, root=store.root).series("7", "tblMedicao").valor.tolist() == [1.0, 2.5, 3.0]
+
+
+def test_recreated_table_triggers_rebuild(store, db):
+    store.refresh()
+    add(db.conn, [(1, 9.0, None)])
+    store.refresh()
+    # migração completa: a tabela volta com menos linhas (rowid abaixo da marca)
+    legacy_tables(db.conn, [(2, 4.0, None)])
+    assert store.refresh() == 1
+    assert store.series("7", "tblMedicao").valor.tolist() == [4.0]
+
+
+def test_table_recreated_with_more_rows_triggers_rebuild(store, db):
+    store.refresh()
+    legacy_tables(db.conn, [(1, 7.0, None), (1, 8.0, None), (2, 9.0, None)])
+    assert store.refresh() == 3
+    assert store.series("7", "tblMedicao").valor.tolist() == [7.0, 8.0, 9.0]
+
+
+def test_failed_write_leaves_the_manifest_behind_the_files(store, db, monkeypatch):
+    store.refresh()
+    add(db.conn, [(1, 3.0, None), (2, 4.0, None)])
+    real = measurement_store._append_npy
+
+    def fail_on_ts(path, n_old, arr):
+        if path.name == "ts.npy":
+            raise OSError("disco cheio")
+        real(path, n_old, arr)
+
+    monkeypatch.setattr(measurement_store, "_append_npy", fail_on_ts)
+    with pytest.raises(OSError):
+        store.refresh()
+    assert store.groups() == [("7", "tblMedicao", 2)]
+    assert store.series("7", "tblMedicao").valor.tolist() == [1.0, 2.5]
+
+    monkeypatch.setattr(measurement_store, "_append_npy", real)
+    assert store.refresh() == 2
+    s = store.series("7", "tblMedicao")
+    assert s.valor.tolist() == [1.0, 2.5, 3.0, 4.0]
+    assert len(s.ts) == len(s.lote) == 4
+
+
+def test_anomaly_refit_reads_values_from_store(store, db):
+    store.refresh()
+    models = AnomalyModelStore(db, measurements=store)
+    calls = []
+    orig = store.series
+    store.series = lambda p, a: calls.append((p, a)) or orig(p, a)
+    assert models.refit() == 1
+    assert calls == [("7", "tblMedicao")]
+    med, mad, n = models.model(7, "tblMedicao")
+    assert (med, n) == (1.75, 2)
+
+    add(db.conn, [(1, 5.0, None)])  # cópia ainda não atualizada: vale o SQL
+    assert models.refit() == 1
+    assert models.model(7, "tblMedicao")[2] == 3
+
+
+def test_appended_rows_feed_the_online_detector(store, db):
+    online = OnlineAnomalyStore(db)
+    store.listener = online
+    store.refresh()
+    assert online.stats(7, "tblMedicao").n == 2
+    add(db.conn, [(1, 3.0, None)])
+    store.refresh()
+    assert OnlineAnomalyStore(db).stats(7, "tblMedicao").n == 3  # gravado pelo flush do refresh
+    store.rebuild()
+    assert online.stats(7, "tblMedicao").n == 3  # rebuild zera e relê: sem contar duas vezes
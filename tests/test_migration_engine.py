@@ -0,0 +1,111 @@
+# tests/test_migration_engine.py
+import sqlite3
+
+from app.data.migration_engine import (CHUNK_ROWS, STATE_TABLE, AccessReader, CsvDirReader,
+                                       MigrationEngine, SQLiteReader)
+
+ROWS = [(i, f"L{i:03d}", i * 1.5) for i in range(1, 101)]
+CLIENTES = [(1, "Acme"), (2, "Beta")]
+
+
+def quiet(*_):
+    pass
+
+
+def make_source(legacy):
+    return legacy({
+        "resultados": ("CREATE TABLE resultados (id INTEGER PRIMARY KEY, lote TEXT, valor REAL)", ROWS),
+        "clientes": ("CREATE TABLE clientes (id INTEGER PRIMARY KEY, nome TEXT)", CLIENTES),
+    })
+
+
+class CrashingReader(SQLiteReader):
+    """Interrompe a leitura depois de `after` blocos, como uma queda no meio da carga."""
+    def __init__(self, path, after):
+        super().__init__(path)
+        self.after = after
+
+    def read(self, table, chunk=CHUNK_ROWS, offset=0):
+        cols, chunks = super().read(table, chunk, offset)
+
+        def gen():
+            for i, rows in enumerate(chunks):
+                if i == self.after:
+                    raise OSError("conexão perdida")
+                yield rows
+        return cols, gen()
+
+
+class KeyedResumeReader(SQLiteReader):
+    """Falha se a retomada de uma tabela com chave pular linhas pelo offset."""
+    def read(self, table, chunk=CHUNK_ROWS, offset=0):
+        assert offset == 0, f"{table}: retomada por offset"
+        return super().read(table, chunk, offset)
+
+
+def test_migrates_and_verifies_every_table(legacy, tmp_path):
+    dst = tmp_path / "novo.db"
+    ok = MigrationEngine(SQLiteReader(make_source(legacy)), workers=2, chunk=7, log=quiet).run(dst)
+    assert ok == {"resultados": 100, "clientes": 2}
+    con = sqlite3.connect(dst)
+    assert con.execute("SELECT * FROM resultados ORDER BY id").fetchall() == ROWS
+    assert con.execute(f"SELECT tabela, concluida, verificada FROM {STATE_TABLE} ORDER BY tabela").fetchall() == [
+        ("clientes", 1, 1), ("resultados", 1, 1)]
+    con.close()
+
+
+def test_resume_after_crash_continues_without_duplicates(legacy, tmp_path):
+    src = make_source(legacy)
+    dst = tmp_path / "novo.db"
+    ok = MigrationEngine(CrashingReader(src, after=3), workers=1, chunk=10, log=quiet).run(dst)
+    assert "resultados" not in ok
+    con = sqlite3.connect(dst)
+    assert con.execute(f"SELECT linhas, concluida FROM {STATE_TABLE} WHERE tabela='resultados'").fetchone() == (30, 0)
+    assert con.execute("SELECT COUNT(*) FROM resultados").fetchone()[0] == 30
+    con.close()
+
+    ok = MigrationEngine(KeyedResumeReader(src), workers=1, chunk=10, log=quiet).run(dst, resume=True)
+    assert ok == {"resultados": 100}
+    con = sqlite3.connect(dst)
+    assert con.execute("SELECT * FROM resultados ORDER BY id").fetchall() == ROWS
+    assert con.execute("SELECT * FROM clientes ORDER BY id").fetchall() == CLIENTES
+    assert con.execute(f"SELECT concluida, verificada FROM {STATE_TABLE} WHERE tabela='resultados'").fetchone() == (1, 1)
+    con.close()
+
+
+def test_csv_directory_reader(tmp_path):
+    src = tmp_path / "csv"
+    src.mkdir()
+    (src / "clientes.csv").write_text("id;nome;cidade\n1;Acme;Recife\n2;Beta;\n", encoding="utf-8")
+    dst = tmp_path / "novo.db"
+    ok = MigrationEngine(CsvDirReader(src), workers=1, log=quiet).run(dst)
+    assert ok == {"clientes": 2}
+    con = sqlite3.connect(dst)
+    assert con.execute("SELECT id, nome, cidade FROM clientes ORDER BY id").fetchall() == [
+        ("1", "Acme", "Recife"), ("2", "Beta", None)]
+    con.close()
+
+
+def test_resume_without_key_uses_row_offset(legacy, tmp_path):
+    rows = [(f"evento {i}",) for i in range(25)]
+    src = legacy({"log": ("CREATE TABLE log (msg TEXT)", rows)})
+    dst = tmp_path / "novo.db"
+    MigrationEngine(CrashingReader(src, after=2), workers=1, chunk=5, log=quiet).run(dst)
+    ok = MigrationEngine(SQLiteReader(src), workers=1, chunk=5, log=quiet).run(dst, resume=True)
+    assert ok == {"log": 25}
+    con = sqlite3.connect(dst)
+    assert con.execute("SELECT msg FROM log ORDER BY rowid").fetchall() == rows
+    con.close()
+
+
+def test_access_reader_orders_by_primary_key(legacy, monkeypatch):
+    # o SQLite aceita [colchetes]: serve de conexão ODBC para o SQL do AccessReader
+    src = legacy({"clientes": ("CREATE TABLE clientes (codigo TEXT PRIMARY KEY, nome TEXT)",
+                               [("C", "Cia"), ("A", "Acme"), ("B", "Beta")])})
+    reader = AccessReader(src)
+    monkeypatch.setattr(reader, "_open", lambda _path: sqlite3.connect(src))
+    monkeypatch.setattr(reader, "indexes", lambda _t: [("PrimaryKey", True, ["codigo"])])
+    cols, chunks = reader.read("clientes", chunk=2, offset=1)
+    assert cols == ["codigo", "nome"]
+    assert [r for rows in chunks for r in rows] == [("B", "Beta"), ("C", "Cia")]
+    assert reader.key_column("clientes") == ("codigo", False)
@@ -0,0 +1,82 @@
+# tests/test_migrations.py
+import sqlite3
+
+import pytest
+
+from app.data import migrations
+from app.data.migrations import LATEST, current_version, ensure_schema, migrate
+
+
+def tables(con):
+    return {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+
+def test_fresh_database_reaches_latest(tmp_path):
+    con = sqlite3.connect(tmp_path / "novo.db")
+    assert migrate(con) == LATEST
+    assert current_version(con) == LATEST
+    assert {"funcionarios", "acessos", "analises_produto_ap", "TBL_Contador", "anomaly_modelos",
+            "qna_docs"} <= tables(con)
+    con.close()
+
+
+def test_migrate_is_a_noop_when_up_to_date(tmp_path):
+    con = sqlite3.connect(tmp_path / "novo.db")
+    migrate(con)
+    applied = []
+    assert migrate(con, log=applied.append) == LATEST
+    assert applied == []
+    con.close()
+
+
+def test_old_database_gets_missing_columns(tmp_path):
+    con = sqlite3.connect(tmp_path / "antigo.db")
+    con.execute("CREATE TABLE funcionarios (id INTEGER PRIMARY KEY, nome TEXT, senha TEXT)")
+    con.execute("INSERT INTO funcionarios (nome, senha) VALUES ('Ana', 'x')")
+    con.commit()
+    migrate(con)
+    cols = {r[1] for r in con.execute("PRAGMA table_info(funcionarios)")}
+    assert {"login", "registro", "papel"} <= cols
+    assert con.execute("SELECT login FROM funcionarios").fetchone()[0] == "ana"
+    con.close()
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    con = sqlite3.connect(tmp_path / "novo.db")
+
+    def boom(conn):
+        conn.execute("CREATE TABLE parcial (x)")
+        raise RuntimeError("falhou")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(LATEST + 1, "teste", boom)])
+    monkeypatch.setattr(migrations, "LATEST", LATEST + 1)
+    try:
+        migrations.migrate(con)
+    except RuntimeError:
+        pass
+    assert current_version(con) == 0
+    assert "parcial" not in tables(con)
+    con.close()
+
+
+def test_ensure_schema_runs_once_per_database(tmp_path):
+    con = sqlite3.connect(tmp_path / "novo.db")
+    ensure_schema(con)
+    con.execute("PRAGMA user_version = 0")  # só o registro do processo impede nova migração
+    ensure_schema(con)
+    assert current_version(con) == 0
+    con.close()
+
+
+def test_legacy_contador_is_deduplicated_before_unique_index(tmp_path):
+    con = sqlite3.connect(tmp_path / "antigo.db")
+    con.execute("CREATE TABLE TBL_Contador (id INTEGER PRIMARY KEY AUTOINCREMENT, chave TEXT, valor INTEGER)")
+    con.executemany("INSERT INTO TBL_Contador (chave, valor) VALUES (?, ?)",
+                    [("laudo", 120), ("laudo", 130), ("laudo", 90), ("lote", 7)])
+    con.commit()
+    migrate(con)
+    assert con.execute("SELECT chave, valor FROM TBL_Contador ORDER BY chave").fetchall() == [
+        ("laudo", 130), ("lote", 7)]
+    with pytest.raises(sqlite3.IntegrityError):
+        con.execute("INSERT INTO TBL_Contador (chave, valor) VALUES ('laudo', 1)")
+    con.close()
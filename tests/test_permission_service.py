@@ -0,0 +1,72 @@
+# tests/test_permission_service.py
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from app.ui.core.app_context import AppContext
+from app.ui.core.event_bus import EventBus
+from app.ui.services.permission_service import (ALL_PERMS, PERM_BITS, PermissionService, compile_mask,
+                                                mask_to_flags)
+
+ANA = {"id": 7, "login": "ana", "papel": "usuario"}
+
+
+def grant(db, login, **perms):
+    cols = ", ".join(["login"] + list(perms))
+    marks = ", ".join("?" * (len(perms) + 1))
+    db.conn.execute(f"INSERT OR REPLACE INTO acessos ({cols}) VALUES ({marks})", (login, *perms.values()))
+    db.conn.commit()
+
+
+def test_admin_gets_every_permission(db):
+    assert compile_mask(db.conn, {"id": 1, "login": "admin", "papel": "admin"}) == ALL_PERMS
+
+
+def test_mask_comes_from_acessos_by_login(db):
+    grant(db, "ANA", cad_func=1, imp_rotulos=1, cad_clientes=0)
+    flags = mask_to_flags(compile_mask(db.conn, ANA))
+    assert flags["cad_func"] and flags["imp_rotulos"]
+    assert not flags["cad_clientes"] and not flags["liberacao_especial"]
+
+
+def test_unknown_user_has_no_permissions(db):
+    assert compile_mask(db.conn, {"id": 99, "login": "ninguem", "papel": "usuario"}) == 0
+
+
+def test_service_recompiles_after_permissions_saved(db):
+    grant(db, "ana", cad_func=1)
+    bus = EventBus()
+    ctx = AppContext(current_user=dict(ANA))
+    svc = PermissionService(db, ctx, bus)
+    svc.login(ctx.current_user)
+    assert svc.can("cad_func") and not svc.can("emitir_certificados")
+
+    grant(db, "ana", cad_func=1, emitir_certificados=1)
+    assert not svc.can("emitir_certificados")  # máscara em cache até o aviso
+    bus.permissionsSaved.emit("ana")
+    assert svc.can_all("cad_func", "emitir_certificados")
+    assert svc.mask == PERM_BITS["cad_func"] | PERM_BITS["emitir_certificados"]
+
+
+def test_login_reads_the_current_mask_and_logout_forgets_it(db):
+    grant(db, "ana", cad_func=1, emitir_certificados=1)
+    ctx = AppContext(current_user=dict(ANA))
+    svc = PermissionService(db, ctx, EventBus())
+    svc.login(ctx.current_user)
+    assert svc.can("emitir_certificados")
+
+    # revogado em outra estação: não há aviso pelo bus deste processo
+    grant(db, "ana", cad_func=1, emitir_certificados=0)
+    svc.logout()
+    assert not svc.can("cad_func")
+    svc.login(dict(ANA))
+    assert svc.can("cad_func") and not svc.can("emitir_certificados")
+
+
+def test_layout_follows_schema_changes(db):
+    user = {"id": 42, "login": "bia", "papel": "usuario"}
+    assert compile_mask(db.conn, user) == 0
+    db.conn.execute("CREATE TABLE TBL_TipoAcesso (usuario_id INTEGER, cad_func INTEGER)")
+    db.conn.execute("INSERT INTO TBL_TipoAcesso VALUES (42, 1)")
+    db.conn.commit()
+    assert compile_mask(db.conn, user) == PERM_BITS["cad_func"]
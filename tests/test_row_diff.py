@@ -0,0 +1,55 @@
+# tests/test_row_diff.py
+import sqlite3
+
+import pytest
+
+from app.data.row_diff import diff_rows, save_rows
+
+KEY, VALS = ("propriedade",), ("minimo", "maximo")
+
+
+@pytest.fixture
+def conn():
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE ap (produto_id INTEGER, propriedade TEXT, minimo TEXT, maximo TEXT, ordem INTEGER)")
+    yield con
+    con.close()
+
+
+def load(con, pid=1):
+    return con.execute("SELECT propriedade, minimo, maximo FROM ap WHERE produto_id=? "
+                       "ORDER BY ordem, rowid", (pid,)).fetchall()
+
+
+def test_diff_matches_by_normalized_key_and_position():
+    existing = [(10, "Umidade", "0", "1"), (11, "pH", "6", "8"), (12, "pH", "5", "9")]
+    ins, upd, dele = diff_rows(existing, [("Umidade", "0", "1"), ("PH", "6", "7"), ("Cor", "", "")])
+    assert ins == [("Cor", "", "")]
+    assert upd == [(11, ("PH", "6", "7"))]
+    assert dele == [12]
+
+
+def test_save_only_touches_changed_rows(conn):
+    save_rows(conn, "ap", {"produto_id": 1}, KEY, VALS, [("Umidade", "0", "1"), ("pH", "6", "8")], order_col="ordem")
+    ids = dict(conn.execute("SELECT propriedade, rowid FROM ap"))
+    assert save_rows(conn, "ap", {"produto_id": 1}, KEY, VALS,
+                     [("Umidade", "0", "2"), ("pH", "6", "8")], order_col="ordem") == (0, 1, 0)
+    assert dict(conn.execute("SELECT propriedade, rowid FROM ap")) == ids
+    assert save_rows(conn, "ap", {"produto_id": 1}, KEY, VALS,
+                     [("Umidade", "0", "2"), ("pH", "6", "8")], order_col="ordem") == (0, 0, 0)
+
+
+def test_grid_order_survives_reload(conn):
+    save_rows(conn, "ap", {"produto_id": 1}, KEY, VALS, [("A", "", ""), ("B", "", "")], order_col="ordem")
+    # linha nova no topo e as antigas invertidas: a ordem da grade é a que volta
+    # (B continua na posição 1; só A muda de lugar)
+    grid = [("C", "1", ""), ("B", "", ""), ("A", "", "")]
+    assert save_rows(conn, "ap", {"produto_id": 1}, KEY, VALS, grid, order_col="ordem") == (1, 1, 0)
+    assert load(conn) == grid
+
+
+def test_scope_isolates_other_products(conn):
+    save_rows(conn, "ap", {"produto_id": 1}, KEY, VALS, [("A", "", "")], order_col="ordem")
+    save_rows(conn, "ap", {"produto_id": 2}, KEY, VALS, [("B", "", "")], order_col="ordem")
+    save_rows(conn, "ap", {"produto_id": 1}, KEY, VALS, [], order_col="ordem")
+    assert load(conn, 1) == [] and load(conn, 2) == [("B", "", "")]
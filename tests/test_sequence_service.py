@@ -0,0 +1,85 @@
+# tests/test_sequence_service.py
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from app.ui.services.sequence_service import SequenceService
+
+
+def certificados(db, *laudos):
+    db.conn.execute("CREATE TABLE IF NOT EXISTS certificados (id INTEGER PRIMARY KEY, numero TEXT, laudo TEXT)")
+    db.conn.executemany("INSERT INTO certificados (numero, laudo) VALUES (?, ?)", laudos)
+    db.conn.commit()
+
+
+def test_seed_is_max_across_tables_even_with_empty_cert_consulta(db):
+    certificados(db, ("12", "500"), ("13", "499"))  # cert_consulta existe e está vazia
+    seq = SequenceService(db, block=5)
+    try:
+        assert seq.next("laudo") == 501
+    finally:
+        seq.close()
+
+
+def test_seed_takes_certificados_numero_into_account(db):
+    certificados(db, ("730", "500"))
+    db.conn.execute("INSERT INTO cert_consulta (laudo) VALUES ('610')")
+    db.conn.commit()
+    seq = SequenceService(db)
+    try:
+        assert seq.next("laudo") == 731
+    finally:
+        seq.close()
+
+
+def test_seed_fails_when_no_source_is_readable(db):
+    db.conn.execute("DROP TABLE cert_consulta")
+    db.conn.commit()
+    seq = SequenceService(db)
+    try:
+        with pytest.raises(RuntimeError):
+            seq.next("laudo")
+        assert db.conn.execute("SELECT COUNT(*) FROM TBL_Contador").fetchone()[0] == 0
+    finally:
+        seq.close()
+
+
+def test_two_stations_never_hand_out_the_same_number(db):
+    certificados(db, ("1", "500"))
+    a, b = SequenceService(db, block=3), SequenceService(db, block=4)
+    try:
+        got = []
+        for _ in range(10):
+            got += a.take("laudo", 2) + b.take("laudo", 1)
+        assert len(got) == len(set(got)) == 30
+        assert min(got) == 501
+    finally:
+        a.close(); b.close()
+
+
+def test_leftover_block_is_recorded_as_gap(db):
+    seq = SequenceService(db, block=5)
+    assert seq.take("laudo", 2) == [1, 2]
+    seq.release("laudo", 2)
+    seq.close()
+    gaps = db.conn.execute("SELECT inicio, fim, motivo FROM TBL_Contador_Lacuna ORDER BY inicio").fetchall()
+    assert [tuple(g) for g in gaps] == [(2, 2, "cancelado"), (3, 5, "sobra de bloco")]
+
+
+def test_issued_certificates_take_their_laudo_from_the_sequence(db):
+    from app.ui.core.app_context import AppContext
+    from app.ui.core.event_bus import EventBus
+    from app.ui.services.data_service import DataService
+
+    db.conn.execute("INSERT INTO cert_consulta (laudo) VALUES ('41')")
+    db.conn.commit()
+    seq = SequenceService(db, block=5)
+    try:
+        svc = DataService(db, AppContext(), EventBus(), seq=seq)
+        got = svc.issue_certificates([("10", "L1"), ("11", "L2")])
+        assert [p["laudo"] for p in got] == ["42", "43"]
+        assert svc.issue_certificates([("10", "L3")])[0]["laudo"] == "44"
+    finally:
+        seq.close()
+    rows = db.conn.execute("SELECT laudo, codigo, lote FROM cert_consulta WHERE lote IS NOT NULL ORDER BY id")
+    assert [tuple(r) for r in rows] == [("42", "10", "L1"), ("43", "11", "L2"), ("44", "10", "L3")]
@@ -0,0 +1,60 @@
+# tests/test_snapshot.py
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.data.snapshot import ReadSnapshot
+
+
+@pytest.fixture
+def live(db):
+    db.conn.execute("CREATE TABLE leitura (x)")
+    db.conn.execute("INSERT INTO leitura VALUES (1)")
+    db.conn.commit()
+    return db
+
+
+def count(snap):
+    return snap.conn.execute("SELECT COUNT(*) FROM leitura").fetchone()[0]
+
+
+def test_reads_live_db_until_first_build_then_the_copy(live):
+    snap = ReadSnapshot(live)
+    assert not snap.ready and snap.conn is live.conn
+    snap.refresh()
+    assert snap.ready and count(snap) == 1
+    live.conn.execute("INSERT INTO leitura VALUES (2)")
+    live.conn.commit()
+    assert count(snap) == 1  # cópia congelada até a próxima troca
+    snap.refresh()
+    assert count(snap) == 2
+    snap.close()
+
+
+def test_old_generations_are_removed_after_two_swaps(live):
+    snap = ReadSnapshot(live)
+    for _ in range(3):
+        snap.refresh()
+    assert len(list(snap.folder.glob("*.db"))) == 2
+    snap.close()
+
+
+def test_recent_copy_from_previous_session_is_adopted(live):
+    ReadSnapshot(live).refresh()
+    snap = ReadSnapshot(live, max_age=timedelta(minutes=30))
+    assert snap.ready and count(snap) == 1
+    snap.close()
+
+
+def test_stale_copy_from_previous_session_is_dropped(live):
+    old = ReadSnapshot(live)
+    old.refresh()
+    path = old.db_path
+    old.close()
+    past = time.time() - 3600
+    os.utime(path, (past, past))
+    snap = ReadSnapshot(live, max_age=timedelta(minutes=30))
+    assert not snap.ready and snap.conn is live.conn
+    assert not path.exists()